@@ -11,9 +11,17 @@ from admin.view import (
     ContentView,
     InteractionEventView,
     QuestionView,
+    StatsView,
     UserView,
 )
-from data.db import create_db_and_tables, engine, load_fixtures
+from data.config import DatabaseSettings
+from data.db import (
+    create_db_and_tables,
+    engine,
+    load_fixtures,
+    replica_engine,
+)
+from data.warmup import warm_up
 
 from .auth import AdminAuthBackend
 from .config import AdminConfig
@@ -28,6 +36,13 @@ async def lifespan(app: FastAPI):
     await create_db_and_tables()
     await load_fixtures("initial_data.json")
 
+    # Списки админки читаются с реплики, если она настроена
+    for db_engine in filter(None, (engine, replica_engine)):
+        try:
+            await warm_up(db_engine, DatabaseSettings.WARMUP_CONNECTIONS)
+        except Exception as e:
+            logger.error(f"Database warm-up failed: {e}")
+
     logger.info("Admin panel started successfully")
     yield
 
@@ -68,3 +83,4 @@ admin.add_view(CategoryView)
 admin.add_view(ContentView)
 admin.add_view(QuestionView)
 admin.add_view(InteractionEventView)
+admin.add_view(StatsView)
@@ -1,12 +1,59 @@
 import logging
+import time
+from contextvars import ContextVar
+from typing import Any
 
 from sqladmin import ModelView
+from sqlalchemy.sql import ClauseElement
+from starlette.requests import Request
+
+from data.config import DatabaseSettings
+from data.db import get_session, replica_session
 
 logger = logging.getLogger(__name__)
 
+# Ключ сессии админа: до какого времени читать с основной БД
+PRIMARY_UNTIL_KEY = "db_primary_until"
+
+# Запросы текущего списка выполняются на реплике
+_read_from_replica: ContextVar[bool] = ContextVar(
+    "admin_read_from_replica", default=False
+)
+
 
 class CustomModelView(ModelView):
-    """Базовый класс для View с логированием"""
+    """Базовый класс для View с логированием.
+
+    Списки и подсчёт записей читаются с реплики, если она настроена.
+    После правки админ некоторое время читает с основной БД, чтобы
+    сразу видеть свои изменения.
+    """
+
+    @staticmethod
+    def _mark_primary(request: Request) -> None:
+        """Читать с основной БД после изменения данных."""
+        if replica_session is not None:
+            request.session[PRIMARY_UNTIL_KEY] = (
+                time.time() + DatabaseSettings.REPLICA_STICKY_SECONDS
+            )
+
+    @staticmethod
+    def _is_sticky(request: Request) -> bool:
+        return request.session.get(PRIMARY_UNTIL_KEY, 0) > time.time()
+
+    async def list(self, request: Request) -> Any:
+        token = _read_from_replica.set(not self._is_sticky(request))
+        try:
+            return await super().list(request)
+        finally:
+            _read_from_replica.reset(token)
+
+    async def _run_query(self, stmt: ClauseElement) -> Any:
+        if not _read_from_replica.get():
+            return await super()._run_query(stmt)
+        async with get_session(readonly=True) as session:
+            result = await session.execute(stmt)
+            return result.scalars().unique().all()
 
     def _get_model_id(self, model):
         """Получить правильный ID модели для логирования"""
@@ -24,6 +71,7 @@ class CustomModelView(ModelView):
         """Логирование изменений моделей"""
         model_name = self._get_model_name()
         model_id = self._get_model_id(model)
+        self._mark_primary(request)
 
         if is_created:
             logger.info(f"Admin created {model_name} (ID: {model_id})")
@@ -34,5 +82,6 @@ class CustomModelView(ModelView):
         """Логирование удаления моделей"""
         model_name = self._get_model_name()
         model_id = self._get_model_id(model)
+        self._mark_primary(request)
 
         logger.warning(f"Admin deleted {model_name} (ID: {model_id})")
@@ -3,6 +3,7 @@ from .content import ContentView
 from .question import QuestionView
 from .user import UserView
 from .interaction_event import InteractionEventView
+from .stats import StatsView
 
 __all__ = [
     "CategoryView",
@@ -10,4 +11,5 @@ __all__ = [
     "QuestionView",
     "UserView",
     "InteractionEventView",
+    "StatsView",
 ]
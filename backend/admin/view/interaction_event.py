@@ -23,6 +23,7 @@ class InteractionEventView(CustomModelView, model=InteractionEvent):
         InteractionEvent.message_text: "Текст сообщения",
         InteractionEvent.callback_data: "Данные кнопки",
         InteractionEvent.created_at: "Дата и время",
+        InteractionEvent.sample_weight: "Вес выборки",
     }
 
     # Список колонок для отображения
@@ -41,6 +42,7 @@ class InteractionEventView(CustomModelView, model=InteractionEvent):
         InteractionEvent.user_id,
         InteractionEvent.message_text,
         InteractionEvent.callback_data,
+        InteractionEvent.sample_weight,
         InteractionEvent.created_at,
     ]
 
@@ -106,7 +108,7 @@ class InteractionEventView(CustomModelView, model=InteractionEvent):
         InteractionEvent.created_at: format_datetime,
     }
 
-    # Дополнительная статистика (можно добавить в будущем)
+    # Сводная статистика — на странице StatsView
     async def get_count_query(self, request):
         """Получить запрос для подсчета общего количества."""
         return await super().get_count_query(request)
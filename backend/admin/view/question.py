@@ -26,6 +26,8 @@ class QuestionView(CustomModelView, model=Question):
         Question.answer_text: "Ответ",
         Question.user: "Пользователь",
         Question.created_at: "Дата и время получения вопроса",
+        Question.assigned_admin_id: "Назначен админу",
+        Question.assigned_at: "Дата и время назначения",
     }
 
     # Поля страницы списка
@@ -43,6 +45,8 @@ class QuestionView(CustomModelView, model=Question):
         Question.answer_text,
         Question.created_at,
         Question.user,
+        Question.assigned_admin_id,
+        Question.assigned_at,
     ]
 
     def list_query(self, request: Request):
@@ -79,6 +83,7 @@ class QuestionView(CustomModelView, model=Question):
         """Специальное логирование для ответов на вопросы"""
         model_name = self._get_model_name()
         model_id = self._get_model_id(model)
+        self._mark_primary(request)
 
         if is_created:
             logger.info(f"Admin created {model_name} (ID: {model_id})")
@@ -0,0 +1,30 @@
+from sqladmin import BaseView, expose
+from starlette.requests import Request
+
+from db_handler.service import InteractionEventService
+
+
+class StatsView(BaseView):
+    """Сводная статистика взаимодействий с ботом."""
+
+    name = "Статистика"
+    icon = "fa-solid fa-chart-pie"
+
+    @expose("/stats", methods=["GET"])
+    async def stats_page(self, request: Request):
+        """Агрегаты по событиям; читаются с реплики, если она настроена."""
+        async with InteractionEventService.analytics() as service:
+            context = {
+                "total_events": await service.count_total_events(),
+                "unique_users": await service.count_unique_users(),
+                "average_events": await service.get_average_events_per_user(),
+                "start_only_users": (
+                    await service.get_users_with_only_one_message_count()
+                ),
+                "last_week": await service.get_event_count_last_week(),
+                "messages": await service.get_most_popular_messages(),
+                "callbacks": await service.get_most_popular_callbacks(),
+            }
+        return await self.templates.TemplateResponse(
+            request, "sqladmin/stats.html", context
+        )
@@ -0,0 +1,102 @@
+# Пропускная способность запросов DB_FAST_PATH (asyncpg напрямую)
+# против ORM-версий, строк в секунду.
+#
+#     BENCH_DB_URL=postgresql+asyncpg://... python -m bench.fast_queries
+#
+# Нужен PostgreSQL: быстрые запросы работают только через asyncpg.
+import sys
+import time
+
+from bench.common import BENCH_DB_URL, create_bench_engine, report, run
+
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from data import fast_queries
+from data.models import Content
+from data.queries import ACTIVE_CATEGORY_BUTTONS, get_button_by_id
+
+DURATION = 2.0
+
+
+async def rows_per_second(fn) -> int:
+    """Сколько строк возвращает `fn` за секунду при последовательных вызовах."""
+    rows = 0
+    started = time.perf_counter()
+    while time.perf_counter() - started < DURATION:
+        rows += await fn()
+    return int(rows / (time.perf_counter() - started))
+
+
+async def main() -> None:
+    if not BENCH_DB_URL.startswith('postgresql+asyncpg'):
+        sys.exit('BENCH_DB_URL must point to PostgreSQL (asyncpg)')
+
+    engine = await create_bench_engine()
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+    async with session_factory() as session:
+        content_id, category_id, views_count = (await session.execute(
+            select(Content.id, Content.category_id, Content.views_count)
+            .order_by(Content.id).limit(1)
+        )).one()
+
+        async def orm_content():
+            return int(await get_button_by_id(content_id, session) is not None)
+
+        async def fast_content():
+            record = await fast_queries.get_content(session, content_id)
+            return int(record is not None)
+
+        async def orm_buttons():
+            result = await session.execute(
+                ACTIVE_CATEGORY_BUTTONS, {'category_id': category_id}
+            )
+            return len(result.scalars().all())
+
+        async def fast_buttons():
+            return len(
+                await fast_queries.get_category_buttons(session, category_id)
+            )
+
+        async def orm_increment():
+            button = await get_button_by_id(content_id, session)
+            button.views_count += 1
+            await session.commit()
+            return 1
+
+        async def fast_increment():
+            await fast_queries.increment_views(engine, content_id)
+            return 1
+
+        rows = []
+        for name, orm, fast in (
+            ('content by id', orm_content, fast_content),
+            ('category buttons', orm_buttons, fast_buttons),
+            ('increment views', orm_increment, fast_increment),
+        ):
+            orm_rate = await rows_per_second(orm)
+            await session.commit()
+            fast_rate = await rows_per_second(fast)
+            await session.commit()
+            rows.append(
+                (name, orm_rate, fast_rate, f'{fast_rate / orm_rate:.2f}x')
+            )
+
+        # Счётчик просмотров возвращается к исходному значению
+        await session.execute(
+            update(Content)
+            .where(Content.id == content_id)
+            .values(views_count=views_count)
+        )
+        await session.commit()
+    await engine.dispose()
+
+    report(
+        f'Rows/sec on {engine.url.drivername}',
+        ('query', 'orm', 'asyncpg', 'speedup'),
+        rows,
+    )
+
+
+if __name__ == '__main__':
+    run(main)
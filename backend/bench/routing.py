@@ -0,0 +1,118 @@
+# Время маршрутизации callback_query в зависимости от числа
+# обработчиков: фильтры CallbackData, F.data.startswith и CallbackTable.
+# Дополнительно — упаковка и разбор CompactCallbackData против
+# стандартной CallbackData aiogram.
+#
+#     python -m bench.routing
+import types
+
+from bench.common import ameasure, measure, report, run
+
+from aiogram import Bot, Dispatcher, F, Router
+from aiogram.filters.callback_data import CallbackData
+from aiogram.types import Update
+
+from bot.handlers.dispatch import CallbackTable
+from bot.keyboards.callbacks import CompactCallbackData
+
+HANDLER_COUNTS = (10, 50, 200)
+CALLS = 500
+CODEC_CALLS = 20000
+
+
+def make_callback_classes(base: type, count: int) -> list[type]:
+    """`count` классов данных с разными префиксами и одним полем int."""
+    return [
+        types.new_class(
+            f'Item{index}Callback',
+            (base,),
+            {'prefix': f'item{index}'},
+            lambda ns: ns.update(__annotations__={'item_id': int}),
+        )
+        for index in range(count)
+    ]
+
+
+def make_update(data: str) -> Update:
+    user = {'id': 42, 'is_bot': False, 'first_name': 'User'}
+    return Update.model_validate({
+        'update_id': 1,
+        'callback_query': {
+            'id': '1',
+            'from': user,
+            'chat_instance': '1',
+            'data': data,
+        },
+    })
+
+
+async def handle(callback) -> None:
+    pass
+
+
+def filter_router(classes: list[type]) -> Router:
+    router = Router()
+    for callback_data in classes:
+        router.callback_query.register(handle, callback_data.filter())
+    return router
+
+
+def startswith_router(classes: list[type]) -> Router:
+    router = Router()
+    for callback_data in classes:
+        router.callback_query.register(
+            handle, F.data.startswith(f'{callback_data.__prefix__}:')
+        )
+    return router
+
+
+def table_router(classes: list[type]) -> Router:
+    router = Router()
+    table = CallbackTable(router)
+    for callback_data in classes:
+        table(callback_data)(handle)
+    return router
+
+
+async def route_time(router: Router, bot: Bot, update: Update) -> float:
+    dp = Dispatcher()
+    dp.include_router(router)
+    return await ameasure(lambda: dp.feed_update(bot, update), CALLS)
+
+
+async def main() -> None:
+    bot = Bot('123456:bench-token')
+    rows = []
+    for count in HANDLER_COUNTS:
+        classes = make_callback_classes(CompactCallbackData, count)
+        # Худший случай для цепочки фильтров — последний обработчик
+        update = make_update(classes[-1](item_id=7).pack())
+        rows.append((
+            count,
+            *[
+                f'{await route_time(build(classes), bot, update):.1f}'
+                for build in (filter_router, startswith_router, table_router)
+            ],
+        ))
+    await bot.session.close()
+    report(
+        'Callback routing to the last handler, us/update',
+        ('handlers', 'filter()', 'startswith', 'table'),
+        rows,
+    )
+
+    rows = []
+    for base in (CallbackData, CompactCallbackData):
+        (callback_class,) = make_callback_classes(base, 1)
+        callback_data = callback_class(item_id=7)
+        packed = callback_data.pack()
+        rows.append((
+            base.__name__,
+            f'{measure(callback_data.pack, CODEC_CALLS):.2f}',
+            f'{measure(lambda: callback_class.unpack(packed), CODEC_CALLS):.2f}',
+        ))
+    report('Callback data codec, us/call', ('class', 'pack', 'unpack'), rows)
+
+
+if __name__ == '__main__':
+    run(main)
@@ -0,0 +1,136 @@
+# Накладные расходы горячих запросов каталога: выражение, собираемое
+# при каждом вызове, против заранее собранного из data.queries.
+#
+#     python -m bench.statements
+#
+# BENCH_DB_URL задаёт БД для сквозных замеров (по умолчанию SQLite в
+# памяти).
+from bench.common import (
+    ameasure,
+    create_bench_engine,
+    measure,
+    report,
+    run,
+)
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from bot.keyboards.main_menu import (
+    get_category_buttons_keyboard,
+    get_main_menu_keyboard,
+)
+from data.db import track_compiled_cache
+from data.models import Category, Content
+from data.queries import (
+    ACTIVE_CATEGORY_BUTTONS,
+    get_button_by_id,
+    get_category_by_id,
+)
+from utils.metrics import metrics
+
+CALLS = 2000
+DB_CALLS = 300
+
+
+def build_category_buttons(category_id: int):
+    """Запрос кнопок категории в виде, как он строился до предсборки."""
+    return (
+        select(Content)
+        .where(Content.category_id == category_id, Content.is_active)
+        .order_by(Content.views_count.desc())
+    )
+
+
+async def button_by_id_inline(button_id: int, session: AsyncSession):
+    result = await session.execute(
+        select(Content).where(Content.id == button_id)
+    )
+    return result.scalar_one_or_none()
+
+
+async def category_by_id_inline(category_id: int, session: AsyncSession):
+    result = await session.execute(
+        select(Category).where(Category.id == category_id)
+    )
+    return result.scalar_one_or_none()
+
+
+async def category_buttons_inline(category_id: int, session: AsyncSession):
+    result = await session.execute(build_category_buttons(category_id))
+    return result.scalars().all()
+
+
+async def category_buttons_precompiled(
+    category_id: int, session: AsyncSession
+):
+    result = await session.execute(
+        ACTIVE_CATEGORY_BUTTONS, {'category_id': category_id}
+    )
+    return result.scalars().all()
+
+
+async def main() -> None:
+    report(
+        'Statement construction + cache key, us/call',
+        ('statement', 'inline', 'precompiled'),
+        [(
+            'category buttons',
+            f'{measure(lambda: build_category_buttons(1)._generate_cache_key(), CALLS):.2f}',
+            f'{measure(lambda: ACTIVE_CATEGORY_BUTTONS._generate_cache_key(), CALLS):.2f}',
+        )],
+    )
+
+    engine = await create_bench_engine()
+    track_compiled_cache(engine, 'bench')
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+    rows = []
+    async with session_factory() as session:
+        for name, inline, precompiled in (
+            (
+                'button by id',
+                lambda: button_by_id_inline(1, session),
+                lambda: get_button_by_id(1, session),
+            ),
+            (
+                'category by id',
+                lambda: category_by_id_inline(1, session),
+                lambda: get_category_by_id(1, session),
+            ),
+            (
+                'category buttons',
+                lambda: category_buttons_inline(1, session),
+                lambda: category_buttons_precompiled(1, session),
+            ),
+            (
+                'buttons keyboard',
+                None,
+                lambda: get_category_buttons_keyboard(1, session),
+            ),
+            (
+                'main menu keyboard',
+                None,
+                lambda: get_main_menu_keyboard(session),
+            ),
+        ):
+            rows.append((
+                name,
+                f'{await ameasure(inline, DB_CALLS):.0f}' if inline else '-',
+                f'{await ameasure(precompiled, DB_CALLS):.0f}',
+            ))
+    await engine.dispose()
+
+    report(
+        f'End to end on {engine.url.drivername}, us/call',
+        ('query', 'inline', 'precompiled'),
+        rows,
+    )
+    snapshot = metrics.snapshot()
+    print(
+        '\ncompiled cache hit rate: '
+        f"{snapshot['gauges'].get('bench.compiled_cache.hit_rate', 0):.3f}"
+    )
+
+
+if __name__ == '__main__':
+    run(main)
@@ -1,21 +1,101 @@
 import asyncio
+import signal
+from contextlib import suppress
 from logging import getLogger
 from typing import cast
 
 from aiogram import Bot, Dispatcher
-from aiogram.fsm.storage.memory import MemoryStorage
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
+from aiogram.enums import UpdateType
+from aiogram.fsm.storage.base import BaseStorage
+from aiogram.webhook.aiohttp_server import (
+    SimpleRequestHandler,
+    setup_application,
+)
+from aiohttp import web
 from decouple import config
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlmodel import select
 
+from bot.handlers.admin_handlers import admin_router
 from bot.handlers.callbacks import callback_router
 from bot.handlers.start import start_router
+from bot.handlers.user_handlers import user_router
+from bot.middlewares.budget import Budgets, LatencyBudgetMiddleware
+from bot.middlewares.callback_ack import (
+    CallbackAckMiddleware,
+    CallbackAnswerMiddleware,
+)
+from bot.middlewares.db import DbSessionMiddleware
+from bot.middlewares.debounce import CallbackDebounceMiddleware
+from bot.middlewares.dedup import UpdateDedupMiddleware
+from bot.middlewares.lanes import UpdateLaneMiddleware
+from bot.middlewares.outbound import OutboundSchedulerMiddleware
 from bot.middlewares.stats import InteractionEventMiddleware
+from bot.middlewares.throttling import ThrottlingMiddleware
+from bot.middlewares.unreachable import UnreachableUserMiddleware
 from bot.middlewares.users import TrackNewUserMiddleware
-from data.db import create_db_and_tables
+from bot.config import (
+    BotSettings,
+    CallbackAckSettings,
+    DedupSettings,
+    FSMSettings,
+    ReminderSettings,
+    ThrottleSettings,
+)
+from bot.keyboards.main_menu import (
+    get_category_buttons_keyboard,
+    get_main_menu_keyboard,
+)
+from bot.services.admin_service import AdminService
+from bot.services.event_recorder import InteractionEventRecorder
+from bot.services.event_sampling import event_sampler
+from bot.services.outbound_service import outbound_scheduler
+from bot.services.assignment_service import AssignmentService
+from bot.services.question_service import QuestionService, question_digest
+from bot.services.reminder_service import ReminderScheduler
+from bot.services.role_service import RoleService
+from bot.services.unreachable_service import UnreachableUserService
+from bot.storage import (
+    BoundedMemoryStorage,
+    PostgresStorage,
+    UpdateMarkStore,
+)
+from bot.workers import WorkerPool, consume_updates
+from data.config import DatabaseSettings
+from data.db import create_db_and_tables, engine
+from data.models import Category, InteractionEvent
+from data.warmup import warm_up, warm_up_queries
 from utils.logger import setup_logger
+from utils.metrics import metrics, run_metrics_logger
+
+
+def create_storage() -> BaseStorage:
+    """Хранилище FSM согласно настройке `FSM_STORAGE`."""
+    if FSMSettings.STORAGE == "postgres":
+        return PostgresStorage(
+            engine,
+            ttl=FSMSettings.TTL,
+            cache_ttl=FSMSettings.CACHE_TTL,
+            cache_size=FSMSettings.MAX_SIZE,
+        )
+    return BoundedMemoryStorage(
+        max_size=FSMSettings.MAX_SIZE, ttl=FSMSettings.TTL
+    )
+
 
 # Инициализация бота и диспетчера
-bot = Bot(token=cast(str, config("BOT_TOKEN")))
-dp = Dispatcher(storage=MemoryStorage())
+bot = Bot(
+    token=cast(str, config("BOT_TOKEN")),
+    # Свой адрес Bot API: локальный сервер Telegram или тестовая заглушка
+    session=AiohttpSession(
+        api=TelegramAPIServer.from_base(BotSettings.API_SERVER)
+    ) if BotSettings.API_SERVER else None,
+)
+dp = Dispatcher(storage=create_storage())
+# Область хранения уточняется в процессах-обработчиках
+update_dedup = UpdateDedupMiddleware(UpdateMarkStore(engine))
 
 setup_logger()
 logger = getLogger("bot.app")
@@ -23,13 +103,260 @@ logger = getLogger("bot.app")
 
 def setup_middlewares():
     """Настройка middleware для бота."""
+    # Повторно доставленные обновления отбрасываются первыми
+    if DedupSettings.ENABLED:
+        dp.update.outer_middleware(update_dedup)
+    # Повторные нажатия той же кнопки — до очередей и сессии БД
+    dp.update.outer_middleware(CallbackDebounceMiddleware())
+    # Лимит частоты обновлений от одного пользователя
+    if ThrottleSettings.ENABLED:
+        dp.update.outer_middleware(ThrottlingMiddleware())
+    # Ответ на нажатие, не дожидаясь обработчика (и очереди)
+    if CallbackAckSettings.ENABLED:
+        callback_acks = CallbackAckMiddleware()
+        dp.update.outer_middleware(callback_acks)
+        bot.session.middleware(CallbackAnswerMiddleware(callback_acks))
+    # Порядок обработки по пользователям и общий лимит обработчиков
+    dp.update.outer_middleware(UpdateLaneMiddleware())
+    # Общая сессия БД для middleware и обработчиков одного обновления
+    dp.update.outer_middleware(DbSessionMiddleware())
     # Подключаем middleware для отслеживания событий
+    if event_sampler.adaptive:
+        event_sampler.track_latency(engine)
     dp.message.middleware(InteractionEventMiddleware())
     dp.callback_query.middleware(InteractionEventMiddleware())
     dp.message.middleware(TrackNewUserMiddleware())
+    # Бюджеты времени обработчиков и лимиты запросов к БД
+    for router, budget in (
+        (start_router, Budgets.USER),
+        (user_router, Budgets.USER),
+        (admin_router, Budgets.ADMIN),
+    ):
+        router.message.middleware(LatencyBudgetMiddleware(budget))
+        router.callback_query.middleware(LatencyBudgetMiddleware(budget))
+    # Отслеживаем пользователей, заблокировавших бота
+    bot.session.middleware(UnreachableUserMiddleware())
+    # Все отправки и редактирования идут через общий планировщик
+    bot.session.middleware(OutboundSchedulerMiddleware(outbound_scheduler))
     logger.info("Middleware подключены")
 
 
+async def warm_up_catalog(session: AsyncSession):
+    """Клавиатуры каталога и запись события — частые запросы бота.
+
+    Строит меню всех категорий, чтобы прогреть и запросы, и страницы
+    каталога в кеше Postgres.
+    """
+    await get_main_menu_keyboard(session)
+    await AdminService.get_admin_main_menu_keyboard(session)
+    category_ids = (await session.execute(select(Category.id))).scalars()
+    for category_id in category_ids.all():
+        await get_category_buttons_keyboard(category_id, session)
+        await AdminService.get_admin_category_buttons_keyboard(
+            category_id, session
+        )
+
+    # Вставка откатывается вместе со всем прогревом
+    session.add(InteractionEvent(event_type=UpdateType.MESSAGE, user_id=0))
+    await session.flush()
+
+
+async def warm_up_database():
+    """Прогрев соединений перед приёмом обновлений."""
+    try:
+        await warm_up(
+            engine,
+            DatabaseSettings.WARMUP_CONNECTIONS,
+            (warm_up_queries, warm_up_catalog),
+        )
+    except Exception as e:
+        logger.error(f"Database warm-up failed: {e}")
+
+
+async def purge_fsm_storage(storage: PostgresStorage):
+    """Периодическая очистка истёкших состояний FSM."""
+    while True:
+        await asyncio.sleep(FSMSettings.PURGE_INTERVAL)
+        try:
+            await storage.purge_expired()
+        except Exception as e:
+            logger.error(f"FSM storage purge error: {e}")
+
+
+def setup_dispatcher():
+    """Middleware и роутеры диспетчера."""
+    setup_middlewares()
+    dp.include_router(start_router)
+    dp.include_router(callback_router)
+
+
+def start_process_tasks() -> list[asyncio.Task]:
+    """Фоновые задачи каждого процесса, отправляющего сообщения.
+
+    Деактивация недоступных пользователей, запись событий, кеш ролей,
+    сохранение последних update_id и метрики.
+    """
+    return [
+        asyncio.create_task(UnreachableUserService.run_periodic_flush()),
+        asyncio.create_task(InteractionEventRecorder.run_periodic_flush()),
+        asyncio.create_task(RoleService.run_listener()),
+        asyncio.create_task(update_dedup.run_periodic_save()),
+        asyncio.create_task(run_metrics_logger()),
+    ]
+
+
+def start_singleton_tasks() -> list[asyncio.Task]:
+    """Фоновые задачи, которые должны работать в одном процессе."""
+    tasks = []
+    if ReminderSettings.SCHEDULER_ENABLED:
+        tasks.append(asyncio.create_task(ReminderScheduler(bot).run()))
+    if isinstance(dp.storage, PostgresStorage):
+        tasks.append(asyncio.create_task(purge_fsm_storage(dp.storage)))
+    if AssignmentService.is_enabled():
+        tasks.append(
+            asyncio.create_task(QuestionService.run_reassignment(bot))
+        )
+    return tasks
+
+
+async def shutdown(background_tasks: list[asyncio.Task]):
+    """Остановка фоновых задач и досылка накопленных сообщений."""
+    for task in background_tasks:
+        task.cancel()
+    for task in background_tasks:
+        with suppress(asyncio.CancelledError):
+            await task
+    await question_digest.close(bot)
+    await outbound_scheduler.stop()
+    await bot.session.close()
+
+
+async def run_polling():
+    """Получение обновлений через long polling."""
+    await bot.delete_webhook(drop_pending_updates=True)
+
+    # Запрашиваем только те типы обновлений, что обрабатывают роутеры.
+    # Сессию бота закрываем сами: после остановки поллинга ещё
+    # досылаются накопленные сводки и очередь планировщика
+    await dp.start_polling(
+        bot,
+        polling_timeout=BotSettings.POLLING_TIMEOUT,
+        allowed_updates=dp.resolve_used_update_types(),
+        close_bot_session=False,
+    )
+
+
+async def handle_metrics(request: web.Request) -> web.Response:
+    """Снимок метрик процесса."""
+    return web.json_response(metrics.snapshot())
+
+
+async def wait_for_stop_signal():
+    """Дождаться SIGTERM или SIGINT."""
+    stop_event = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        with suppress(NotImplementedError):
+            loop.add_signal_handler(sig, stop_event.set)
+    await stop_event.wait()
+
+
+async def serve_webhook(app: web.Application):
+    """Регистрация webhook и запуск aiohttp-сервера до сигнала остановки.
+
+    Несколько процессов могут работать за балансировщиком; webhook в
+    Telegram регистрирует только экземпляр с `WEBHOOK_REGISTER=True`.
+    """
+    app.router.add_get("/metrics", handle_metrics)
+
+    if BotSettings.WEBHOOK_REGISTER:
+        await bot.set_webhook(
+            url=BotSettings.WEBHOOK_URL + BotSettings.WEBHOOK_PATH,
+            secret_token=BotSettings.WEBHOOK_SECRET or None,
+            allowed_updates=dp.resolve_used_update_types(),
+            max_connections=BotSettings.WEBHOOK_MAX_CONNECTIONS,
+        )
+        logger.info(f"Webhook set: {BotSettings.WEBHOOK_URL}")
+
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(
+        runner, host=BotSettings.WEBAPP_HOST, port=BotSettings.WEBAPP_PORT
+    )
+    await site.start()
+    logger.info(
+        "Webhook server listening on "
+        f"{BotSettings.WEBAPP_HOST}:{BotSettings.WEBAPP_PORT}"
+    )
+
+    try:
+        await wait_for_stop_signal()
+    finally:
+        await runner.cleanup()
+
+
+async def run_webhook():
+    """Приём и обработка обновлений через webhook на aiohttp."""
+    app = web.Application()
+    SimpleRequestHandler(
+        dispatcher=dp,
+        bot=bot,
+        secret_token=BotSettings.WEBHOOK_SECRET or None,
+    ).register(app, path=BotSettings.WEBHOOK_PATH)
+    setup_application(app, dp, bot=bot)
+    await serve_webhook(app)
+
+
+async def run_supervisor():
+    """Приём обновлений и распределение по процессам-обработчикам."""
+    pool = WorkerPool(target=worker_main)
+    pool.start()
+    try:
+        if BotSettings.MODE == "webhook":
+            app = web.Application()
+            app.router.add_post(
+                BotSettings.WEBHOOK_PATH, pool.handle_webhook
+            )
+            await serve_webhook(app)
+        else:
+            await bot.delete_webhook(drop_pending_updates=True)
+            poller = asyncio.create_task(
+                pool.poll(bot, dp.resolve_used_update_types())
+            )
+            stopper = asyncio.create_task(wait_for_stop_signal())
+            await asyncio.wait(
+                {poller, stopper}, return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in (poller, stopper):
+                task.cancel()
+                with suppress(asyncio.CancelledError):
+                    await task
+    finally:
+        await pool.stop()
+
+
+def worker_main(index: int, worker_queue):
+    """Точка входа процесса-обработчика."""
+    asyncio.run(run_worker(index, worker_queue))
+
+
+async def run_worker(index: int, worker_queue):
+    """Обработка обновлений, переданных принимающим процессом."""
+    setup_dispatcher()
+    update_dedup.scope = f"{DedupSettings.SCOPE}:worker-{index}"
+    await update_dedup.load()
+    await RoleService.refresh()
+    await warm_up_database()
+    # Глобальный лимит отправки делится между всеми процессами
+    outbound_scheduler.start(rate_share=1 / (BotSettings.WORKERS + 1))
+    background_tasks = start_process_tasks()
+    logger.info(f"Worker {index} ready")
+    try:
+        await consume_updates(worker_queue, bot, dp)
+    finally:
+        await shutdown(background_tasks)
+
+
 async def main():
     """Главная функция запуска бота."""
 
@@ -37,23 +364,44 @@ async def main():
 
     # Создаем таблицы в БД (включая таблицу статистики)
     await create_db_and_tables()
+    if isinstance(dp.storage, PostgresStorage):
+        await dp.storage.setup()
+    await update_dedup.store.setup()
     logger.info("Database tables created")
+    await RoleService.setup()
 
-    # Настраиваем middleware
-    setup_middlewares()
+    # Настраиваем middleware и роутеры
+    setup_dispatcher()
 
-    # Подключаем роутеры
-    dp.include_router(start_router)
-    dp.include_router(callback_router)
+    supervised = BotSettings.WORKERS > 1
+    if not supervised:
+        # В режиме супервизора обновления обрабатывают и прогреваются
+        # процессы-обработчики
+        await update_dedup.load()
+        await warm_up_database()
 
-    await bot.delete_webhook(drop_pending_updates=True)
-    logger.info("Bot started successfully")
+    logger.info(
+        f"Bot started successfully ({BotSettings.MODE} mode, "
+        f"{BotSettings.WORKERS} worker(s))"
+    )
+
+    outbound_scheduler.start(
+        rate_share=1 / (BotSettings.WORKERS + 1) if supervised else 1.0
+    )
+    background_tasks = start_process_tasks() + start_singleton_tasks()
 
     try:
-        await dp.start_polling(bot)
+        if supervised:
+            await run_supervisor()
+        elif BotSettings.MODE == "webhook":
+            await run_webhook()
+        else:
+            await run_polling()
     except Exception as e:
         logger.error(f"Bot error: {e}")
         raise
+    finally:
+        await shutdown(background_tasks)
 
 
 if __name__ == "__main__":
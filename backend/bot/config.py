@@ -1,4 +1,5 @@
 import logging
+import socket
 
 from decouple import config
 
@@ -11,6 +12,188 @@ BOT_TOKEN = config('BOT_TOKEN')
 ADMINS: list[int] = list(map(int, config('ADMINS').split(',')))
 
 
+class BotSettings:
+    """Режим получения обновлений и параметры подключения к Bot API."""
+
+    # polling или webhook
+    MODE: str = config('BOT_MODE', default='polling')
+    # Базовый URL Bot API (локальный сервер или тестовая заглушка)
+    API_SERVER: str = config('TELEGRAM_API_SERVER', default='')
+
+    # Long polling: время ожидания getUpdates (сек)
+    POLLING_TIMEOUT: int = config(
+        'BOT_POLLING_TIMEOUT', default=30, cast=int
+    )
+
+    # Webhook
+    WEBHOOK_URL: str = config('WEBHOOK_URL', default='')
+    WEBHOOK_PATH: str = config('WEBHOOK_PATH', default='/webhook')
+    WEBHOOK_SECRET: str = config('WEBHOOK_SECRET', default='')
+    # Регистрировать webhook в Telegram (достаточно одного экземпляра)
+    WEBHOOK_REGISTER: bool = config(
+        'WEBHOOK_REGISTER', default=True, cast=bool
+    )
+    WEBHOOK_MAX_CONNECTIONS: int = config(
+        'WEBHOOK_MAX_CONNECTIONS', default=40, cast=int
+    )
+    WEBAPP_HOST: str = config('WEBAPP_HOST', default='0.0.0.0')
+    WEBAPP_PORT: int = config('WEBAPP_PORT', default=8080, cast=int)
+
+    # Число процессов-обработчиков; больше 1 — режим супервизора
+    WORKERS: int = config('BOT_WORKERS', default=1, cast=int)
+    # Ёмкость очереди обновлений каждого процесса
+    WORKER_QUEUE_SIZE: int = config(
+        'BOT_WORKER_QUEUE_SIZE', default=1000, cast=int
+    )
+    # Максимум принятых, но не обработанных обновлений в процессе
+    WORKER_MAX_PENDING: int = config(
+        'BOT_WORKER_MAX_PENDING', default=256, cast=int
+    )
+
+
+class DedupSettings:
+    """Отбрасывание повторно доставленных обновлений."""
+
+    ENABLED: bool = config('UPDATE_DEDUP_ENABLED', default=True, cast=bool)
+    # Сколько последних update_id помнить
+    SIZE: int = config('UPDATE_DEDUP_SIZE', default=10_000, cast=int)
+    # Интервал сохранения в БД (сек)
+    FLUSH_INTERVAL: int = config(
+        'UPDATE_DEDUP_FLUSH_INTERVAL', default=10, cast=int
+    )
+    # Падение update_id больше чем на столько — новая последовательность
+    RESET_GAP = 1_000_000
+    # Ключ сохранённого буфера. У каждой реплики webhook он свой, иначе
+    # реплики перезаписывают буфер друг друга; в контейнерах задайте
+    # постоянное имя, чтобы буфер восстанавливался после перезапуска
+    SCOPE: str = config('UPDATE_DEDUP_SCOPE', default=socket.gethostname())
+
+
+class DebounceSettings:
+    """Схлопывание повторных нажатий одной inline-кнопки."""
+
+    # Окно (сек), в котором повторное нажатие не обрабатывается; 0 — выкл.
+    WINDOW: float = config('CALLBACK_DEBOUNCE_WINDOW', default=1.0, cast=float)
+    MAX_TRACKED = 10_000  # Максимум запоминаемых нажатий
+
+
+class CallbackAckSettings:
+    """Ранний ответ на нажатия inline-кнопок."""
+
+    ENABLED: bool = config('CALLBACK_ACK_ENABLED', default=True, cast=bool)
+    # Сколько ждать ответа обработчика (сек), 0 — отвечать сразу
+    GRACE: float = config('CALLBACK_ACK_GRACE', default=0.3, cast=float)
+
+
+class ThrottleSettings:
+    """Ограничение частоты обновлений от одного пользователя."""
+
+    ENABLED: bool = config('THROTTLE_ENABLED', default=True, cast=bool)
+    # Сообщения: в среднем в секунду и допустимая серия
+    MESSAGE_RATE: float = config(
+        'THROTTLE_MESSAGE_RATE', default=1, cast=float
+    )
+    MESSAGE_BURST: int = config('THROTTLE_MESSAGE_BURST', default=5, cast=int)
+    # Нажатия inline-кнопок
+    CALLBACK_RATE: float = config(
+        'THROTTLE_CALLBACK_RATE', default=2, cast=float
+    )
+    CALLBACK_BURST: int = config(
+        'THROTTLE_CALLBACK_BURST', default=8, cast=int
+    )
+    # Ячеек в таблице корзин (на каждый вид обновлений)
+    TABLE_SIZE: int = config('THROTTLE_TABLE_SIZE', default=65_536, cast=int)
+
+
+class BudgetSettings:
+    """Бюджеты времени обработчиков: срок обработчика (сек) и
+    statement_timeout его запросов (мс)."""
+
+    USER_DEADLINE: float = config(
+        'BUDGET_USER_DEADLINE', default=10, cast=float
+    )
+    USER_STATEMENT_TIMEOUT: int = config(
+        'BUDGET_USER_STATEMENT_TIMEOUT', default=200, cast=int
+    )
+    ADMIN_DEADLINE: float = config(
+        'BUDGET_ADMIN_DEADLINE', default=30, cast=float
+    )
+    ADMIN_STATEMENT_TIMEOUT: int = config(
+        'BUDGET_ADMIN_STATEMENT_TIMEOUT', default=5000, cast=int
+    )
+
+
+class EventWriteSettings:
+    """Пакетная запись InteractionEvent."""
+
+    # Интервал записи (сек)
+    FLUSH_INTERVAL: float = config(
+        'EVENT_FLUSH_INTERVAL', default=1, cast=float
+    )
+    # Записать досрочно, если накопилось столько событий
+    BATCH_SIZE: int = config('EVENT_BATCH_SIZE', default=200, cast=int)
+    # Предел событий в памяти, если БД недоступна
+    MAX_PENDING: int = config('EVENT_MAX_PENDING', default=10_000, cast=int)
+    # Сколько секунд повторять отметку активности пользователя, строка
+    # которого ещё не сохранена
+    ACTIVITY_RETRY = 60
+
+
+class EventSamplingSettings:
+    """Выборочная запись InteractionEvent под нагрузкой."""
+
+    # Доля записываемых событий по типам
+    MESSAGE_RATE: float = config(
+        'EVENT_SAMPLE_MESSAGE_RATE', default=1, cast=float
+    )
+    CALLBACK_RATE: float = config(
+        'EVENT_SAMPLE_CALLBACK_RATE', default=1, cast=float
+    )
+    # Доли по префиксу callback_data: "button=0.5,category=0.25"
+    PREFIX_RATES: str = config('EVENT_SAMPLE_PREFIX_RATES', default='')
+    # Снижать долю при росте задержки БД, очереди обновлений или
+    # очереди событий на запись
+    ADAPTIVE: bool = config('EVENT_SAMPLE_ADAPTIVE', default=False, cast=bool)
+    # Пороги: средняя задержка запроса (сек), обновлений в очереди и
+    # событий, ожидающих записи
+    LATENCY_THRESHOLD: float = config(
+        'EVENT_SAMPLE_LATENCY_THRESHOLD', default=0.05, cast=float
+    )
+    BACKLOG_THRESHOLD: int = config(
+        'EVENT_SAMPLE_BACKLOG_THRESHOLD', default=100, cast=int
+    )
+    PENDING_THRESHOLD: int = config(
+        'EVENT_SAMPLE_PENDING_THRESHOLD', default=1000, cast=int
+    )
+    MIN_RATE = 0.01  # Нижняя граница доли
+    SMOOTHING = 0.1  # Коэффициент EWMA задержки
+
+
+class ConcurrencySettings:
+    """Параллельная обработка обновлений."""
+
+    # Максимум одновременно выполняемых обработчиков
+    MAX_IN_FLIGHT: int = config('UPDATE_MAX_IN_FLIGHT', default=32, cast=int)
+
+
+class FSMSettings:
+    """Хранилище состояний FSM."""
+
+    # memory — в памяти процесса, postgres — общее для всех процессов
+    STORAGE: str = config('FSM_STORAGE', default='memory')
+    # Срок жизни неизменяемого состояния (сек)
+    TTL: int = config('FSM_TTL', default=7 * 24 * 3600, cast=int)
+    # Максимум состояний в памяти процесса (LRU)
+    MAX_SIZE: int = config('FSM_MAX_SIZE', default=100_000, cast=int)
+    # Срок жизни кеша в процессе (сек), 0 — без кеша. Включать, только
+    # если все обновления пользователя обрабатывает один процесс
+    CACHE_TTL: float = config('FSM_CACHE_TTL', default=0, cast=float)
+    # Интервал очистки истёкших состояний (сек)
+    PURGE_INTERVAL: int = config(
+        'FSM_PURGE_INTERVAL', default=3600, cast=int
+    )
+
+
 # Тексты сообщений
 class Messages:
     """Тексты сообщений бота."""
@@ -32,6 +215,8 @@ class Messages:
     BUTTON_NOT_FOUND = "❌ Кнопка не найдена"
     CONTENT_NOT_FOUND = "❌ Контент не найден"
     PROCESSING_ERROR = "❌ Ошибка обработки запроса"
+    THROTTLED = "⏳ Слишком много запросов, попробуйте чуть позже"
+    TIMEOUT = "⏳ Не удалось обработать запрос вовремя, попробуйте ещё раз"
 
     # Вопросы
     QUESTION_PROMPT = (
@@ -64,6 +249,29 @@ class ReminderSettings:
     INACTIVE_DAYS = 7  # Дней неактивности для отправки напоминания
     TEXTS = URLBuilder.get_reminder_texts()
 
+    # Плановая рассылка
+    SCHEDULER_ENABLED: bool = config(
+        'REMINDER_SCHEDULER_ENABLED', default=False, cast=bool
+    )
+    SCHEDULED_TYPE: str = config('REMINDER_SCHEDULED_TYPE', default='bot')
+    # Интервал (сек) между выборками новых получателей
+    SCHEDULER_INTERVAL: int = config(
+        'REMINDER_SCHEDULER_INTERVAL', default=300, cast=int
+    )
+    # Максимум напоминаний за один интервал
+    MAX_PER_TICK: int = config('REMINDER_MAX_PER_TICK', default=50, cast=int)
+    # Окно доставки по московскому времени, вне его — тихие часы
+    WINDOW_START_HOUR: int = config(
+        'REMINDER_WINDOW_START_HOUR', default=10, cast=int
+    )
+    WINDOW_END_HOUR: int = config(
+        'REMINDER_WINDOW_END_HOUR', default=20, cast=int
+    )
+    # Как часто (сек) пересчитывать число ожидающих напоминания
+    BACKLOG_RECOUNT_INTERVAL: int = config(
+        'REMINDER_BACKLOG_RECOUNT_INTERVAL', default=3600, cast=int
+    )
+
 
 # Настройки изображений
 class ImageSettings:
@@ -71,3 +279,75 @@ class ImageSettings:
 
     MAX_FILE_SIZE = 20 * 1024 * 1024  # 20MB
     ALLOWED_FORMATS = ['jpg', 'jpeg', 'png', 'gif', 'webp']
+
+
+# Настройки деактивации недоступных пользователей
+class UnreachableSettings:
+    """Настройки пакетной деактивации заблокировавших бота пользователей."""
+
+    # Интервал (сек) между пакетными UPDATE
+    FLUSH_INTERVAL: int = config(
+        'UNREACHABLE_FLUSH_INTERVAL', default=60, cast=int
+    )
+
+
+# Настройки исходящих сообщений
+class OutboundSettings:
+    """Лимиты планировщика исходящих запросов к Telegram."""
+
+    GLOBAL_RATE: float = config(
+        'OUTBOUND_GLOBAL_RATE', default=25, cast=float
+    )
+    CHAT_RATE: float = config('OUTBOUND_CHAT_RATE', default=1, cast=float)
+    CHAT_BURST: int = config('OUTBOUND_CHAT_BURST', default=3, cast=int)
+    QUEUE_SIZE: int = config('OUTBOUND_QUEUE_SIZE', default=1000, cast=int)
+    # Сколько мест очереди могут занимать массовые рассылки
+    BULK_QUEUE_SIZE: int = config(
+        'OUTBOUND_BULK_QUEUE_SIZE', default=200, cast=int
+    )
+    MAX_RETRIES = 3  # Повторов при flood control (429)
+    MAX_TRACKED_CHATS = 10_000  # Порог очистки лимитеров по чатам
+
+
+# Настройки сводок для админов
+class DigestSettings:
+    """Группировка уведомлений о новых вопросах."""
+
+    ENABLED: bool = config('DIGEST_ENABLED', default=False, cast=bool)
+    # Границы окна группировки (сек)
+    MIN_WINDOW: float = config('DIGEST_MIN_WINDOW', default=30, cast=float)
+    MAX_WINDOW: float = config('DIGEST_MAX_WINDOW', default=300, cast=float)
+    MAX_QUESTIONS = 10  # Вопросов в одном сообщении сводки
+    SMOOTHING = 0.3  # Коэффициент EWMA интервала между вопросами
+
+
+# Настройки распределения вопросов
+class AssignmentSettings:
+    """Назначение вопросов администраторам."""
+
+    # broadcast — всем админам, round_robin — по очереди,
+    # least_open — админу с наименьшим числом открытых вопросов. Кроме
+    # broadcast, вопрос закрепляется за админом, нажавшим «Ответить»,
+    # на TIMEOUT секунд
+    MODE: str = config('QUESTION_ASSIGNMENT_MODE', default='broadcast')
+    # Через сколько секунд без ответа вопрос передаётся другому админу
+    TIMEOUT: int = config(
+        'QUESTION_ASSIGNMENT_TIMEOUT', default=3600, cast=int
+    )
+    CHECK_INTERVAL: int = config(
+        'QUESTION_ASSIGNMENT_CHECK_INTERVAL', default=300, cast=int
+    )
+
+
+# Настройки кеша ролей
+class RoleSettings:
+    """Кеш администраторов: ADMINS и users.is_admin."""
+
+    # Получать изменения users.is_admin через LISTEN/NOTIFY
+    LISTEN: bool = config('ADMIN_ROLES_LISTEN', default=True, cast=bool)
+    # Интервал полной перезагрузки кеша (сек), страхует от пропущенных
+    # уведомлений
+    REFRESH_INTERVAL: int = config(
+        'ADMIN_ROLES_REFRESH_INTERVAL', default=300, cast=int
+    )
+    CHANNEL = 'admin_roles'  # Канал уведомлений PostgreSQL
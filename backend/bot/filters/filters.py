@@ -2,21 +2,21 @@ from aiogram import F
 from aiogram.filters import BaseFilter
 from aiogram.types import Message, CallbackQuery
 
-from bot.config import ADMINS
+from bot.services.role_service import RoleService
 
 
 class IsAdminFilter(BaseFilter):
     """Фильтр для проверки, является ли пользователь администратором."""
 
     async def __call__(self, message: Message) -> bool:
-        return message.from_user.id in ADMINS
+        return RoleService.is_admin(message.from_user.id)
 
 
 class IsUserFilter(BaseFilter):
     """Фильтр для проверки, что пользователь не администратор."""
 
     async def __call__(self, message: Message) -> bool:
-        return message.from_user.id not in ADMINS
+        return not RoleService.is_admin(message.from_user.id)
 
 
 class TextFilter(BaseFilter):
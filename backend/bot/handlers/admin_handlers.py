@@ -3,9 +3,10 @@ from aiogram import F, Router
 from aiogram.fsm.context import FSMContext
 from aiogram.types import CallbackQuery, Message
 from aiogram.utils.keyboard import InlineKeyboardBuilder
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from data.db import get_session
 from data.queries import get_button_by_id, get_category_by_id
+from bot.config import ReminderSettings
 from bot.keyboards.callbacks import (
     AdminCallback,
     AdminCategoryCallback,
@@ -17,6 +18,8 @@ from bot.keyboards.main_menu import (
     get_admin_inline_keyboard,
     get_reminder_type_keyboard,
 )
+from bot.handlers.dispatch import CallbackTable
+from bot.middlewares.budget import Budgets
 from bot.services.admin_service import AdminService
 from bot.services.content_service import ContentService
 from bot.services.question_service import QuestionService
@@ -27,6 +30,7 @@ from bot.utils import safe_edit_message, safe_delete_and_send
 
 logger = getLogger(__name__)
 admin_router = Router()
+admin_callbacks = CallbackTable(admin_router)
 
 
 @admin_router.message(Filters.ADMIN_PANEL_BUTTON)
@@ -54,8 +58,10 @@ async def send_reminders_menu(message: Message):
     await message.delete()
 
 
-@admin_router.callback_query(
-    AdminCallback.filter(F.action == "send_reminder")
+@admin_callbacks(
+    AdminCallback,
+    rule=F.action == "send_reminder",
+    flags={"budget": Budgets.BULK},
 )
 async def send_reminder_callback(
     callback: CallbackQuery, callback_data: AdminCallback
@@ -80,7 +86,7 @@ async def send_reminder_callback(
         results = await ReminderService.send_reminders_to_inactive_users(
             bot=callback.bot,
             reminder_text=reminder_text,
-            days=7
+            days=ReminderSettings.INACTIVE_DAYS
         )
 
         # Формируем сообщение с результатами
@@ -108,25 +114,44 @@ async def send_reminder_callback(
         )
 
 
-@admin_router.callback_query(AdminCallback.filter(F.action == "cancel"))
+@admin_callbacks(AdminCallback, rule=F.action == "cancel")
 async def cancel_admin_action(callback: CallbackQuery):
     """Отменяет действие админа."""
     await callback.message.delete()
 
 
-@admin_router.callback_query(
-    AdminCallback.filter(F.action == "answer_question")
-)
+@admin_callbacks(AdminCallback, rule=F.action == "answer_question")
 async def start_answer(
     query: CallbackQuery,
     callback_data: AdminCallback,
-    state: FSMContext
+    state: FSMContext,
+    session: AsyncSession,
 ):
     """
     Обрабатывает нажатие админом кнопки 'Ответить'.
     Переводит админа в состояние ожидания ответа.
     """
     question_id = callback_data.question_id
+    question = await QuestionService.claim_question(
+        question_id, query.from_user.id, session
+    )
+    if question is None:
+        await query.answer(
+            f"Вопрос #{question_id} не найден", show_alert=True
+        )
+        return
+    if question.answer_text is not None:
+        await query.answer(
+            f"На вопрос #{question_id} уже ответили", show_alert=True
+        )
+        return
+    if question.assigned_admin_id not in (None, query.from_user.id):
+        await query.answer(
+            f"Вопрос #{question_id} уже взял другой администратор",
+            show_alert=True,
+        )
+        return
+
     await state.update_data(question_id=question_id)
     await state.set_state(UserStates.ANSWER)
     await query.message.answer(f"Введите ответ на вопрос #{question_id}:")
@@ -134,7 +159,11 @@ async def start_answer(
 
 
 @admin_router.message(UserStates.ANSWER)
-async def process_answer(message: Message, state: FSMContext):
+async def process_answer(
+    message: Message,
+    state: FSMContext,
+    session: AsyncSession,
+):
     """
     Принимает ответ от админа, сохраняет в БД и отправляет пользователю.
     """
@@ -142,25 +171,28 @@ async def process_answer(message: Message, state: FSMContext):
         await message.answer("Пожалуйста, введите ответ текстом.")
         return
 
-    await QuestionService.process_admin_answer(message, state)
+    await QuestionService.process_admin_answer(message, state, session)
 
 
-@admin_router.callback_query(AdminCallback.filter(F.action == "manage_content"))
-async def handle_admin_manage_content(callback: CallbackQuery, state: FSMContext):
+@admin_callbacks(AdminCallback, rule=F.action == "manage_content")
+async def handle_admin_manage_content(
+    callback: CallbackQuery,
+    state: FSMContext,
+    session: AsyncSession,
+):
     """Обработчик кнопки 'Управление контентом' для админа."""
     try:
         await state.set_state(UserStates.ADMIN_CATEGORY_VIEW)
 
-        async with get_session() as session:
-            keyboard = await AdminService.get_admin_main_menu_keyboard(session)
+        keyboard = await AdminService.get_admin_main_menu_keyboard(session)
 
-            await safe_delete_and_send(
-                callback,
-                "🔧 <b>Управление контентом</b>\n\n"
-                "Выберите категорию для управления контентом:",
-                reply_markup=keyboard,
-                parse_mode="HTML"
-            )
+        await safe_delete_and_send(
+            callback,
+            "🔧 <b>Управление контентом</b>\n\n"
+            "Выберите категорию для управления контентом:",
+            reply_markup=keyboard,
+            parse_mode="HTML"
+        )
 
         await callback.answer()
 
@@ -169,36 +201,39 @@ async def handle_admin_manage_content(callback: CallbackQuery, state: FSMContext
         await callback.answer("❌ Ошибка при загрузке категорий", show_alert=True)
 
 
-@admin_router.callback_query(AdminCategoryCallback.filter())
-async def handle_admin_category_selection(callback: CallbackQuery, state: FSMContext):
+@admin_callbacks(AdminCategoryCallback)
+async def handle_admin_category_selection(
+    callback: CallbackQuery,
+    callback_data: AdminCategoryCallback,
+    state: FSMContext,
+    session: AsyncSession,
+):
     """Обработчик выбора категории админом."""
     try:
-        callback_data = AdminCategoryCallback.unpack(callback.data)
         category_id = callback_data.category_id
 
         await state.set_state(UserStates.ADMIN_CONTENT_VIEW)
 
-        async with get_session() as session:
-            category = await get_category_by_id(category_id, session)
+        category = await get_category_by_id(category_id, session)
 
-            if not category:
-                await callback.answer("❌ Категория не найдена", show_alert=True)
-                return
+        if not category:
+            await callback.answer("❌ Категория не найдена", show_alert=True)
+            return
 
-            keyboard = await AdminService.get_admin_category_buttons_keyboard(
-                category_id, session
-            )
+        keyboard = await AdminService.get_admin_category_buttons_keyboard(
+            category_id, session
+        )
 
-            text = (
-                f"📂 <b>{category.title}</b>\n\n"
-                "Выберите контент для управления:"
-            )
-            await safe_delete_and_send(
-                callback,
-                text,
-                reply_markup=keyboard,
-                parse_mode="HTML"
-            )
+        text = (
+            f"📂 <b>{category.title}</b>\n\n"
+            "Выберите контент для управления:"
+        )
+        await safe_delete_and_send(
+            callback,
+            text,
+            reply_markup=keyboard,
+            parse_mode="HTML"
+        )
 
         await callback.answer()
 
@@ -207,56 +242,59 @@ async def handle_admin_category_selection(callback: CallbackQuery, state: FSMCon
         await callback.answer("❌ Ошибка при загрузке контента", show_alert=True)
 
 
-@admin_router.callback_query(AdminContentCallback.filter())
-async def handle_admin_content_selection(callback: CallbackQuery, state: FSMContext):
+@admin_callbacks(AdminContentCallback)
+async def handle_admin_content_selection(
+    callback: CallbackQuery,
+    callback_data: AdminContentCallback,
+    state: FSMContext,
+    session: AsyncSession,
+):
     """Обработчик выбора контента админом."""
     try:
-        callback_data = AdminContentCallback.unpack(callback.data)
         content_id = callback_data.content_id
 
         await state.set_state(UserStates.ADMIN_CONTENT_MANAGE)
 
-        async with get_session() as session:
-            content = await get_button_by_id(content_id, session)
-
-            if not content:
-                await callback.answer("❌ Контент не найден", show_alert=True)
-                return
-
-            # Создаем клавиатуру с действиями
-            builder = InlineKeyboardBuilder()
-            builder.button(
-                text="👁 Просмотреть",
-                callback_data=AdminContentActionCallback(
-                    action="view", 
-                    content_id=content_id
-                ).pack()
-            )
-            builder.button(
-                text="📷 Добавить/Изменить изображение",
-                callback_data=AdminContentActionCallback(
-                    action="upload_image",
-                    content_id=content_id
-                ).pack()
-            )
-            builder.button(
-                text="🔙 Назад к контенту",
-                callback_data=AdminCategoryCallback(
-                    category_id=content.category_id
-                ).pack()
-            )
-            builder.adjust(1)
+        content = await get_button_by_id(content_id, session)
 
-            text = (
-                f"📄 <b>{content.title}</b>\n\n"
-                "Что хотите сделать с этим контентом?"
-            )
-            await safe_delete_and_send(
-                callback,
-                text,
-                reply_markup=builder.as_markup(),
-                parse_mode="HTML"
-            )
+        if not content:
+            await callback.answer("❌ Контент не найден", show_alert=True)
+            return
+
+        # Создаем клавиатуру с действиями
+        builder = InlineKeyboardBuilder()
+        builder.button(
+            text="👁 Просмотреть",
+            callback_data=AdminContentActionCallback(
+                action="view", 
+                content_id=content_id
+            ).pack()
+        )
+        builder.button(
+            text="📷 Добавить/Изменить изображение",
+            callback_data=AdminContentActionCallback(
+                action="upload_image",
+                content_id=content_id
+            ).pack()
+        )
+        builder.button(
+            text="🔙 Назад к контенту",
+            callback_data=AdminCategoryCallback(
+                category_id=content.category_id
+            ).pack()
+        )
+        builder.adjust(1)
+
+        text = (
+            f"📄 <b>{content.title}</b>\n\n"
+            "Что хотите сделать с этим контентом?"
+        )
+        await safe_delete_and_send(
+            callback,
+            text,
+            reply_markup=builder.as_markup(),
+            parse_mode="HTML"
+        )
 
         await callback.answer()
 
@@ -265,27 +303,30 @@ async def handle_admin_content_selection(callback: CallbackQuery, state: FSMCont
         await callback.answer("❌ Ошибка при загрузке контента", show_alert=True)
 
 
-@admin_router.callback_query(AdminContentActionCallback.filter())
-async def handle_admin_content_action(callback: CallbackQuery, state: FSMContext):
+@admin_callbacks(AdminContentActionCallback)
+async def handle_admin_content_action(
+    callback: CallbackQuery,
+    callback_data: AdminContentActionCallback,
+    state: FSMContext,
+    session: AsyncSession,
+):
     """Обработчик действий с контентом."""
     try:
-        callback_data = AdminContentActionCallback.unpack(callback.data)
         action = callback_data.action
         content_id = callback_data.content_id
 
-        async with get_session() as session:
-            content = await get_button_by_id(content_id, session)
+        content = await get_button_by_id(content_id, session)
 
-            if not content:
-                await callback.answer("❌ Контент не найден", show_alert=True)
-                return
+        if not content:
+            await callback.answer("❌ Контент не найден", show_alert=True)
+            return
 
-            if action == "view":
-                await ContentService.display_content_for_admin(callback, content)
-            elif action == "upload_image":
-                await AdminService.start_image_upload(
-                    callback, state, content
-                )
+        if action == "view":
+            await ContentService.display_content_for_admin(callback, content)
+        elif action == "upload_image":
+            await AdminService.start_image_upload(
+                callback, state, content
+            )
 
         await callback.answer()
 
@@ -295,7 +336,11 @@ async def handle_admin_content_action(callback: CallbackQuery, state: FSMContext
 
 
 @admin_router.message(UserStates.UPLOADING_IMAGE, F.photo)
-async def handle_image_upload(message: Message, state: FSMContext):
+async def handle_image_upload(
+    message: Message,
+    state: FSMContext,
+    session: AsyncSession,
+):
     """Обработчик загрузки изображения."""
     try:
         data = await state.get_data()
@@ -307,7 +352,7 @@ async def handle_image_upload(message: Message, state: FSMContext):
             return
 
         await AdminService.process_image_upload(
-            message, state, content_id
+            message, state, content_id, session
         )
 
     except Exception as e:
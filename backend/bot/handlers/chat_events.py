@@ -7,8 +7,9 @@ from aiogram.filters import (
     ChatMemberUpdatedFilter,
 )
 from aiogram.types import ChatMemberUpdated
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from data.db import get_session
+from bot.services.unreachable_service import UnreachableUserService
 from data.queries import set_user_active, set_user_inactive
 
 logger = getLogger(__name__)
@@ -18,16 +19,15 @@ chat_events_router = Router()
 @chat_events_router.my_chat_member(
     ChatMemberUpdatedFilter(IS_MEMBER >> IS_NOT_MEMBER)
 )
-async def on_user_leave(event: ChatMemberUpdated):
+async def on_user_leave(event: ChatMemberUpdated, session: AsyncSession):
     """Отмечает пользователя как неактивного при выходе из чата."""
-    async with get_session() as session:
-        await set_user_inactive(event.from_user.id, session)
+    await set_user_inactive(event.from_user.id, session)
 
 
 @chat_events_router.my_chat_member(
     ChatMemberUpdatedFilter(IS_NOT_MEMBER >> IS_MEMBER)
 )
-async def on_user_join(event: ChatMemberUpdated):
+async def on_user_join(event: ChatMemberUpdated, session: AsyncSession):
     """Отмечает пользователя как активного при входе в чат."""
-    async with get_session() as session:
-        await set_user_active(event.from_user.id, session)
+    UnreachableUserService.discard(event.from_user.id)
+    await set_user_active(event.from_user.id, session)
@@ -0,0 +1,121 @@
+from typing import Any, Callable, Optional, Union
+
+from aiogram import Router
+from aiogram.dispatcher.event.handler import FilterObject, HandlerObject
+from aiogram.filters.callback_data import CallbackData
+from aiogram.types import CallbackQuery
+from magic_filter import MagicFilter
+
+
+class CallbackTable:
+    """Таблица обработчиков callback_query по префиксу данных.
+
+    Вместо цепочки обработчиков, фильтры которых aiogram проверяет по
+    очереди, в роутере регистрируется один обработчик. Его фильтр берёт
+    префикс из `callback.data` (часть до первого `:`) и одним обращением к
+    словарю находит обработчики этого префикса; только их фильтры и
+    проверяются. Для класса CallbackData данные разбираются один раз и
+    передаются обработчику в `callback_data`, как у `XCallback.filter()`.
+
+    Найденный обработчик подставляется в `data['handler']`, поэтому
+    внутренние middleware видят его флаги.
+    """
+
+    def __init__(self, router: Router) -> None:
+        self.router = router
+        self._routes: dict[str, _PrefixRoutes] = {}
+        router.callback_query.register(self._dispatch, self._match)
+
+    def __call__(
+        self,
+        key: Union[str, type[CallbackData]],
+        *filters: Any,
+        rule: Optional[MagicFilter] = None,
+        flags: Optional[dict[str, Any]] = None,
+    ) -> Callable:
+        """Декоратор регистрации обработчика.
+
+        `key` — префикс данных или класс CallbackData; `rule` проверяется
+        на разобранных данных (как в `XCallback.filter(rule)`), поэтому
+        допустим только вместе с классом CallbackData.
+        """
+        if isinstance(key, str):
+            prefix, callback_data = key, None
+        else:
+            prefix, callback_data = key.__prefix__, key
+        if rule is not None and callback_data is None:
+            raise ValueError(
+                f"rule needs a CallbackData class, got prefix {prefix!r}"
+            )
+        routes = self._routes.setdefault(prefix, _PrefixRoutes(callback_data))
+        if routes.callback_data is not callback_data:
+            raise ValueError(
+                f"Prefix {prefix!r} is already registered "
+                f"for {routes.callback_data!r}"
+            )
+
+        def decorator(callback: Callable) -> Callable:
+            handler = HandlerObject(
+                callback=callback,
+                filters=[FilterObject(f) for f in filters],
+                flags=dict(flags or {}),
+            )
+            routes.handlers.append((handler, rule))
+            return callback
+
+        return decorator
+
+    @property
+    def prefixes(self) -> list[str]:
+        return list(self._routes)
+
+    async def _match(
+        self, callback: CallbackQuery, **data: Any
+    ) -> Union[bool, dict[str, Any]]:
+        if not callback.data:
+            return False
+        routes = self._routes.get(callback.data.partition(":")[0])
+        if routes is None:
+            return False
+
+        extra: dict[str, Any] = {}
+        if routes.callback_data is not None:
+            try:
+                extra["callback_data"] = routes.callback_data.unpack(
+                    callback.data
+                )
+            except (TypeError, ValueError):
+                return False
+
+        for handler, rule in routes.handlers:
+            if rule is not None and not rule.resolve(extra["callback_data"]):
+                continue
+            matched, kwargs = await handler.check(
+                callback, **{**data, **extra}
+            )
+            if matched:
+                result = {
+                    key: value for key, value in kwargs.items()
+                    if key not in data or data[key] is not value
+                }
+                result["handler"] = handler
+                return result
+        return False
+
+    @staticmethod
+    async def _dispatch(
+        callback: CallbackQuery, handler: HandlerObject, **data: Any
+    ) -> Any:
+        return await handler.call(callback, **data)
+
+
+class _PrefixRoutes:
+    """Обработчики одного префикса и класс их данных."""
+
+    __slots__ = ("callback_data", "handlers")
+
+    def __init__(self, callback_data: Optional[type[CallbackData]]) -> None:
+        self.callback_data = callback_data
+        self.handlers: list[
+            tuple[HandlerObject, Optional[MagicFilter]]
+        ] = []
@@ -4,22 +4,26 @@ from aiogram import Router
 from aiogram.filters import Command, CommandStart
 from aiogram.fsm.context import FSMContext
 from aiogram.types import Message
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from bot.keyboards.main_menu import (
     get_main_menu_keyboard,
     get_main_reply_keyboard,
     get_admin_reply_keyboard
 )
-from bot.config import ADMINS
+from bot.services.role_service import RoleService
 from bot.keyboards.callbacks import UserStates
-from data.db import get_session
 
 logger = logging.getLogger(__name__)
 start_router = Router()
 
 
 @start_router.message(CommandStart())
-async def cmd_start(message: Message, state: FSMContext):
+async def cmd_start(
+    message: Message,
+    state: FSMContext,
+    session: AsyncSession,
+):
     """Обработчик команды /start"""
     logger.info(
         f"User started: {message.from_user.id} "
@@ -28,7 +32,7 @@ async def cmd_start(message: Message, state: FSMContext):
     await state.set_state(UserStates.MAIN_MENU)
 
     # Проверяем, является ли пользователь админом
-    if message.from_user.id in ADMINS:
+    if RoleService.is_admin(message.from_user.id):
         await message.answer(
             text=(
                 "👋 Добро пожаловать, администратор!\n\n"
@@ -45,12 +49,11 @@ async def cmd_start(message: Message, state: FSMContext):
             ),
             reply_markup=await get_main_reply_keyboard()
         )
-        async with get_session() as session:
-            inline_keyboard = await get_main_menu_keyboard(session)
-            await message.answer(
-                "Выберите тему:",
-                reply_markup=inline_keyboard
-            )
+        inline_keyboard = await get_main_menu_keyboard(session)
+        await message.answer(
+            "Выберите тему:",
+            reply_markup=inline_keyboard
+        )
 
 
 @start_router.message(Command("help"))
@@ -3,19 +3,22 @@ from aiogram import F, Router
 from aiogram.fsm.context import FSMContext
 from aiogram.types import CallbackQuery, Message, InlineKeyboardButton
 from aiogram.utils.keyboard import InlineKeyboardBuilder
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from data.db import get_session
+from data import fast_queries
+from data.config import DatabaseSettings
+from data.db import engine
 from data.queries import (
     get_button_by_id,
     get_category_by_id,
     get_or_create_user,
 )
-from bot.config import ADMINS
 from bot.urls import URLs, URLBuilder
 from bot.keyboards.callbacks import (
     CategoryCallback,
     ButtonCallback,
     FeedbackCallback,
+    GoToMainMenuCallback,
     RatingCallback,
     UserStates
 )
@@ -25,21 +28,28 @@ from bot.keyboards.main_menu import (
     get_main_menu_keyboard,
     get_rating_keyboard,
 )
+from bot.handlers.dispatch import CallbackTable
 from bot.services.content_service import ContentService
 from bot.services.question_service import QuestionService
 from bot.services.rating_service import RatingService
+from bot.services.role_service import RoleService
 from bot.filters import Filters
 from bot.utils import safe_edit_message, safe_delete_and_send
 
 logger = getLogger(__name__)
 user_router = Router()
+user_callbacks = CallbackTable(user_router)
 
 
-@user_router.callback_query(F.data.startswith("category:"))
-async def handle_category_callback(callback: CallbackQuery, state: FSMContext):
+@user_callbacks(CategoryCallback)
+async def handle_category_callback(
+    callback: CallbackQuery,
+    callback_data: CategoryCallback,
+    state: FSMContext,
+    session: AsyncSession,
+):
     """Обработка callback для выбора категории"""
     try:
-        callback_data = CategoryCallback.unpack(callback.data)
         logger.info(
             f"Category selected: {callback_data.category_id} "
             f"by user {callback.from_user.id}"
@@ -47,33 +57,32 @@ async def handle_category_callback(callback: CallbackQuery, state: FSMContext):
 
         await state.set_state(UserStates.CATEGORY_VIEW)
 
-        async with get_session() as session:
-            category = await get_category_by_id(
-                callback_data.category_id,
-                session
-            )
-
-            if not category:
-                logger.warning(
-                    "Category not found: "
-                    f"{callback_data.category_id}"
-                )
-                await callback.answer(
-                    "❌ Категория не найдена",
-                    show_alert=True
-                )
-                return
+        category = await get_category_by_id(
+            callback_data.category_id,
+            session
+        )
 
-            keyboard = await get_category_buttons_keyboard(
-                callback_data.category_id, session
+        if not category:
+            logger.warning(
+                "Category not found: "
+                f"{callback_data.category_id}"
             )
-
-            await safe_delete_and_send(
-                callback,
-                f"📂 {category.title}\n\n"
-                f"{(category.description or 'Выберите интересующий вас раздел:')}",
-                reply_markup=keyboard,
+            await callback.answer(
+                "❌ Категория не найдена",
+                show_alert=True
             )
+            return
+
+        keyboard = await get_category_buttons_keyboard(
+            callback_data.category_id, session
+        )
+
+        await safe_delete_and_send(
+            callback,
+            f"📂 {category.title}\n\n"
+            f"{(category.description or 'Выберите интересующий вас раздел:')}",
+            reply_markup=keyboard,
+        )
 
         await callback.answer()
 
@@ -85,10 +94,11 @@ async def handle_category_callback(callback: CallbackQuery, state: FSMContext):
         await callback.answer("❌ Ошибка обработки запроса", show_alert=True)
 
 
-@user_router.callback_query(F.data == "go_main")
+@user_callbacks(GoToMainMenuCallback)
 async def handle_go_to_main_menu_callback(
     callback: CallbackQuery,
-    state: FSMContext
+    state: FSMContext,
+    session: AsyncSession,
 ):
     """Обработка callback для возврата в главное меню"""
     try:
@@ -96,13 +106,12 @@ async def handle_go_to_main_menu_callback(
 
         await state.set_state(UserStates.MAIN_MENU)
 
-        async with get_session() as session:
-            keyboard = await get_main_menu_keyboard(session)
-            await safe_delete_and_send(
-                callback,
-                "🏠 Главное меню\n\nВыберите интересующую вас категорию:",
-                reply_markup=keyboard,
-            )
+        keyboard = await get_main_menu_keyboard(session)
+        await safe_delete_and_send(
+            callback,
+            "🏠 Главное меню\n\nВыберите интересующую вас категорию:",
+            reply_markup=keyboard,
+        )
 
         await callback.answer()
 
@@ -114,11 +123,15 @@ async def handle_go_to_main_menu_callback(
         await callback.answer("❌ Ошибка обработки запроса", show_alert=True)
 
 
-@user_router.callback_query(F.data.startswith("button:"))
-async def handle_button_callback(callback: CallbackQuery, state: FSMContext):
+@user_callbacks(ButtonCallback)
+async def handle_button_callback(
+    callback: CallbackQuery,
+    callback_data: ButtonCallback,
+    state: FSMContext,
+    session: AsyncSession,
+):
     """Обработка callback для кнопок контента."""
     try:
-        callback_data = ButtonCallback.unpack(callback.data)
         logger.info(
             f"Button selected: {callback_data.button_id} "
             f"by user {callback.from_user.id}"
@@ -126,27 +139,40 @@ async def handle_button_callback(callback: CallbackQuery, state: FSMContext):
 
         await state.set_state(UserStates.BUTTON_CONTENT)
 
-        async with get_session() as session:
+        if DatabaseSettings.FAST_PATH:
+            button = await fast_queries.get_content(
+                session, callback_data.button_id
+            )
+        else:
             button = await get_button_by_id(callback_data.button_id, session)
 
-            if not button:
-                logger.warning(f"Button not found: {callback_data.button_id}")
-                await callback.answer("❌ Кнопка не найдена", show_alert=True)
-                return
+        if not button:
+            logger.warning(f"Button not found: {callback_data.button_id}")
+            await callback.answer("❌ Кнопка не найдена", show_alert=True)
+            return
 
-            # Обновляем счетчик просмотров
+        # Обновляем счетчик просмотров и сразу фиксируем, чтобы не
+        # держать блокировку строки до конца обработки
+        if DatabaseSettings.FAST_PATH:
+            # Соединение сессии возвращается в пул до записи на своём
+            await session.commit()
+            views_count = await fast_queries.increment_views(
+                engine, button.id
+            )
+        else:
             button.views_count += 1
             session.add(button)
             await session.commit()
-            logger.info(
-                f"Updated views for content_id {button.id} "
-                f"to {button.views_count}"
-            )
+            views_count = button.views_count
+        logger.info(
+            f"Updated views for content_id {button.id} "
+            f"to {views_count}"
+        )
 
-            # Отображаем контент
-            await ContentService.display_content(
-                callback, button, get_feedback_keyboard
-            )
+        # Отображаем контент
+        await ContentService.display_content(
+            callback, button, get_feedback_keyboard
+        )
 
         await callback.answer()
 
@@ -159,7 +185,11 @@ async def handle_button_callback(callback: CallbackQuery, state: FSMContext):
 
 
 @user_router.message(F.text == "✅ К выбору категории")
-async def show_categories(message: Message, state: FSMContext):
+async def show_categories(
+    message: Message,
+    state: FSMContext,
+    session: AsyncSession,
+):
     """
     Обработчик для кнопки 'К выбору категории'.
     Показывает инлайн-клавиатуру с категориями без приветствия.
@@ -168,12 +198,11 @@ async def show_categories(message: Message, state: FSMContext):
         f"User {message.from_user.id} requested categories from main menu"
     )
     await state.set_state(UserStates.MAIN_MENU)
-    async with get_session() as session:
-        inline_keyboard = await get_main_menu_keyboard(session)
-        await message.answer(
-            "Выберите интересующую вас категорию:",
-            reply_markup=inline_keyboard
-        )
+    inline_keyboard = await get_main_menu_keyboard(session)
+    await message.answer(
+        "Выберите интересующую вас категорию:",
+        reply_markup=inline_keyboard
+    )
     await message.delete()
 
 
@@ -192,7 +221,11 @@ async def ask_question_start(message: Message, state: FSMContext):
 
 
 @user_router.message(UserStates.QUESTION)
-async def process_question(message: Message, state: FSMContext):
+async def process_question(
+    message: Message,
+    state: FSMContext,
+    session: AsyncSession,
+):
     """
     Принимает вопрос, сохраняет в БД, обеспечивает существование пользователя
     и уведомляет администраторов.
@@ -205,7 +238,11 @@ async def process_question(message: Message, state: FSMContext):
             return
 
         await QuestionService.process_user_question(
-            message, state, ADMINS, URLs.ADMIN_QUESTION_URL
+            message,
+            state,
+            sorted(RoleService.admins()),
+            URLs.ADMIN_QUESTION_URL,
+            session,
         )
 
     except Exception as e:
@@ -244,11 +281,12 @@ async def handle_useful_materials(message: Message):
     await message.delete()
 
 
-@user_router.callback_query(FeedbackCallback.filter())
+@user_callbacks(FeedbackCallback)
 async def handle_feedback_callback(
     callback: CallbackQuery,
     callback_data: FeedbackCallback,
-    state: FSMContext
+    state: FSMContext,
+    session: AsyncSession,
 ):
     """Обработка обратной связи (полезно/не помогло)"""
     try:
@@ -257,20 +295,19 @@ async def handle_feedback_callback(
         action = callback_data.action
 
         # Сохраняем обратную связь в БД
-        async with get_session() as session:
-            user = await get_or_create_user(callback.from_user, session)
+        user = await get_or_create_user(callback.from_user, session)
 
-            # Проверяем, есть ли уже рейтинг от этого пользователя
-            rating_obj = await RatingService.get_or_create_rating(
-                user.telegram_id, content_id, session
-            )
+        # Проверяем, есть ли уже рейтинг от этого пользователя
+        rating_obj = await RatingService.get_or_create_rating(
+            user.telegram_id, content_id, session
+        )
 
-            # Обновляем рейтинг
-            rating_obj.is_helpful = (action == "helpful")
-            session.add(rating_obj)
-            await session.commit()
+        # Обновляем рейтинг
+        rating_obj.is_helpful = (action == "helpful")
+        session.add(rating_obj)
+        await session.commit()
 
-            logger.info(f"Feedback saved: user {user_id}, content {content_id}, helpful={action == 'helpful'}")
+        logger.info(f"Feedback saved: user {user_id}, content {content_id}, helpful={action == 'helpful'}")
 
         if action == "helpful":
             await state.set_state(UserStates.REVIEW)
@@ -294,22 +331,21 @@ async def handle_feedback_callback(
                 "Спасибо за обратную связь! "
                 "Мы постараемся улучшить материал. 🙏"
             )
-            async with get_session() as session:
-                button = await get_button_by_id(content_id, session)
-                builder = InlineKeyboardBuilder()
-                if button:
-                    builder.row(
-                        InlineKeyboardButton(
-                            text="🔙 Назад",
-                            callback_data=CategoryCallback(
-                                category_id=button.category_id).pack()
-                        )
+            button = await get_button_by_id(content_id, session)
+            builder = InlineKeyboardBuilder()
+            if button:
+                builder.row(
+                    InlineKeyboardButton(
+                        text="🔙 Назад",
+                        callback_data=CategoryCallback(
+                            category_id=button.category_id).pack()
                     )
-                await safe_delete_and_send(
-                    callback,
-                    text,
-                    reply_markup=builder.as_markup()
                 )
+            await safe_delete_and_send(
+                callback,
+                text,
+                reply_markup=builder.as_markup()
+            )
             await callback.answer()
 
     except Exception as e:
@@ -323,14 +359,12 @@ async def handle_feedback_callback(
         )
 
 
-@user_router.callback_query(
-    UserStates.REVIEW,
-    RatingCallback.filter()
-)
+@user_callbacks(RatingCallback, UserStates.REVIEW)
 async def handle_rating_callback(
     callback: CallbackQuery,
     callback_data: RatingCallback,
-    state: FSMContext
+    state: FSMContext,
+    session: AsyncSession,
 ):
     """Обработка нажатия на кнопку с оценкой ⭐."""
     try:
@@ -348,19 +382,18 @@ async def handle_rating_callback(
             return
 
         # Сохраняем оценку в БД
-        async with get_session() as session:
-            user = await get_or_create_user(callback.from_user, session)
+        user = await get_or_create_user(callback.from_user, session)
 
-            # Обновляем существующий рейтинг или создаем новый
-            rating_obj = await RatingService.get_or_create_rating(
-                user.telegram_id, content_id, session
-            )
+        # Обновляем существующий рейтинг или создаем новый
+        rating_obj = await RatingService.get_or_create_rating(
+            user.telegram_id, content_id, session
+        )
 
-            rating_obj.score = rating
-            session.add(rating_obj)
-            await session.commit()
+        rating_obj.score = rating
+        session.add(rating_obj)
+        await session.commit()
 
-            logger.info(f"Rating saved: user {user_id}, content {content_id}, score={rating}")
+        logger.info(f"Rating saved: user {user_id}, content {content_id}, score={rating}")
 
         await safe_delete_and_send(
             callback,
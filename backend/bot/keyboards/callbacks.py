@@ -1,54 +1,141 @@
-from aiogram.filters.callback_data import CallbackData
+from aiogram.filters.callback_data import CallbackData, MAX_CALLBACK_LENGTH
 from aiogram.fsm.state import State, StatesGroup
-from typing import Optional
-
-
-class CategoryCallback(CallbackData, prefix="category"):
+from typing import (
+    Any, Callable, ClassVar, Optional, Union, get_args, get_origin
+)
+
+# Типы полей, которые кодек разбирает без pydantic
+_CASTERS: dict[type, Callable[[str], Any]] = {int: int, str: str}
+
+_object_setattr = object.__setattr__
+
+
+class CompactCallbackData(CallbackData, prefix="compact"):
+    """CallbackData с быстрой упаковкой и разбором.
+
+    Формат строки тот же, что у aiogram (`prefix:value:...`, None — пустая
+    строка), поэтому кнопки уже отправленных сообщений продолжают работать.
+    Для полей `int`, `str` и `Optional` от них `pack`/`unpack` обходятся
+    без валидации и сериализации pydantic: значения приводятся заранее
+    подготовленными функциями, объект собирается без валидации (как в
+    `model_construct`, но без его накладных расходов). Для остальных типов
+    используется стандартная реализация.
+    """
+
+    __codec__: ClassVar[Optional[tuple[tuple[str, Callable, bool], ...]]]
+
+    @classmethod
+    def __pydantic_init_subclass__(cls, **kwargs: Any) -> None:
+        super().__pydantic_init_subclass__(**kwargs)
+        cls.__codec__ = None
+        if cls.__pydantic_post_init__:
+            return
+        codec = []
+        for name, field in cls.model_fields.items():
+            annotation, nullable = field.annotation, False
+            if get_origin(annotation) is Union:
+                args = get_args(annotation)
+                nullable = type(None) in args
+                args = [arg for arg in args if arg is not type(None)]
+                annotation = args[0] if len(args) == 1 else None
+            caster = _CASTERS.get(annotation)
+            if caster is None:
+                return
+            codec.append((name, caster, nullable))
+        cls.__codec__ = tuple(codec)
+
+    def pack(self) -> str:
+        if self.__codec__ is None:
+            return super().pack()
+        sep = self.__separator__
+        result = [self.__prefix__]
+        for name, _, _ in self.__codec__:
+            value = getattr(self, name)
+            encoded = "" if value is None else str(value)
+            if sep in encoded:
+                raise ValueError(
+                    f"Separator symbol {sep!r} can not be used "
+                    f"in value {name}={encoded!r}"
+                )
+            result.append(encoded)
+        callback_data = sep.join(result)
+        if len(callback_data.encode()) > MAX_CALLBACK_LENGTH:
+            raise ValueError(
+                f"Resulted callback data is too long! "
+                f"len({callback_data!r}.encode()) > {MAX_CALLBACK_LENGTH}"
+            )
+        return callback_data
+
+    @classmethod
+    def unpack(cls, value: str):
+        codec = cls.__codec__
+        if codec is None:
+            return super().unpack(value)
+        prefix, *parts = value.split(cls.__separator__)
+        if len(parts) != len(codec):
+            raise TypeError(
+                f"Callback data {cls.__name__!r} takes {len(codec)} arguments "
+                f"but {len(parts)} were given"
+            )
+        if prefix != cls.__prefix__:
+            raise ValueError(f"Bad prefix ({prefix!r} != {cls.__prefix__!r})")
+        payload = {}
+        for (name, caster, nullable), part in zip(codec, parts):
+            payload[name] = None if nullable and part == "" else caster(part)
+        callback_data = cls.__new__(cls)
+        _object_setattr(callback_data, "__dict__", payload)
+        _object_setattr(callback_data, "__pydantic_fields_set__", set(payload))
+        _object_setattr(callback_data, "__pydantic_extra__", None)
+        _object_setattr(callback_data, "__pydantic_private__", None)
+        return callback_data
+
+
+class CategoryCallback(CompactCallbackData, prefix="category"):
     """Callback для выбора категории"""
 
     category_id: int
 
 
-class ButtonCallback(CallbackData, prefix="button"):
+class ButtonCallback(CompactCallbackData, prefix="button"):
     """Callback для нажатия на конкретную кнопку (внутри категории)"""
 
     button_id: int
 
 
-class GoToMainMenuCallback(CallbackData, prefix="go_main"):
+class GoToMainMenuCallback(CompactCallbackData, prefix="go_main"):
     """Callback для возврата в главное меню"""
 
     pass
 
 
-class AdminCallback(CallbackData, prefix="admin"):
+class AdminCallback(CompactCallbackData, prefix="admin"):
     action: str
     question_id: Optional[int] = None
     reminder_type: Optional[str] = None
 
 
-class AdminCategoryCallback(CallbackData, prefix="admin_category"):
+class AdminCategoryCallback(CompactCallbackData, prefix="admin_category"):
     """Callback для выбора категории админом"""
     category_id: int
 
 
-class AdminContentCallback(CallbackData, prefix="admin_content"):
+class AdminContentCallback(CompactCallbackData, prefix="admin_content"):
     """Callback для выбора контента админом"""
     content_id: int
 
 
-class AdminContentActionCallback(CallbackData, prefix="admin_action"):
+class AdminContentActionCallback(CompactCallbackData, prefix="admin_action"):
     """Callback для действий с контентом"""
     action: str
     content_id: int
 
 
-class FeedbackCallback(CallbackData, prefix="feedback"):
+class FeedbackCallback(CompactCallbackData, prefix="feedback"):
     action: str
     content_id: int
 
 
-class RatingCallback(CallbackData, prefix="rating"):
+class RatingCallback(CompactCallbackData, prefix="rating"):
     rating: int
     content_id: int
 
@@ -5,9 +5,10 @@ from aiogram.types import (
 )
 from aiogram.utils.keyboard import InlineKeyboardBuilder, ReplyKeyboardBuilder
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlmodel import select
 
-from data.models import Content, Category
+from data import fast_queries
+from data.config import DatabaseSettings
+from data.queries import ACTIVE_CATEGORY_BUTTONS, ALL_CATEGORIES
 from bot.urls import URLs
 from bot.keyboards.callbacks import (
     AdminCallback,
@@ -35,8 +36,7 @@ async def get_main_menu_keyboard(
     Создает главное меню с двумя основными категориями из БД.
     """
     builder = InlineKeyboardBuilder()
-    query = select(Category)
-    result = await session.execute(query)
+    result = await session.execute(ALL_CATEGORIES)
     categories = result.scalars().all()
     for category in categories:
         builder.button(
@@ -55,12 +55,15 @@ async def get_category_buttons_keyboard(
     """
     builder = InlineKeyboardBuilder()
     try:
-        query = select(Content).where(
-            Content.category_id == category_id,
-            Content.is_active
-        ).order_by(Content.views_count.desc())
-        result = await session.execute(query)
-        buttons = result.scalars().all()
+        if DatabaseSettings.FAST_PATH:
+            buttons = await fast_queries.get_category_buttons(
+                session, category_id
+            )
+        else:
+            result = await session.execute(
+                ACTIVE_CATEGORY_BUTTONS, {"category_id": category_id}
+            )
+            buttons = result.scalars().all()
 
         for button in buttons:
             builder.button(
@@ -183,6 +186,23 @@ async def get_admin_answer_keyboard(question_id: int) -> InlineKeyboardMarkup:
     return builder.as_markup()
 
 
+def get_admin_digest_keyboard(
+        question_ids: list[int]) -> InlineKeyboardMarkup:
+    """Кнопки 'Ответить' для каждого вопроса из сводки."""
+    builder = InlineKeyboardBuilder()
+    for question_id in question_ids:
+        builder.button(
+            text=f"Ответить #{question_id}",
+            callback_data=AdminCallback(
+                action="answer_question",
+                question_id=question_id,
+                reminder_type=None
+            ).pack()
+        )
+    builder.adjust(2)
+    return builder.as_markup()
+
+
 def get_feedback_keyboard(
         content_id: int,
         category_id: int
@@ -0,0 +1,113 @@
+import asyncio
+import time
+from contextlib import suppress
+from logging import getLogger
+from typing import Any, Awaitable, Callable, NamedTuple, Optional
+
+from aiogram import BaseMiddleware
+from aiogram.dispatcher.flags import get_flag
+from aiogram.exceptions import TelegramAPIError
+from aiogram.types import CallbackQuery, Message, TelegramObject
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from bot.config import BudgetSettings, Messages
+from data.db import session_committed, set_statement_timeout
+from utils.metrics import metrics
+
+logger = getLogger(__name__)
+
+
+class LatencyBudget(NamedTuple):
+    """Бюджет времени обработчика.
+
+    `deadline` — срок всего обработчика (сек), `statement_timeout` —
+    лимит каждого запроса к БД (мс); None — без срока и с лимитом
+    запросов по умолчанию (из настроек сервера).
+    """
+
+    name: str
+    deadline: Optional[float]
+    statement_timeout: Optional[int]
+
+
+class Budgets:
+    """Предустановленные бюджеты."""
+
+    # Нажатия и сообщения пользователей
+    USER = LatencyBudget(
+        'user',
+        BudgetSettings.USER_DEADLINE,
+        BudgetSettings.USER_STATEMENT_TIMEOUT,
+    )
+    # Админские списки и отчёты
+    ADMIN = LatencyBudget(
+        'admin',
+        BudgetSettings.ADMIN_DEADLINE,
+        BudgetSettings.ADMIN_STATEMENT_TIMEOUT,
+    )
+    # Рассылки: идут долго из-за лимитов Telegram
+    BULK = LatencyBudget(
+        'bulk', None, BudgetSettings.ADMIN_STATEMENT_TIMEOUT
+    )
+
+
+class LatencyBudgetMiddleware(BaseMiddleware):
+    """Бюджет времени для обработчиков роутера.
+
+    Подключается к наблюдателям роутера с бюджетом по умолчанию;
+    обработчик может задать свой флагом `budget`
+    (`flags={'budget': Budgets.BULK}`). Запросы общей сессии получают
+    `statement_timeout`, а обработчик, не уложившийся в срок, отменяется:
+    незафиксированные изменения откатываются, а пользователь получает
+    короткий ответ — если обработчик ещё ничего не зафиксировал, иначе
+    результат уже сохранён и повторять действие не нужно. Длительность
+    и нарушения пишутся в метрики `budget.<name>.*`.
+    """
+
+    def __init__(self, default: LatencyBudget = Budgets.USER) -> None:
+        self.default = default
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: dict[str, Any],
+    ) -> Any:
+        budget: LatencyBudget = get_flag(data, 'budget', default=self.default)
+        session: Optional[AsyncSession] = data.get('session')
+        if session is not None:
+            await set_statement_timeout(session, budget.statement_timeout)
+
+        started = time.monotonic()
+        try:
+            if budget.deadline is None:
+                return await handler(event, data)
+            return await asyncio.wait_for(
+                handler(event, data), budget.deadline
+            )
+        except asyncio.TimeoutError:
+            metrics.inc(f'budget.{budget.name}.deadline_exceeded')
+            logger.warning(
+                f"{type(event).__name__} handler exceeded "
+                f"{budget.name} budget of {budget.deadline}s"
+            )
+            if session is not None and session.in_transaction():
+                try:
+                    await session.rollback()
+                except Exception as e:
+                    logger.error(f"Rollback after timeout failed: {e}")
+            if session is None or not session_committed(session):
+                await self._fallback(event)
+            return None
+        finally:
+            metrics.observe(
+                f'budget.{budget.name}', time.monotonic() - started
+            )
+
+    @staticmethod
+    async def _fallback(event: TelegramObject) -> None:
+        with suppress(TelegramAPIError):
+            if isinstance(event, CallbackQuery):
+                await event.answer(Messages.TIMEOUT, show_alert=True)
+            elif isinstance(event, Message):
+                await event.answer(Messages.TIMEOUT)
@@ -0,0 +1,125 @@
+import asyncio
+from contextlib import suppress
+from logging import getLogger
+from typing import Any, Awaitable, Callable, Optional, cast
+
+from aiogram import BaseMiddleware, Bot
+from aiogram.client.session.middlewares.base import (
+    BaseRequestMiddleware,
+    NextRequestMiddlewareType,
+)
+from aiogram.exceptions import TelegramAPIError
+from aiogram.methods import AnswerCallbackQuery, Response, TelegramMethod
+from aiogram.methods.base import TelegramType
+from aiogram.types import CallbackQuery, TelegramObject, Update
+
+from bot.config import CallbackAckSettings
+from utils.metrics import metrics
+
+logger = getLogger(__name__)
+
+
+class CallbackAck:
+    """Состояние ответа на обрабатываемый callback."""
+
+    __slots__ = ('chat_id', 'answered')
+
+    def __init__(self, chat_id: int) -> None:
+        self.chat_id = chat_id
+        self.answered = False
+
+
+class CallbackAckMiddleware(BaseMiddleware):
+    """Ранний ответ на CallbackQuery.
+
+    Если обработчик не ответил на нажатие за `grace` секунд с момента
+    поступления обновления (включая ожидание в очереди), middleware
+    отвечает сам, и индикатор загрузки у клиента пропадает, пока
+    обработчик ещё работает с БД. После обработчика ответ отправляется,
+    если его так и не было. Повторные ответы перехватывает
+    `CallbackAnswerMiddleware`.
+    """
+
+    def __init__(self, grace: float = CallbackAckSettings.GRACE) -> None:
+        self.grace = grace
+        # id callback -> состояние, пока обновление обрабатывается
+        self.pending: dict[str, CallbackAck] = {}
+        self._tasks: set[asyncio.Task] = set()
+
+    def _schedule(self, callback: CallbackQuery) -> None:
+        task = asyncio.create_task(self._acknowledge(callback))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _acknowledge(self, callback: CallbackQuery) -> None:
+        ack = self.pending.get(callback.id)
+        if ack is None or ack.answered:
+            return
+        with suppress(TelegramAPIError):
+            await callback.answer()
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: dict[str, Any],
+    ) -> Any:
+        callback = event.callback_query if isinstance(event, Update) else None
+        if callback is None:
+            return await handler(event, data)
+
+        chat_id = (
+            callback.message.chat.id if callback.message
+            else callback.from_user.id
+        )
+        self.pending[callback.id] = CallbackAck(chat_id)
+        timer = asyncio.get_running_loop().call_later(
+            self.grace, self._schedule, callback
+        )
+        try:
+            return await handler(event, data)
+        finally:
+            timer.cancel()
+            await self._acknowledge(callback)
+            self.pending.pop(callback.id, None)
+
+
+class CallbackAnswerMiddleware(BaseRequestMiddleware):
+    """Не больше одного answerCallbackQuery на нажатие.
+
+    Повторный ответ на уже подтверждённый callback Telegram отклонит,
+    поэтому он не отправляется. Если это было предупреждение
+    (`show_alert`), его текст приходит пользователю сообщением, чтобы
+    ошибки вроде «Категория не найдена» не терялись.
+    """
+
+    def __init__(self, acks: CallbackAckMiddleware) -> None:
+        self.acks = acks
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType[TelegramType],
+        bot: Bot,
+        method: TelegramMethod[TelegramType],
+    ) -> Response[TelegramType]:
+        if not isinstance(method, AnswerCallbackQuery):
+            return await make_request(bot, method)
+
+        ack: Optional[CallbackAck] = self.acks.pending.get(
+            method.callback_query_id
+        )
+        if ack is None:
+            return await make_request(bot, method)
+        if not ack.answered:
+            ack.answered = True
+            return await make_request(bot, method)
+
+        metrics.inc('callbacks.late_answers')
+        if method.text and method.show_alert:
+            await bot.send_message(ack.chat_id, method.text)
+        # Ответ уже отправлен, обработчику это неважно. По цепочке
+        # middleware сессии передаётся уже разобранный результат метода
+        # (`AiohttpSession.make_request` возвращает `response.result`), а
+        # не Response; answerCallbackQuery возвращает bool
+        answered: bool = True
+        return cast(Response[TelegramType], answered)
@@ -0,0 +1,47 @@
+from logging import getLogger
+from typing import Any, Awaitable, Callable
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from data.db import async_session
+
+logger = getLogger(__name__)
+
+
+class DbSessionMiddleware(BaseMiddleware):
+    """Одна сессия БД на всё обновление.
+
+    Сессия передаётся middleware и обработчикам в `data['session']`.
+    Соединение из пула берётся только при первом запросе, поэтому
+    обновления без обращений к БД его не занимают. По завершении
+    обработки оставшиеся изменения фиксируются одним commit, при
+    ошибке — откатываются. Обработчик, сообщающий пользователю об
+    успешном сохранении, сам делает commit до сообщения; события
+    взаимодействия пишутся отдельно (`InteractionEventRecorder`).
+    """
+
+    def __init__(
+        self, session_factory: async_sessionmaker = async_session
+    ) -> None:
+        self.session_factory = session_factory
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: dict[str, Any],
+    ) -> Any:
+        session: AsyncSession
+        async with self.session_factory() as session:
+            data['session'] = session
+            try:
+                result = await handler(event, data)
+                if session.in_transaction():
+                    await session.commit()
+                return result
+            except Exception:
+                if session.in_transaction():
+                    await session.rollback()
+                raise
@@ -0,0 +1,68 @@
+import time
+from collections import OrderedDict
+from contextlib import suppress
+from logging import getLogger
+from typing import Any, Awaitable, Callable
+
+from aiogram import BaseMiddleware
+from aiogram.exceptions import TelegramAPIError
+from aiogram.types import TelegramObject, Update
+
+from bot.config import DebounceSettings
+from utils.metrics import metrics
+
+logger = getLogger(__name__)
+
+
+class CallbackDebounceMiddleware(BaseMiddleware):
+    """Одна обработка на серию одинаковых нажатий.
+
+    Повторное нажатие той же кнопки (тот же пользователь и те же
+    callback_data) в течение `window` секунд после обработанного не
+    доходит до очередей и обработчиков: на него только отвечается
+    `callback.answer()`, чтобы у клиента пропал индикатор загрузки.
+    Время считается по поступлению обновления, поэтому долгий
+    обработчик первого нажатия не открывает окно для повторов.
+    """
+
+    def __init__(
+        self,
+        window: float = DebounceSettings.WINDOW,
+        max_tracked: int = DebounceSettings.MAX_TRACKED,
+    ) -> None:
+        self.window = window
+        self.max_tracked = max_tracked
+        # (user_id, data) -> время нажатия, по возрастанию времени
+        self._pressed: OrderedDict[tuple[int, str], float] = OrderedDict()
+
+    def _expire(self, now: float) -> None:
+        pressed = self._pressed
+        while pressed:
+            key, pressed_at = next(iter(pressed.items()))
+            if now - pressed_at < self.window and (
+                len(pressed) <= self.max_tracked
+            ):
+                break
+            del pressed[key]
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: dict[str, Any],
+    ) -> Any:
+        callback = event.callback_query if isinstance(event, Update) else None
+        if callback is None or not callback.data or self.window <= 0:
+            return await handler(event, data)
+
+        now = time.monotonic()
+        self._expire(now)
+        key = (callback.from_user.id, callback.data)
+        if key in self._pressed:
+            metrics.inc('callbacks.debounced')
+            with suppress(TelegramAPIError):
+                await callback.answer()
+            return None
+
+        self._pressed[key] = now
+        return await handler(event, data)
@@ -0,0 +1,176 @@
+import asyncio
+from logging import getLogger
+from typing import Any, Awaitable, Callable, Optional
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject, Update
+
+from bot.config import DedupSettings
+from bot.storage.update_marks import UpdateMarks, UpdateMarkStore
+from utils.metrics import metrics
+
+logger = getLogger(__name__)
+
+
+class UpdateIdRing:
+    """Последние `size` update_id: кольцевой буфер и множество.
+
+    Буфер задаёт порядок вытеснения, множество — проверку за O(1).
+    `floor` — наибольший вытесненный id: обновления не новее него
+    буфер уже не помнит и считает повторами. Telegram выдаёт update_id
+    по возрастанию, но после недели без обновлений может начать с
+    случайного значения — падение больше чем на `reset_gap` считается
+    такой сменой последовательности, и буфер очищается.
+    """
+
+    __slots__ = (
+        'size', 'reset_gap', 'high_water', 'floor',
+        '_ring', '_pos', '_seen',
+    )
+
+    def __init__(self, size: int, reset_gap: int) -> None:
+        self.size = size
+        self.reset_gap = reset_gap
+        self.high_water: Optional[int] = None
+        self.floor: Optional[int] = None
+        self._ring: list[Optional[int]] = [None] * size
+        self._pos = 0
+        self._seen: set[int] = set()
+
+    def __len__(self) -> int:
+        return len(self._seen)
+
+    def clear(self) -> None:
+        self.high_water = None
+        self.floor = None
+        self._ring = [None] * self.size
+        self._pos = 0
+        self._seen.clear()
+
+    def add(self, update_id: int) -> bool:
+        """Запомнить id; False, если обновление уже было."""
+        if update_id in self._seen:
+            return False
+        high_water = self.high_water
+        if high_water is not None and update_id < high_water:
+            if high_water - update_id > self.reset_gap:
+                logger.warning(
+                    f"update_id dropped from {high_water} to {update_id}, "
+                    "resetting deduplication"
+                )
+                metrics.inc('updates.dedup_resets')
+                self.clear()
+            elif self.floor is not None and update_id <= self.floor:
+                return False
+
+        evicted = self._ring[self._pos]
+        if evicted is not None:
+            self._seen.discard(evicted)
+            if self.floor is None or evicted > self.floor:
+                self.floor = evicted
+        self._ring[self._pos] = update_id
+        self._pos = (self._pos + 1) % self.size
+        self._seen.add(update_id)
+        if self.high_water is None or update_id > self.high_water:
+            self.high_water = update_id
+        return True
+
+    def snapshot(self) -> Optional[UpdateMarks]:
+        if self.high_water is None:
+            return None
+        recent = self._ring[self._pos:] + self._ring[:self._pos]
+        return UpdateMarks(
+            self.high_water,
+            self.floor,
+            [update_id for update_id in recent if update_id is not None],
+        )
+
+    def restore(self, marks: UpdateMarks) -> None:
+        self.clear()
+        recent = marks.recent[-self.size:]
+        self._ring[:len(recent)] = recent
+        self._pos = len(recent) % self.size
+        self._seen.update(recent)
+        self.high_water = marks.high_water
+        self.floor = marks.floor
+        # Буфер стал меньше сохранённого: лишние id уходят за границу
+        dropped = marks.recent[:-self.size]
+        if dropped:
+            self.floor = max(self.floor or 0, *dropped)
+
+
+class UpdateDedupMiddleware(BaseMiddleware):
+    """Отбрасывание повторно доставленных обновлений.
+
+    После падения бота или повтора webhook Telegram может прислать то же
+    обновление ещё раз. Middleware стоит первым, поэтому повтор
+    отбрасывается до очередей и обращений к БД. Состояние буфера
+    периодически сохраняется в `store` и восстанавливается при запуске,
+    так что повторы отбрасываются и после перезапуска.
+    """
+
+    def __init__(
+        self,
+        store: Optional[UpdateMarkStore] = None,
+        scope: str = DedupSettings.SCOPE,
+        size: int = DedupSettings.SIZE,
+        reset_gap: int = DedupSettings.RESET_GAP,
+    ) -> None:
+        self.store = store
+        self.scope = scope
+        self.ring = UpdateIdRing(size, reset_gap)
+        self._dirty = False
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: dict[str, Any],
+    ) -> Any:
+        if isinstance(event, Update) and not self.ring.add(event.update_id):
+            metrics.inc('updates.duplicates')
+            logger.info(f"Duplicate update {event.update_id} dropped")
+            return None
+        self._dirty = True
+        return await handler(event, data)
+
+    async def load(self) -> None:
+        """Восстановить буфер из хранилища."""
+        if self.store is None:
+            return
+        try:
+            marks = await self.store.load(self.scope)
+        except Exception as e:
+            logger.error(f"Failed to load update marks: {e}")
+            return
+        if marks is not None:
+            self.ring.restore(marks)
+            logger.info(
+                f"Update marks restored: high water {marks.high_water}, "
+                f"{len(self.ring)} recent"
+            )
+
+    async def save(self) -> None:
+        """Сохранить буфер, если он изменился."""
+        if self.store is None or not self._dirty:
+            return
+        marks = self.ring.snapshot()
+        if marks is None:
+            return
+        self._dirty = False
+        try:
+            await self.store.save(self.scope, marks)
+        except Exception as e:
+            self._dirty = True
+            logger.error(f"Failed to save update marks: {e}")
+
+    async def run_periodic_save(
+        self, interval: int = DedupSettings.FLUSH_INTERVAL
+    ) -> None:
+        """Фоновое сохранение; при остановке сохраняет последний раз."""
+        try:
+            while True:
+                await asyncio.sleep(interval)
+                await self.save()
+        finally:
+            await self.save()
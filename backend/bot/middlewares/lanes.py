@@ -0,0 +1,99 @@
+import asyncio
+import time
+from logging import getLogger
+from typing import Any, Awaitable, Callable
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject, User
+
+from bot.config import ConcurrencySettings
+from utils.metrics import metrics
+
+logger = getLogger(__name__)
+
+
+class _Lane:
+    """Очередь одного пользователя и число ожидающих её обновлений."""
+
+    __slots__ = ('lock', 'users')
+
+    def __init__(self) -> None:
+        self.lock = asyncio.Lock()
+        self.users = 0
+
+
+class UpdateLaneMiddleware(BaseMiddleware):
+    '''Упорядоченная обработка обновлений с общим лимитом параллелизма.
+
+    У каждого пользователя своя очередь: его обработчики выполняются
+    строго по одному и в порядке поступления, так что быстрые нажатия
+    не конкурируют между собой, а долгий обработчик задерживает только
+    обновления того же пользователя. Очередь существует, пока в ней
+    есть обновления, поэтому память занимают только активные
+    пользователи. Всего одновременно выполняется не больше
+    `max_in_flight` обработчиков, что ограничивает число сессий БД.
+    '''
+
+    def __init__(
+        self,
+        max_in_flight: int = ConcurrencySettings.MAX_IN_FLIGHT,
+    ) -> None:
+        self._lanes: dict[int, _Lane] = {}
+        self._slots = asyncio.Semaphore(max_in_flight)
+        self._waiting = 0
+        self._in_flight = 0
+
+    def _enter_lane(self, user_id: int) -> _Lane:
+        lane = self._lanes.get(user_id)
+        if lane is None:
+            lane = self._lanes[user_id] = _Lane()
+        lane.users += 1
+        return lane
+
+    def _leave_lane(self, user_id: int, lane: _Lane) -> None:
+        lane.users -= 1
+        if not lane.users:
+            del self._lanes[user_id]
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: dict[str, Any],
+    ) -> Any:
+        user: User | None = data.get('event_from_user')
+        lane = self._enter_lane(user.id) if user else None
+
+        started = time.monotonic()
+        self._waiting += 1
+        metrics.set_gauge('updates.waiting', self._waiting)
+        try:
+            try:
+                if lane is not None:
+                    await lane.lock.acquire()
+                try:
+                    await self._slots.acquire()
+                except BaseException:
+                    if lane is not None:
+                        lane.lock.release()
+                    raise
+            except BaseException:
+                if lane is not None:
+                    self._leave_lane(user.id, lane)
+                raise
+        finally:
+            self._waiting -= 1
+            metrics.set_gauge('updates.waiting', self._waiting)
+
+        metrics.observe('updates.wait', time.monotonic() - started)
+        self._in_flight += 1
+        metrics.set_gauge('updates.in_flight', self._in_flight)
+        try:
+            return await handler(event, data)
+        finally:
+            self._in_flight -= 1
+            metrics.set_gauge('updates.in_flight', self._in_flight)
+            self._slots.release()
+            if lane is not None:
+                lane.lock.release()
+                self._leave_lane(user.id, lane)
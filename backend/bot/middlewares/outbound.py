@@ -0,0 +1,58 @@
+from aiogram import Bot
+from aiogram.client.session.middlewares.base import (
+    BaseRequestMiddleware,
+    NextRequestMiddlewareType,
+)
+from aiogram.methods import (
+    CopyMessage,
+    EditMessageCaption,
+    EditMessageMedia,
+    EditMessageReplyMarkup,
+    EditMessageText,
+    ForwardMessage,
+    Response,
+    SendDocument,
+    SendMessage,
+    SendPhoto,
+    TelegramMethod,
+)
+from aiogram.methods.base import TelegramType
+
+from bot.services.outbound_service import OutboundScheduler
+
+
+class OutboundSchedulerMiddleware(BaseRequestMiddleware):
+    '''Направляет отправку и редактирование сообщений через планировщик.
+
+    Приоритет берётся из контекста вызова (см. `send_priority`), по
+    умолчанию запрос считается интерактивным.
+    '''
+
+    scheduled_methods = (
+        SendMessage,
+        SendPhoto,
+        SendDocument,
+        CopyMessage,
+        ForwardMessage,
+        EditMessageText,
+        EditMessageCaption,
+        EditMessageMedia,
+        EditMessageReplyMarkup,
+    )
+
+    def __init__(self, scheduler: OutboundScheduler) -> None:
+        self.scheduler = scheduler
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType[TelegramType],
+        bot: Bot,
+        method: TelegramMethod[TelegramType],
+    ) -> Response[TelegramType]:
+        if not isinstance(method, self.scheduled_methods):
+            return await make_request(bot, method)
+
+        return await self.scheduler.submit(
+            lambda: make_request(bot, method),
+            chat_id=getattr(method, 'chat_id', None),
+        )
@@ -1,3 +1,4 @@
+from datetime import datetime, timedelta
 from logging import getLogger
 from typing import Any, Awaitable, Callable
 
@@ -5,9 +6,9 @@ from aiogram import BaseMiddleware
 from aiogram.enums import UpdateType
 from aiogram.types import CallbackQuery, Message, TelegramObject
 
-from data.db import async_session
+from bot.services.event_recorder import InteractionEventRecorder
+from bot.services.event_sampling import event_sampler
 from data.models import InteractionEvent
-from db_handler.service import InteractionEventService
 
 logger = getLogger(__name__)
 
@@ -40,24 +41,34 @@ class InteractionEventMiddleware(BaseMiddleware):
         event_type = self.event_type_map.get(type(event), None)
         user = getattr(event, 'from_user', None)
 
-        if event_type and user:
+        callback_data = getattr(event, 'data', None)
+        message_text = getattr(event, 'text', None)
+        # Время в том же формате, что у created_at моделей; активность
+        # и событие получают одно значение
+        now = datetime.utcnow() + timedelta(hours=3)
+        if user:
+            # Активность отмечается всегда, независимо от выборки
+            InteractionEventRecorder.record_activity(user.id, now)
+        # Под нагрузкой часть событий не записывается (см. EventSampler)
+        weight = event_sampler.sample(
+            event_type, callback_data, message_text
+        ) if (event_type and user) else None
+
+        if weight is not None:
             event_obj = InteractionEvent(
                 event_type=event_type,
                 user_id=user.id,
-                message_text=getattr(event, 'text', None),
-                callback_data=getattr(event, 'data', None),
+                message_text=message_text,
+                callback_data=callback_data,
+                sample_weight=weight,
+                created_at=now,
+            )
+            # Событие пишется отдельно от транзакции обновления и
+            # сохраняется, даже если обработчик её откатит
+            InteractionEventRecorder.record(event_obj)
+            logger.debug(
+                f'Событие {event_type.value} '
+                f'добавлено для пользователя {user.id}'
             )
-            try:
-                async with async_session() as session:
-                    await InteractionEventService(session).save_event(
-                        event_obj,
-                    )
-                    user_info = user.id if user else 'Unknown'
-                    logger.debug(
-                        f'Событие {event_type.value} '
-                        f'сохранено для пользователя {user_info}'
-                    )
-            except Exception as e:
-                logger.error(f'Ошибка при сохранении события: {e}')
 
         return await handler(event, data)
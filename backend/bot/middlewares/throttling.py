@@ -0,0 +1,109 @@
+import time
+from array import array
+from contextlib import suppress
+from logging import getLogger
+from typing import Any, Awaitable, Callable
+
+from aiogram import BaseMiddleware
+from aiogram.exceptions import TelegramAPIError
+from aiogram.types import TelegramObject, Update
+
+from bot.config import Messages, ThrottleSettings
+from bot.services.role_service import RoleService
+from utils.metrics import metrics
+
+logger = getLogger(__name__)
+
+
+class TokenBucketTable:
+    """Token bucket'ы пользователей в массивах фиксированного размера.
+
+    Пользователь занимает ячейку `user_id % size`; состояние корзины —
+    владелец, число токенов и время обновления — лежит в трёх `array`,
+    так что память не зависит от числа пользователей (24 байта на
+    ячейку). Если ячейку занимает другой пользователь, она переходит
+    новому с полной корзиной.
+    """
+
+    __slots__ = ('rate', 'capacity', 'size', '_owners', '_tokens', '_updated')
+
+    def __init__(self, rate: float, capacity: float, size: int) -> None:
+        self.rate = rate
+        self.capacity = capacity
+        self.size = size
+        self._owners = array('q', [0]) * size
+        self._tokens = array('d', [0.0]) * size
+        self._updated = array('d', [0.0]) * size
+
+    def consume(self, user_id: int, now: float) -> bool:
+        """Списать токен; False, если корзина пользователя пуста."""
+        index = user_id % self.size
+        if self._owners[index] != user_id:
+            self._owners[index] = user_id
+            tokens = self.capacity
+        else:
+            tokens = min(
+                self.capacity,
+                self._tokens[index]
+                + (now - self._updated[index]) * self.rate,
+            )
+        self._updated[index] = now
+        if tokens < 1:
+            self._tokens[index] = tokens
+            return False
+        self._tokens[index] = tokens - 1
+        return True
+
+
+class ThrottlingMiddleware(BaseMiddleware):
+    """Ограничение частоты сообщений и нажатий от одного пользователя.
+
+    Стоит до очередей и сессии БД: обновление сверх лимита не занимает
+    очередь, соединение и не пишет события. Сообщения сверх лимита
+    отбрасываются молча, на нажатия отвечается коротким уведомлением,
+    чтобы у клиента пропал индикатор загрузки. Администраторы
+    не ограничиваются.
+    """
+
+    def __init__(
+        self,
+        message_rate: float = ThrottleSettings.MESSAGE_RATE,
+        message_burst: int = ThrottleSettings.MESSAGE_BURST,
+        callback_rate: float = ThrottleSettings.CALLBACK_RATE,
+        callback_burst: int = ThrottleSettings.CALLBACK_BURST,
+        size: int = ThrottleSettings.TABLE_SIZE,
+    ) -> None:
+        self.messages = TokenBucketTable(message_rate, message_burst, size)
+        self.callbacks = TokenBucketTable(callback_rate, callback_burst, size)
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: dict[str, Any],
+    ) -> Any:
+        if not isinstance(event, Update):
+            return await handler(event, data)
+
+        if event.message is not None:
+            buckets, callback = self.messages, None
+        elif event.callback_query is not None:
+            buckets, callback = self.callbacks, event.callback_query
+        else:
+            return await handler(event, data)
+
+        user = data.get('event_from_user')
+        if user is None or RoleService.is_admin(user.id):
+            return await handler(event, data)
+
+        if buckets.consume(user.id, time.monotonic()):
+            return await handler(event, data)
+
+        metrics.inc(
+            'throttle.callbacks' if callback else 'throttle.messages'
+        )
+        logger.debug(f"Update {event.update_id} from {user.id} throttled")
+        if callback is not None:
+            with suppress(TelegramAPIError):
+                await callback.answer(Messages.THROTTLED)
+        return None
@@ -0,0 +1,33 @@
+from logging import getLogger
+
+from aiogram import Bot
+from aiogram.client.session.middlewares.base import (
+    BaseRequestMiddleware,
+    NextRequestMiddlewareType,
+)
+from aiogram.exceptions import TelegramForbiddenError
+from aiogram.methods import Response, TelegramMethod
+from aiogram.methods.base import TelegramType
+
+from bot.services.unreachable_service import UnreachableUserService
+
+logger = getLogger(__name__)
+
+
+class UnreachableUserMiddleware(BaseRequestMiddleware):
+    '''Отмечает получателей, заблокировавших бота, при любой отправке.'''
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType[TelegramType],
+        bot: Bot,
+        method: TelegramMethod[TelegramType],
+    ) -> Response[TelegramType]:
+        try:
+            return await make_request(bot, method)
+        except TelegramForbiddenError:
+            chat_id = getattr(method, 'chat_id', None)
+            # Личные чаты имеют положительный id, совпадающий с telegram_id
+            if isinstance(chat_id, int) and chat_id > 0:
+                UnreachableUserService.mark(chat_id)
+            raise
@@ -4,8 +4,10 @@ from typing import Any, Awaitable, Callable
 from aiogram import BaseMiddleware
 from aiogram.types import Message, TelegramObject
 from aiogram.types import User as TG_User
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from data.db import get_session
+from data import fast_queries
+from data.config import DatabaseSettings
 from data.queries import get_or_create_user
 
 logger = getLogger(__name__)
@@ -23,10 +25,19 @@ class TrackNewUserMiddleware(BaseMiddleware):
         user: TG_User | None = getattr(event, "from_user", None)
 
         if user and isinstance(event, Message) and event.text == "/start":
-            async with get_session() as session:
-                try:
-                    await get_or_create_user(user, session)
-                except Exception as e:
-                    logger.error(f"Error tracking new user {user.id}: {e}")
+            try:
+                await self.track_user(user, data["session"])
+            except Exception as e:
+                logger.error(f"Error tracking new user {user.id}: {e}")
 
         return await handler(event, data)
+
+    @staticmethod
+    async def track_user(user: TG_User, session: AsyncSession) -> None:
+        """Создать пользователя или обновить его username."""
+        if DatabaseSettings.FAST_PATH:
+            # Обычно пользователь уже есть и не менял username
+            record = await fast_queries.get_user(session, user.id)
+            if record is not None and record.username == user.username:
+                return
+        await get_or_create_user(user, session)
@@ -2,11 +2,14 @@ from logging import getLogger
 from aiogram.types import CallbackQuery
 from aiogram.fsm.context import FSMContext
 from aiogram.utils.keyboard import InlineKeyboardBuilder
-from sqlmodel import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from data.db import get_session
-from data.models import Content, Category
-from data.queries import get_button_by_id
+from data.models import Content
+from data.queries import (
+    ACTIVE_CATEGORIES,
+    ACTIVE_CATEGORY_BUTTONS,
+    get_button_by_id,
+)
 from bot.config import ImageSettings
 from bot.keyboards.callbacks import (
     AdminCallback,
@@ -34,8 +37,7 @@ class AdminService:
         Создает главное меню с категориями для админской панели.
         """
         builder = InlineKeyboardBuilder()
-        query = select(Category).where(Category.is_active)
-        result = await session.execute(query)
+        result = await session.execute(ACTIVE_CATEGORIES)
         categories = result.scalars().all()
         for category in categories:
             builder.button(
@@ -54,11 +56,9 @@ class AdminService:
         """
         builder = InlineKeyboardBuilder()
         try:
-            query = select(Content).where(
-                Content.category_id == category_id,
-                Content.is_active
-            ).order_by(Content.views_count.desc())
-            result = await session.execute(query)
+            result = await session.execute(
+                ACTIVE_CATEGORY_BUTTONS, {"category_id": category_id}
+            )
             buttons = result.scalars().all()
 
             for button in buttons:
@@ -104,7 +104,9 @@ class AdminService:
         await safe_edit_message(callback, text, parse_mode="HTML")
 
     @staticmethod
-    async def process_image_upload(message, state: FSMContext, content_id: int):
+    async def process_image_upload(
+        message, state: FSMContext, content_id: int, session: AsyncSession
+    ):
         """Обрабатывает загруженное изображение."""
         # Валидация изображения
         validation_result = validate_photo(message, ImageSettings.MAX_FILE_SIZE)
@@ -124,29 +126,28 @@ class AdminService:
         file_url = clean_url(file_url)
 
         # Сохраняем file_id и URL изображения в базу данных
-        async with get_session() as session:
-            content = await get_button_by_id(content_id, session)
+        content = await get_button_by_id(content_id, session)
 
-            if not content:
-                await message.answer("❌ Контент не найден")
-                await state.clear()
-                return
+        if not content:
+            await message.answer("❌ Контент не найден")
+            await state.clear()
+            return
 
-            content.file_id = file_id
-            content.image_url = file_url
-            session.add(content)
-            await session.commit()
+        content.file_id = file_id
+        content.image_url = file_url
+        session.add(content)
+        await session.commit()
 
-            logger.info(f"Image uploaded for content {content_id}: {file_url}")
+        logger.info(f"Image uploaded for content {content_id}: {file_url}")
 
-            # Проверяем валидность URL
-            url_status = "✅" if is_valid_image_url(file_url) else "⚠️ URL может быть недоступен"
+        # Проверяем валидность URL
+        url_status = "✅" if is_valid_image_url(file_url) else "⚠️ URL может быть недоступен"
 
-            await message.answer(
-                f"✅ <b>Изображение успешно загружено!</b>\n\n"
-                f"Контент: {content.title}\n"
-                f"Статус: {url_status}",
-                parse_mode="HTML"
-            )
+        await message.answer(
+            f"✅ <b>Изображение успешно загружено!</b>\n\n"
+            f"Контент: {content.title}\n"
+            f"Статус: {url_status}",
+            parse_mode="HTML"
+        )
 
         await state.clear()
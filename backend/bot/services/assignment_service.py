@@ -0,0 +1,201 @@
+import enum
+from datetime import datetime, timedelta
+from logging import getLogger
+from typing import Iterable, Optional
+
+from sqlalchemy import func, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from sqlalchemy.orm.attributes import set_committed_value
+
+from bot.config import AssignmentSettings
+from data.models import Question
+
+logger = getLogger(__name__)
+
+
+@enum.unique
+class AssignmentMode(enum.Enum):
+    BROADCAST = 'broadcast'
+    ROUND_ROBIN = 'round_robin'
+    LEAST_OPEN = 'least_open'
+
+
+class AssignmentService:
+    """Назначение вопросов одному администратору."""
+
+    mode = AssignmentMode(AssignmentSettings.MODE)
+
+    @staticmethod
+    def _now() -> datetime:
+        return datetime.utcnow() + timedelta(hours=3)
+
+    @classmethod
+    def is_enabled(cls) -> bool:
+        return cls.mode is not AssignmentMode.BROADCAST
+
+    @staticmethod
+    async def last_assigned_at(
+        admins: Iterable[int], session: AsyncSession
+    ) -> dict[int, Optional[datetime]]:
+        """Время последнего назначения вопроса каждому админу."""
+        admins = list(admins)
+        query = (
+            select(Question.assigned_admin_id, func.max(Question.assigned_at))
+            .where(Question.assigned_admin_id.in_(admins))
+            .group_by(Question.assigned_admin_id)
+        )
+        result = await session.execute(query)
+        last = dict.fromkeys(admins)
+        last.update(result.all())
+        return last
+
+    @classmethod
+    async def _least_recent(
+        cls, candidates: list[int], session: AsyncSession
+    ) -> int:
+        """Админ, которому вопрос назначался раньше всех.
+
+        Очередь берётся из БД, поэтому она общая для всех процессов бота.
+        Админ без назначений идёт первым, при равенстве — по порядку в
+        списке.
+        """
+        last = await cls.last_assigned_at(candidates, session)
+        return min(
+            candidates,
+            key=lambda a: (last[a] is not None, last[a] or datetime.min),
+        )
+
+    @staticmethod
+    async def count_open_questions(
+        admins: Iterable[int], session: AsyncSession
+    ) -> dict[int, int]:
+        """Количество неотвеченных вопросов у каждого админа."""
+        admins = list(admins)
+        query = (
+            select(Question.assigned_admin_id, func.count(Question.id))
+            .where(
+                Question.assigned_admin_id.in_(admins),
+                Question.answer_text.is_(None),
+            )
+            .group_by(Question.assigned_admin_id)
+        )
+        result = await session.execute(query)
+        counts = dict.fromkeys(admins, 0)
+        counts.update(result.all())
+        return counts
+
+    @classmethod
+    async def pick_admin(
+        cls,
+        admins: list[int],
+        session: AsyncSession,
+        exclude: Optional[int] = None,
+    ) -> Optional[int]:
+        """Выбрать админа для вопроса согласно режиму назначения."""
+        candidates = [a for a in admins if a != exclude] or list(admins)
+        if not candidates:
+            return None
+
+        if cls.mode is AssignmentMode.LEAST_OPEN:
+            counts = await cls.count_open_questions(candidates, session)
+            fewest = min(counts.values())
+            # При равенстве нагрузки чередуем админов по кругу
+            candidates = [a for a in candidates if counts[a] == fewest]
+
+        return await cls._least_recent(candidates, session)
+
+    @classmethod
+    async def assign(
+        cls,
+        question: Question,
+        admins: list[int],
+        session: AsyncSession,
+    ) -> Optional[int]:
+        """Назначить вопрос админу (в рамках транзакции `session`)."""
+        admin_id = await cls.pick_admin(
+            admins, session, exclude=question.assigned_admin_id
+        )
+        if admin_id is None or admin_id == question.assigned_admin_id:
+            # Передавать некому: назначение и его время не меняются
+            return admin_id
+
+        question.assigned_admin_id = admin_id
+        question.assigned_at = cls._now()
+        session.add(question)
+        logger.info(f"Question #{question.id} assigned to admin {admin_id}")
+        return admin_id
+
+    @classmethod
+    async def claim(
+        cls,
+        question: Question,
+        admin_id: int,
+        session: AsyncSession,
+        timeout: int = AssignmentSettings.TIMEOUT,
+    ) -> bool:
+        """Закрепить вопрос за админом, начавшим отвечать.
+
+        Проверка и запись — один условный UPDATE, поэтому из админов,
+        одновременно нажавших «Ответить», вопрос получает один. Вопрос
+        без ответа закрепляется, если он свободен, уже закреплён за этим
+        админом или закрепление старше `timeout` секунд.
+
+        Returns:
+            True, если вопрос закреплён за `admin_id`.
+        """
+        now = cls._now()
+        result = await session.execute(
+            update(Question)
+            .where(
+                Question.id == question.id,
+                Question.answer_text.is_(None),
+                or_(
+                    Question.assigned_admin_id.is_(None),
+                    Question.assigned_admin_id == admin_id,
+                    Question.assigned_at < now - timedelta(seconds=timeout),
+                ),
+            )
+            .values(assigned_admin_id=admin_id, assigned_at=now)
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount != 1:
+            return False
+
+        if question.assigned_admin_id != admin_id:
+            logger.info(
+                f"Question #{question.id} claimed by admin {admin_id}"
+            )
+        set_committed_value(question, 'assigned_admin_id', admin_id)
+        set_committed_value(question, 'assigned_at', now)
+        return True
+
+    @classmethod
+    async def get_overdue_questions(
+        cls,
+        session: AsyncSession,
+        timeout: int = AssignmentSettings.TIMEOUT,
+        limit: int = 100,
+        exclude_admin: Optional[int] = None,
+    ) -> list[Question]:
+        """Неотвеченные вопросы, назначенные дольше `timeout` секунд назад.
+
+        Вопросы админа `exclude_admin` не возвращаются: их некому
+        передать, когда он единственный.
+        """
+        cutoff = cls._now() - timedelta(seconds=timeout)
+        query = (
+            select(Question)
+            .options(selectinload(Question.user))
+            .where(
+                Question.answer_text.is_(None),
+                Question.assigned_admin_id.isnot(None),
+                Question.assigned_at < cutoff,
+            )
+            .order_by(Question.assigned_at)
+            .limit(limit)
+        )
+        if exclude_admin is not None:
+            query = query.where(Question.assigned_admin_id != exclude_admin)
+        result = await session.execute(query)
+        return list(result.scalars().all())
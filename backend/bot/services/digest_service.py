@@ -0,0 +1,180 @@
+import asyncio
+import html
+import time
+from dataclasses import dataclass
+from logging import getLogger
+from typing import Awaitable, Callable, Optional
+
+from aiogram import Bot
+from aiogram.types import InlineKeyboardMarkup
+
+from bot.config import DigestSettings
+from bot.keyboards.main_menu import (
+    get_admin_answer_keyboard,
+    get_admin_digest_keyboard,
+)
+from enums.fields import ViewLimits
+from utils.metrics import metrics
+
+logger = getLogger(__name__)
+
+SendFunc = Callable[[Bot, list, str, InlineKeyboardMarkup], Awaitable[None]]
+
+
+@dataclass(slots=True)
+class QuestionNotice:
+    """Данные нового вопроса для уведомления админов."""
+
+    question_id: int
+    username: Optional[str]
+    text: str
+    url: str
+
+    @property
+    def _username(self) -> str:
+        # Поля пользователя экранируются: уведомления идут в режиме HTML
+        return html.escape(str(self.username))
+
+    def to_message(self) -> str:
+        """Полное уведомление об одном вопросе."""
+        return (
+            f"❓ <b>Новый вопрос #{self.question_id}</b>\n\n"
+            f"<b>От пользователя:</b> @{self._username}\n\n"
+            f"<b>Текст вопроса:</b>\n{html.escape(self.text)}\n\n"
+            f'<a href="{self.url}">Перейти к вопросу</a>'
+        )
+
+    def to_digest_line(self) -> str:
+        """Краткая строка вопроса для сводки."""
+        limit = ViewLimits.TEXT_FIELD.value * 2
+        text = self.text if len(self.text) <= limit else (
+            self.text[:limit] + "…"
+        )
+        return (
+            f'<b><a href="{self.url}">#{self.question_id}</a></b> '
+            f"@{self._username}: {html.escape(text)}"
+        )
+
+
+class QuestionDigest:
+    """Группировка уведомлений о вопросах при всплесках нагрузки.
+
+    Первый вопрос после затишья уходит админу сразу и открывает окно.
+    Вопросы, пришедшие пока окно открыто, копятся и по его закрытию
+    отправляются одной сводкой. Длина окна растёт вместе с ожидаемым
+    числом вопросов за минимальное окно (оценка по EWMA интервала между
+    вопросами) и ограничена `max_window`.
+    """
+
+    def __init__(
+        self,
+        send: SendFunc,
+        min_window: float = DigestSettings.MIN_WINDOW,
+        max_window: float = DigestSettings.MAX_WINDOW,
+        max_questions: int = DigestSettings.MAX_QUESTIONS,
+        smoothing: float = DigestSettings.SMOOTHING,
+    ) -> None:
+        self.send = send
+        self.min_window = min_window
+        self.max_window = max_window
+        self.max_questions = max_questions
+        self.smoothing = smoothing
+
+        self._buffers: dict[int, list[QuestionNotice]] = {}
+        self._windows: dict[int, asyncio.Task] = {}
+        self._avg_gap: Optional[float] = None
+        self._last_arrival: Optional[float] = None
+
+    @property
+    def window(self) -> float:
+        """Текущая длина окна группировки в секундах."""
+        if not self._avg_gap:
+            return self.min_window
+        expected = self.min_window / self._avg_gap
+        return min(self.max_window, self.min_window * max(1.0, expected))
+
+    def _track_arrival(self) -> None:
+        now = time.monotonic()
+        if self._last_arrival is not None:
+            gap = now - self._last_arrival
+            if self._avg_gap is None:
+                self._avg_gap = gap
+            else:
+                self._avg_gap += self.smoothing * (gap - self._avg_gap)
+        self._last_arrival = now
+        metrics.set_gauge("digest.window", self.window)
+
+    async def submit(
+        self, bot: Bot, notice: QuestionNotice, admins: list
+    ) -> None:
+        """Уведомить админов о вопросе сразу или в ближайшей сводке."""
+        self._track_arrival()
+
+        immediate = []
+        for admin_id in admins:
+            if admin_id in self._windows:
+                self._buffers[admin_id].append(notice)
+                metrics.inc("digest.buffered")
+            else:
+                immediate.append(admin_id)
+                self._open_window(bot, admin_id)
+
+        if immediate:
+            await self.send(
+                bot,
+                immediate,
+                notice.to_message(),
+                await get_admin_answer_keyboard(notice.question_id),
+            )
+
+    def _open_window(self, bot: Bot, admin_id: int) -> None:
+        self._buffers[admin_id] = []
+        self._windows[admin_id] = asyncio.create_task(
+            self._run_window(bot, admin_id)
+        )
+
+    async def _run_window(self, bot: Bot, admin_id: int) -> None:
+        try:
+            while True:
+                await asyncio.sleep(self.window)
+                pending = self._buffers.get(admin_id)
+                if not pending:
+                    return
+                # Пока вопросы продолжают поступать, окно остаётся открытым
+                self._buffers[admin_id] = []
+                await self._send_digest(bot, admin_id, pending)
+        finally:
+            self._windows.pop(admin_id, None)
+            self._buffers.pop(admin_id, None)
+
+    async def _send_digest(
+        self, bot: Bot, admin_id: int, notices: list[QuestionNotice]
+    ) -> None:
+        for start in range(0, len(notices), self.max_questions):
+            chunk = notices[start:start + self.max_questions]
+            if len(chunk) == 1:
+                text = chunk[0].to_message()
+                keyboard = await get_admin_answer_keyboard(
+                    chunk[0].question_id
+                )
+            else:
+                text = (
+                    f"❓ <b>Новые вопросы ({len(chunk)})</b>\n\n"
+                    + "\n\n".join(n.to_digest_line() for n in chunk)
+                )
+                keyboard = get_admin_digest_keyboard(
+                    [n.question_id for n in chunk]
+                )
+            await self.send(bot, [admin_id], text, keyboard)
+            metrics.inc("digest.sent")
+
+    async def close(self, bot: Bot) -> None:
+        """Отправить накопленные сводки и закрыть окна."""
+        windows = list(self._windows.values())
+        for task in windows:
+            task.cancel()
+        pending = dict(self._buffers)
+        await asyncio.gather(*windows, return_exceptions=True)
+        for admin_id, notices in pending.items():
+            if notices:
+                await self._send_digest(bot, admin_id, notices)
@@ -0,0 +1,118 @@
+import asyncio
+from datetime import datetime, timedelta
+from logging import getLogger
+from typing import Optional
+
+from bot.config import EventWriteSettings
+from data.db import get_session
+from data.models import InteractionEvent
+from data.queries import mark_users_active
+from utils.metrics import metrics
+
+logger = getLogger(__name__)
+
+
+class InteractionEventRecorder:
+    """Пакетная запись InteractionEvent отдельной транзакцией.
+
+    События копятся в памяти и записываются своей сессией раз в
+    `FLUSH_INTERVAL` секунд или по накоплении `BATCH_SIZE` штук. Откат
+    транзакции обработчика их не затрагивает, а обновлению не нужна
+    отдельная вставка. Если БД недоступна, в памяти остаётся не больше
+    `MAX_PENDING` событий, самые старые отбрасываются.
+
+    В той же транзакции сохраняется `User.last_activity_at` — время
+    последнего обращения каждого пользователя. Оно отмечается на каждое
+    обновление, даже если само событие не попало в выборку.
+    """
+
+    _pending: list[InteractionEvent] = []
+    # telegram_id -> время последнего обращения с прошлой записи
+    _activity: dict[int, datetime] = {}
+    _flushing: Optional[asyncio.Task] = None
+
+    @classmethod
+    def record(cls, event: InteractionEvent) -> None:
+        """Поставить событие в очередь на запись."""
+        cls._pending.append(event)
+        cls._trim()
+        cls._publish_pending()
+        if len(cls._pending) >= EventWriteSettings.BATCH_SIZE and (
+            cls._flushing is None or cls._flushing.done()
+        ):
+            cls._flushing = asyncio.create_task(cls.flush())
+
+    @classmethod
+    def record_activity(cls, user_id: int, active_at: datetime) -> None:
+        """Отметить обращение пользователя к боту."""
+        cls._activity[user_id] = active_at
+
+    @classmethod
+    def _trim(cls) -> None:
+        excess = len(cls._pending) - EventWriteSettings.MAX_PENDING
+        if excess > 0:
+            del cls._pending[:excess]
+            metrics.inc('events.dropped', excess)
+
+    @classmethod
+    def _publish_pending(cls) -> None:
+        # По длине очереди EventSampler снижает долю записи
+        metrics.set_gauge('events.pending', len(cls._pending))
+
+    @classmethod
+    async def flush(cls) -> int:
+        """Записать накопленные события и активность одной транзакцией."""
+        if not cls._pending and not cls._activity:
+            return 0
+
+        batch, cls._pending = cls._pending, []
+        activity, cls._activity = cls._activity, {}
+        cls._publish_pending()
+        try:
+            async with get_session() as session:
+                session.add_all(batch)
+                updated = await mark_users_active(activity, session)
+                await session.commit()
+        except Exception as e:
+            logger.error(f"Failed to write {len(batch)} interaction events: {e}")
+            # Повторим со следующим пакетом; отметки, сделанные после
+            # начала записи, новее
+            cls._pending[:0] = batch
+            cls._trim()
+            cls._publish_pending()
+            for user_id, active_at in activity.items():
+                cls._activity.setdefault(user_id, active_at)
+            return 0
+
+        cls._retry_new_users(activity, updated)
+        metrics.inc('events.written', len(batch))
+        return len(batch)
+
+    @classmethod
+    def _retry_new_users(
+        cls, activity: dict[int, datetime], updated: set[int]
+    ) -> None:
+        """Вернуть в очередь свежие отметки пользователей без строки.
+
+        Новый пользователь сохраняется транзакцией обработчика /start,
+        которая может завершиться позже записи его первой отметки.
+        """
+        retry_after = (
+            datetime.utcnow() + timedelta(hours=3)
+            - timedelta(seconds=EventWriteSettings.ACTIVITY_RETRY)
+        )
+        for user_id, active_at in activity.items():
+            if user_id not in updated and active_at > retry_after:
+                cls._activity.setdefault(user_id, active_at)
+
+    @classmethod
+    async def run_periodic_flush(
+        cls, interval: float = EventWriteSettings.FLUSH_INTERVAL
+    ) -> None:
+        """Фоновая запись; при остановке записывает остаток."""
+        try:
+            while True:
+                await asyncio.sleep(interval)
+                await cls.flush()
+        finally:
+            await cls.flush()
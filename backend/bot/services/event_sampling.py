@@ -0,0 +1,134 @@
+import random
+import time
+from logging import getLogger
+from typing import Callable, Optional
+
+from aiogram.enums import UpdateType
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from bot.config import EventSamplingSettings
+from utils.metrics import metrics
+
+logger = getLogger(__name__)
+
+# Сообщения, которые записываются всегда: по /start считаются
+# пользователи, не пошедшие дальше приветствия
+ALWAYS_RECORDED = frozenset({'/start'})
+
+
+def parse_prefix_rates(value: str) -> dict[str, float]:
+    """Разбор строки вида `button=0.5,category=0.25`."""
+    rates = {}
+    for item in filter(None, (part.strip() for part in value.split(','))):
+        prefix, _, rate = item.partition('=')
+        try:
+            rates[prefix.strip()] = float(rate)
+        except ValueError:
+            logger.warning(f"Invalid event sample rate: {item!r}")
+    return rates
+
+
+class EventSampler:
+    """Решает, записывать ли InteractionEvent, и с каким весом.
+
+    Базовая доля задаётся по типу события и, для нажатий, по префиксу
+    callback_data. В адаптивном режиме доля дополнительно снижается
+    пропорционально перегрузке: во сколько раз средняя задержка
+    запросов к БД, число обновлений в очереди или число событий,
+    ожидающих записи, превышает порог.
+    Записанное событие получает вес `1 / доля`, поэтому сумма весов
+    оценивает исходное число событий.
+    """
+
+    def __init__(
+        self,
+        message_rate: float = EventSamplingSettings.MESSAGE_RATE,
+        callback_rate: float = EventSamplingSettings.CALLBACK_RATE,
+        prefix_rates: Optional[dict[str, float]] = None,
+        adaptive: bool = EventSamplingSettings.ADAPTIVE,
+        latency_threshold: float = EventSamplingSettings.LATENCY_THRESHOLD,
+        backlog_threshold: int = EventSamplingSettings.BACKLOG_THRESHOLD,
+        pending_threshold: int = EventSamplingSettings.PENDING_THRESHOLD,
+        min_rate: float = EventSamplingSettings.MIN_RATE,
+        smoothing: float = EventSamplingSettings.SMOOTHING,
+        rng: Callable[[], float] = random.random,
+    ) -> None:
+        self.type_rates = {
+            UpdateType.MESSAGE: message_rate,
+            UpdateType.CALLBACK_QUERY: callback_rate,
+        }
+        self.prefix_rates = (
+            parse_prefix_rates(EventSamplingSettings.PREFIX_RATES)
+            if prefix_rates is None else prefix_rates
+        )
+        self.adaptive = adaptive
+        self.latency_threshold = latency_threshold
+        self.backlog_threshold = backlog_threshold
+        self.pending_threshold = pending_threshold
+        self.min_rate = min_rate
+        self.smoothing = smoothing
+        self.rng = rng
+        self.latency = 0.0
+
+    def track_latency(self, db_engine: AsyncEngine) -> None:
+        """Следить за средней (EWMA) длительностью запросов движка."""
+        sync_engine = db_engine.sync_engine
+
+        @event.listens_for(sync_engine, 'before_cursor_execute')
+        def _started(conn, cursor, statement, parameters, context, many):
+            conn.info['query_started'] = time.perf_counter()
+
+        @event.listens_for(sync_engine, 'after_cursor_execute')
+        def _finished(conn, cursor, statement, parameters, context, many):
+            started = conn.info.pop('query_started', None)
+            if started is not None:
+                self.record_latency(time.perf_counter() - started)
+
+    def record_latency(self, seconds: float) -> None:
+        self.latency += self.smoothing * (seconds - self.latency)
+
+    def load_factor(self) -> float:
+        """Множитель доли от 1 (нет перегрузки) до 0."""
+        if not self.adaptive:
+            return 1.0
+        pressure = max(
+            self.latency / self.latency_threshold,
+            metrics.get_gauge('updates.waiting') / self.backlog_threshold,
+            metrics.get_gauge('events.pending') / self.pending_threshold,
+        )
+        return 1.0 if pressure <= 1 else 1 / pressure
+
+    def rate(
+        self, event_type: UpdateType, callback_data: Optional[str] = None
+    ) -> float:
+        """Текущая доля записываемых событий."""
+        rate = self.type_rates.get(event_type, 1.0)
+        if callback_data and self.prefix_rates:
+            rate = self.prefix_rates.get(
+                callback_data.partition(':')[0], rate
+            )
+        if rate >= 1 and not self.adaptive:
+            return 1.0
+        return min(1.0, max(self.min_rate, rate * self.load_factor()))
+
+    def sample(
+        self,
+        event_type: UpdateType,
+        callback_data: Optional[str] = None,
+        message_text: Optional[str] = None,
+    ) -> Optional[float]:
+        """Вес записи или None, если событие не записывается."""
+        if message_text in ALWAYS_RECORDED:
+            return 1.0
+        rate = self.rate(event_type, callback_data)
+        metrics.set_gauge(f'events.sample_rate.{event_type.value}', rate)
+        if rate >= 1:
+            return 1.0
+        if self.rng() >= rate:
+            metrics.inc('events.sampled_out')
+            return None
+        return 1 / rate
+
+
+event_sampler = EventSampler()
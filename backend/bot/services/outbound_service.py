@@ -0,0 +1,281 @@
+import asyncio
+import enum
+import itertools
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from logging import getLogger
+from typing import Any, Awaitable, Callable, Iterator, Optional
+
+from aiogram.exceptions import TelegramRetryAfter
+
+from bot.config import OutboundSettings
+from utils.metrics import metrics
+
+logger = getLogger(__name__)
+
+
+@enum.unique
+class SendPriority(enum.IntEnum):
+    """Классы приоритета исходящих сообщений (меньше — важнее)."""
+
+    INTERACTIVE = 0
+    ADMIN = 1
+    BULK = 2
+
+
+_current_priority: ContextVar[SendPriority] = ContextVar(
+    'outbound_priority', default=SendPriority.INTERACTIVE
+)
+
+
+@contextmanager
+def send_priority(priority: SendPriority) -> Iterator[None]:
+    """Задать приоритет для всех отправок внутри блока.
+
+    Пример:
+        ```python
+        with send_priority(SendPriority.BULK):
+            await bot.send_message(chat_id, text)
+        ```
+    """
+    token = _current_priority.set(priority)
+    try:
+        yield
+    finally:
+        _current_priority.reset(token)
+
+
+def current_priority() -> SendPriority:
+    """Приоритет текущего контекста отправки."""
+    return _current_priority.get()
+
+
+class TokenBucket:
+    """Token bucket: `rate` токенов в секунду, не больше `capacity`."""
+
+    __slots__ = ('rate', 'capacity', 'tokens', 'updated')
+
+    def __init__(self, rate: float, capacity: float) -> None:
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(
+            self.capacity, self.tokens + (now - self.updated) * self.rate
+        )
+        self.updated = now
+
+    def delay(self, now: float) -> float:
+        """Сколько ждать до появления токена (без списания)."""
+        self._refill(now)
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def reserve(self, now: float) -> float:
+        """Списать токен в долг и вернуть задержку до его появления."""
+        self._refill(now)
+        self.tokens -= 1
+        if self.tokens >= 0:
+            return 0.0
+        return -self.tokens / self.rate
+
+    def is_idle(self, now: float) -> bool:
+        """Корзина полная — её состояние можно не хранить."""
+        self._refill(now)
+        return self.tokens >= self.capacity
+
+
+class OutboundScheduler:
+    """Единый планировщик исходящих запросов к Telegram.
+
+    Запросы попадают в ограниченную очередь с приоритетами и выполняются
+    с учётом глобального лимита бота и лимита на отдельный чат. Массовые
+    рассылки занимают не больше `bulk_queue_size` мест в очереди, поэтому
+    не вытесняют интерактивные ответы.
+    """
+
+    def __init__(
+        self,
+        global_rate: float = OutboundSettings.GLOBAL_RATE,
+        chat_rate: float = OutboundSettings.CHAT_RATE,
+        chat_burst: int = OutboundSettings.CHAT_BURST,
+        queue_size: int = OutboundSettings.QUEUE_SIZE,
+        bulk_queue_size: int = OutboundSettings.BULK_QUEUE_SIZE,
+        max_retries: int = OutboundSettings.MAX_RETRIES,
+    ) -> None:
+        self.chat_rate = chat_rate
+        self.chat_burst = chat_burst
+        self.queue_size = queue_size
+        self.bulk_queue_size = bulk_queue_size
+        self.max_retries = max_retries
+        self.global_rate = global_rate
+
+        self._global = TokenBucket(global_rate, global_rate)
+        self._chats: dict[int | str, TokenBucket] = {}
+        self._seq = itertools.count()
+        self._queue: Optional[asyncio.PriorityQueue] = None
+        self._bulk_slots: Optional[asyncio.Semaphore] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._in_flight: set[asyncio.Task] = set()
+
+    @property
+    def running(self) -> bool:
+        return self._worker is not None and not self._worker.done()
+
+    def start(self, rate_share: float = 1.0) -> None:
+        """Запустить обработку очереди в текущем event loop.
+
+        `rate_share` — доля глобального лимита бота, доступная процессу,
+        когда отправкой занимаются несколько процессов.
+        """
+        if self.running:
+            return
+        rate = self.global_rate * rate_share
+        self._global = TokenBucket(rate, max(rate, 1))
+        self._queue = asyncio.PriorityQueue(maxsize=self.queue_size)
+        self._bulk_slots = asyncio.Semaphore(self.bulk_queue_size)
+        self._worker = asyncio.create_task(self._run())
+        logger.info('Outbound scheduler started')
+
+    async def stop(self) -> None:
+        """Остановить обработку и дождаться уже начатых отправок."""
+        if self._worker is None:
+            return
+        self._worker.cancel()
+        try:
+            await self._worker
+        except asyncio.CancelledError:
+            pass
+        self._worker = None
+        if self._in_flight:
+            await asyncio.gather(*self._in_flight, return_exceptions=True)
+        logger.info('Outbound scheduler stopped')
+
+    async def submit(
+        self,
+        call: Callable[[], Awaitable[Any]],
+        chat_id: int | str | None = None,
+        priority: Optional[SendPriority] = None,
+    ) -> Any:
+        """Поставить запрос в очередь и дождаться его результата."""
+        if not self.running:
+            return await call()
+
+        if priority is None:
+            priority = current_priority()
+
+        if priority is SendPriority.BULK:
+            await self._bulk_slots.acquire()
+
+        future = asyncio.get_running_loop().create_future()
+        item = (
+            priority, next(self._seq), time.monotonic(), chat_id, call, future
+        )
+        try:
+            await self._queue.put(item)
+        except BaseException:
+            if priority is SendPriority.BULK:
+                self._bulk_slots.release()
+            raise
+
+        metrics.inc(f'outbound.enqueued.{priority.name.lower()}')
+        metrics.set_gauge('outbound.queue_depth', self._queue.qsize())
+        return await future
+
+    async def _run(self) -> None:
+        while True:
+            # Ждём глобальный токен до выбора элемента, чтобы слот
+            # достался самому приоритетному запросу на этот момент
+            delay = self._global.delay(time.monotonic())
+            if delay:
+                await asyncio.sleep(delay)
+
+            priority, _, enqueued_at, chat_id, call, future = (
+                await self._queue.get()
+            )
+            if priority is SendPriority.BULK:
+                self._bulk_slots.release()
+            metrics.set_gauge('outbound.queue_depth', self._queue.qsize())
+
+            if future.done():
+                # Отправитель уже не ждёт результата
+                continue
+
+            now = time.monotonic()
+            self._global.reserve(now)
+            chat_delay = self._reserve_chat(chat_id, now)
+            metrics.observe(
+                f'outbound.wait.{priority.name.lower()}', now - enqueued_at
+            )
+
+            task = asyncio.create_task(
+                self._execute(call, future, priority, chat_delay)
+            )
+            self._in_flight.add(task)
+            task.add_done_callback(self._in_flight.discard)
+
+    def _reserve_chat(self, chat_id: int | str | None, now: float) -> float:
+        if chat_id is None:
+            return 0.0
+
+        bucket = self._chats.get(chat_id)
+        if bucket is None:
+            if len(self._chats) >= OutboundSettings.MAX_TRACKED_CHATS:
+                self._prune_chats(now)
+            bucket = self._chats[chat_id] = TokenBucket(
+                self.chat_rate, self.chat_burst
+            )
+        return bucket.reserve(now)
+
+    def _prune_chats(self, now: float) -> None:
+        """Удалить состояние чатов, которые давно ничего не получали."""
+        idle = [
+            chat_id for chat_id, bucket in self._chats.items()
+            if bucket.is_idle(now)
+        ]
+        for chat_id in idle:
+            del self._chats[chat_id]
+
+    async def _execute(
+        self,
+        call: Callable[[], Awaitable[Any]],
+        future: asyncio.Future,
+        priority: SendPriority,
+        chat_delay: float,
+    ) -> None:
+        name = priority.name.lower()
+        if chat_delay:
+            await asyncio.sleep(chat_delay)
+
+        for attempt in itertools.count():
+            try:
+                result = await call()
+            except TelegramRetryAfter as e:
+                metrics.inc('outbound.retry_after')
+                if attempt >= self.max_retries:
+                    metrics.inc(f'outbound.failed.{name}')
+                    if not future.done():
+                        future.set_exception(e)
+                    return
+                logger.warning(
+                    f'Flood control, retry in {e.retry_after}s '
+                    f'(attempt {attempt + 1})'
+                )
+                await asyncio.sleep(e.retry_after)
+            except Exception as e:
+                metrics.inc(f'outbound.failed.{name}')
+                if not future.done():
+                    future.set_exception(e)
+                return
+            else:
+                metrics.inc(f'outbound.sent.{name}')
+                if not future.done():
+                    future.set_result(result)
+                return
+
+
+outbound_scheduler = OutboundScheduler()
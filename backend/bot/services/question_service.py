@@ -1,13 +1,22 @@
+import asyncio
 from logging import getLogger
+from typing import Optional
 
-from aiogram.types import Message, User
+from aiogram import Bot
+from aiogram.types import InlineKeyboardMarkup, Message, User
 from aiogram.fsm.context import FSMContext
-from sqlalchemy import select
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from data.db import get_session
 from data.models import Question
 from data.queries import get_or_create_user
+from bot.config import AssignmentSettings, DigestSettings
 from bot.keyboards.main_menu import get_admin_answer_keyboard
+from bot.services.assignment_service import AssignmentService
+from bot.services.digest_service import QuestionDigest, QuestionNotice
+from bot.services.outbound_service import SendPriority, send_priority
+from bot.services.role_service import RoleService
 from bot.urls import URLBuilder
 
 logger = getLogger(__name__)
@@ -16,57 +25,214 @@ logger = getLogger(__name__)
 class QuestionService:
     """Сервис для работы с вопросами."""
 
+    # Фоновые уведомления админов о новых вопросах
+    _notices: set[asyncio.Task] = set()
+
     @staticmethod
-    async def process_user_question(message: Message, state: FSMContext, admins: list, admin_url: str):
-        """Обрабатывает вопрос от пользователя."""
+    async def process_user_question(
+        message: Message,
+        state: FSMContext,
+        admins: list,
+        admin_url: str,
+        session: AsyncSession,
+    ):
+        """Обрабатывает вопрос от пользователя.
+
+        Вопрос фиксируется в БД до уведомления админов, чтобы он был
+        доступен им сразу после получения уведомления. Уведомление
+        уходит в фоне: его длительность зависит от числа админов и не
+        входит в срок обработчика.
+        """
 
         tg_user: User = getattr(message, "from_user")
-        async with get_session() as session:
-            user = await get_or_create_user(tg_user=tg_user, session=session)
-            new_question = Question(text=message.text, user_id=user.telegram_id)
-            session.add(new_question)
-            await session.commit()
-            await session.refresh(new_question)
+        targets = admins
+        user = await get_or_create_user(tg_user=tg_user, session=session)
+        new_question = Question(text=message.text, user_id=user.telegram_id)
+        session.add(new_question)
 
-            question_url = URLBuilder.get_admin_question_url(new_question.id)
-            logger.info(
-                f"New question #{new_question.id} "
-                f"from user {message.from_user.id}"
-                f"<i>Ссылка: {question_url}</i>"
+        if AssignmentService.is_enabled():
+            await session.flush()
+            admin_id = await AssignmentService.assign(
+                new_question, admins, session
             )
+            if admin_id is not None:
+                targets = [admin_id]
 
-            await message.answer(
-                "✅ Спасибо! Ваш вопрос отправлен администратору. "
-                "Мы сообщим вам, как только поступит ответ."
+        # Сессия не сбрасывает атрибуты при commit, поэтому id уже
+        # известен, а соединение возвращается в пул до рассылки
+        await session.commit()
+
+        question_url = URLBuilder.get_admin_question_url(new_question.id)
+        logger.info(
+            f"New question #{new_question.id} "
+            f"from user {message.from_user.id}"
+            f"<i>Ссылка: {question_url}</i>"
+        )
+
+        await message.answer(
+            "✅ Спасибо! Ваш вопрос отправлен администратору. "
+            "Мы сообщим вам, как только поступит ответ."
+        )
+        await state.clear()
+
+        # Формируем уведомление для админов
+        notice = QuestionNotice(
+            question_id=new_question.id,
+            username=user.username,
+            text=message.text,
+            url=question_url,
+        )
+
+        QuestionService.dispatch_notice_later(message.bot, notice, targets)
+
+    @classmethod
+    def dispatch_notice_later(
+        cls, bot: Bot, notice: QuestionNotice, admins: list
+    ) -> None:
+        """Запускает `dispatch_notice` фоновой задачей."""
+
+        async def dispatch() -> None:
+            try:
+                await cls.dispatch_notice(bot, notice, admins)
+            except Exception as e:
+                logger.exception(
+                    "Failed to notify admins about question "
+                    f"#{notice.question_id}: {e}"
+                )
+
+        task = asyncio.create_task(dispatch())
+        cls._notices.add(task)
+        task.add_done_callback(cls._notices.discard)
+
+    @staticmethod
+    async def dispatch_notice(
+        bot: Bot, notice: QuestionNotice, admins: list
+    ) -> None:
+        """Уведомляет админов о вопросе сразу или через сводку."""
+        if DigestSettings.ENABLED:
+            await question_digest.submit(bot, notice, admins)
+            return
+
+        await QuestionService.notify_admins(
+            bot,
+            admins,
+            notice.to_message(),
+            await get_admin_answer_keyboard(notice.question_id),
+        )
+
+    @staticmethod
+    async def notify_admins(
+        bot: Bot,
+        admins: list,
+        text: str,
+        reply_markup: InlineKeyboardMarkup,
+    ) -> None:
+        """Параллельно рассылает уведомление администраторам.
+
+        Ошибка отправки одному админу не влияет на остальных.
+        """
+
+        async def send(admin_id: int) -> None:
+            try:
+                await bot.send_message(
+                    chat_id=admin_id,
+                    text=text,
+                    reply_markup=reply_markup,
+                    parse_mode="HTML"
+                )
+            except Exception as e:
+                logger.exception(
+                    "Failed to send question "
+                    f"to admin {admin_id}: {e}"
+                )
+
+        with send_priority(SendPriority.ADMIN):
+            await asyncio.gather(*(send(admin_id) for admin_id in admins))
+
+    @staticmethod
+    async def claim_question(
+        question_id: int, admin_id: int, session: AsyncSession
+    ) -> Optional[Question]:
+        """Закрепляет вопрос за админом, начавшим отвечать.
+
+        Только в режиме назначения: при рассылке всем админам вопрос не
+        закрепляется, а от двойного ответа защищает условная запись
+        ответа в `process_admin_answer`.
+
+        Returns:
+            Вопрос или None, если он не найден. Если вопрос не удалось
+            закрепить, у него `answer_text` уже заполнен или
+            `assigned_admin_id` указывает на другого админа.
+        """
+        question = await session.get(Question, question_id)
+        if question is None:
+            return None
+
+        if question.answer_text is None and AssignmentService.is_enabled():
+            claimed = await AssignmentService.claim(
+                question, admin_id, session
             )
-            await state.clear()
+            if not claimed:
+                # Вопрос успели взять или ответить на него
+                await session.refresh(question)
+        # Закрепление фиксируется до перехода админа к ответу
+        await session.commit()
+        return question
 
-            # Формируем сообщение для админов
-            admin_message = (
-                f"❓ <b>Новый вопрос #{new_question.id}</b>\n\n"
-                f"<b>От пользователя:</b> @{user.username}\n\n"
-                f"<b>Текст вопроса:</b>\n{message.text}\n\n"
-                f'<a href="{question_url}">Перейти к вопросу</a>'
+    @staticmethod
+    async def reassign_overdue(bot: Bot, admins: list) -> int:
+        """Передаёт другим админам вопросы, оставшиеся без ответа."""
+        notices = []
+        # Единственному админу передавать его же вопросы бессмысленно
+        only_admin = admins[0] if len(set(admins)) == 1 else None
+        async with get_session() as session:
+            questions = await AssignmentService.get_overdue_questions(
+                session, exclude_admin=only_admin
             )
+            for question in questions:
+                previous = question.assigned_admin_id
+                admin_id = await AssignmentService.assign(
+                    question, admins, session
+                )
+                if admin_id is None or admin_id == previous:
+                    continue
+                notices.append((
+                    QuestionNotice(
+                        question_id=question.id,
+                        username=question.user.username,
+                        text=question.text,
+                        url=URLBuilder.get_admin_question_url(question.id),
+                    ),
+                    admin_id,
+                ))
+            await session.commit()
 
-            for admin_id in admins:
-                try:
-                    await message.bot.send_message(
-                        chat_id=admin_id,
-                        text=admin_message,
-                        reply_markup=await get_admin_answer_keyboard(
-                            new_question.id
-                        ),
-                        parse_mode="HTML"
-                    )
-                except Exception as e:
-                    logger.exception(
-                        "Failed to send question "
-                        f"to admin {admin_id}: {e}"
-                    )
+        for notice, admin_id in notices:
+            await QuestionService.dispatch_notice(bot, notice, [admin_id])
+
+        if notices:
+            logger.info(f"Reassigned {len(notices)} overdue questions")
+        return len(notices)
 
     @staticmethod
-    async def process_admin_answer(message: Message, state: FSMContext):
+    async def run_reassignment(
+        bot: Bot,
+        interval: int = AssignmentSettings.CHECK_INTERVAL,
+    ) -> None:
+        """Фоновая проверка просроченных назначений."""
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await QuestionService.reassign_overdue(
+                    bot, sorted(RoleService.admins())
+                )
+            except Exception as e:
+                logger.exception(f"Question reassignment error: {e}")
+
+    @staticmethod
+    async def process_admin_answer(
+        message: Message, state: FSMContext, session: AsyncSession
+    ):
         """Обрабатывает ответ от администратора."""
         data = await state.get_data()
         question_id = data.get("question_id")
@@ -79,27 +245,39 @@ class QuestionService:
             await state.clear()
             return
 
-        user_id_to_notify = None
-
-        async with get_session() as session:
-            stmt = select(Question).where(Question.id == question_id)
-            result = await session.execute(stmt)
-            question = result.scalar_one_or_none()
-            
-            if not question:
+        # Ответ сохраняется до отправки пользователю и только если на
+        # вопрос ещё не ответили: проверка и запись — один UPDATE
+        result = await session.execute(
+            update(Question)
+            .where(
+                Question.id == question_id,
+                Question.answer_text.is_(None),
+            )
+            .values(answer_text=message.text)
+            .returning(Question.user_id, Question.created_at)
+            .execution_options(synchronize_session=False)
+        )
+        answered = result.first()
+        if answered is None:
+            question = await session.get(Question, question_id)
+            await session.rollback()
+            if question is None:
                 await message.answer(
                     f"Вопрос # {question_id} не найден в базе данных."
                 )
-                await state.clear()
-                return
-
-            question.answer_text = message.text
-            user_id_to_notify = question.user_id
-            await session.commit()
+            else:
+                await message.answer(
+                    f"На вопрос #{question_id} уже ответил "
+                    "другой администратор."
+                )
+            await state.clear()
+            return
+        await session.commit()
 
+        user_id_to_notify, created_at = answered
         user_message = (
             "<b>✅ Ответ на ваш вопрос от "
-            f"{question.created_at.strftime('%d.%m.%Y %H:%M')}</b>\n\n"
+            f"{created_at.strftime('%d.%m.%Y %H:%M')}</b>\n\n"
             f"{message.text}"
         )
 
@@ -119,3 +297,6 @@ class QuestionService:
                 f"{user_id_to_notify}. Ошибка: {e}")
 
         await state.clear()
+
+
+question_digest = QuestionDigest(send=QuestionService.notify_admins)
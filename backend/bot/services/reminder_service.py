@@ -1,11 +1,18 @@
+import asyncio
+import math
 from datetime import datetime, timedelta
 from logging import getLogger
+from typing import Optional
 
 from sqlmodel import select, func
 from aiogram import Bot
 
-from data.models import User, InteractionEvent
+from data.models import User
 from data.db import get_session
+from data.queries import mark_users_reminded
+from bot.config import ReminderSettings
+from bot.services.outbound_service import SendPriority, send_priority
+from bot.services.unreachable_service import UnreachableUserService
 
 logger = getLogger(__name__)
 
@@ -14,34 +21,44 @@ class ReminderService:
     """Сервис для отправки напоминаний неактивным пользователям."""
 
     @staticmethod
-    async def get_inactive_users(days: int = 7) -> list[User]:
+    def _inactive_users_query(days: int):
+        """Запрос неактивных пользователей, ещё не получивших напоминание.
+
+        Напоминание повторно не отправляется, пока пользователь не проявит
+        активность после предыдущего.
+        """
         cutoff_date = datetime.now() - timedelta(days=days)
+        # Отмечается на каждое обновление, в отличие от выборочно
+        # записываемых InteractionEvent
+        last_activity = User.last_activity_at
 
-        async with get_session() as session:
-            # Подзапрос для получения последней активности каждого пользователя
-            last_activity_subquery = (
-                select(
-                    InteractionEvent.user_id,
-                    func.max(InteractionEvent.created_at).label('last_activity')
-                )
-                .where(InteractionEvent.user_id.isnot(None))
-                .group_by(InteractionEvent.user_id)
-                .subquery()
+        query = (
+            select(User)
+            .where((last_activity < cutoff_date) | last_activity.is_(None))
+            .where(User.is_active)
+            .where(
+                User.last_reminded_at.is_(None) |
+                (User.last_reminded_at < last_activity)
             )
+        )
 
-            # Основной запрос для получения неактивных пользователей
-            query = (
-                select(User)
-                .outerjoin(
-                    last_activity_subquery,
-                    User.telegram_id == last_activity_subquery.c.user_id
-                )
-                .where(
-                    (last_activity_subquery.c.last_activity < cutoff_date) |
-                    (last_activity_subquery.c.last_activity.is_(None))
-                )
-                .where(User.is_active is True)
-            )
+        # Исключаем тех, кто уже заблокировал бота, но ещё не
+        # деактивирован пакетным UPDATE
+        unreachable = UnreachableUserService.pending_ids()
+        if unreachable:
+            query = query.where(User.telegram_id.notin_(unreachable))
+
+        return query
+
+    @staticmethod
+    async def get_inactive_users(
+        days: int = ReminderSettings.INACTIVE_DAYS,
+        limit: Optional[int] = None,
+    ) -> list[User]:
+        async with get_session() as session:
+            query = ReminderService._inactive_users_query(days)
+            if limit is not None:
+                query = query.order_by(User.telegram_id).limit(limit)
 
             result = await session.execute(query)
             inactive_users = result.scalars().all()
@@ -49,11 +66,55 @@ class ReminderService:
             logger.info(f"Найдено {len(inactive_users)} неактивных пользователей")
             return inactive_users
 
+    @staticmethod
+    async def count_inactive_users(
+        days: int = ReminderSettings.INACTIVE_DAYS,
+    ) -> int:
+        async with get_session() as session:
+            query = ReminderService._inactive_users_query(days).subquery()
+            result = await session.execute(
+                select(func.count()).select_from(query)
+            )
+            return result.scalar() or 0
+
+    @staticmethod
+    async def send_reminder(
+        bot: Bot, user: User, reminder_text: str, results: dict
+    ) -> None:
+        """Отправить одно напоминание и учесть результат в `results`."""
+        try:
+            await bot.send_message(
+                chat_id=user.telegram_id,
+                text=reminder_text,
+                disable_web_page_preview=True
+            )
+            results['sent'] += 1
+            results['sent_ids'].append(user.telegram_id)
+            logger.info(
+                f"Напоминание отправлено для {user.telegram_id}"
+            )
+
+        except Exception as e:
+            results['failed'] += 1
+            results['errors'].append(f"User {user.telegram_id}: {str(e)}")
+            logger.error(
+                f"Ошибка отправки напоминания для {user.telegram_id}: {e}"
+            )
+
+    @staticmethod
+    async def mark_reminded(telegram_ids: list[int]) -> None:
+        """Сохранить время отправки напоминания."""
+        if not telegram_ids:
+            return
+        async with get_session() as session:
+            await mark_users_reminded(telegram_ids, session)
+            await session.commit()
+
     @staticmethod
     async def send_reminders_to_inactive_users(
         bot: Bot,
         reminder_text: str,
-        days: int = 7
+        days: int = ReminderSettings.INACTIVE_DAYS
     ) -> dict:
         inactive_users = await ReminderService.get_inactive_users(days)
 
@@ -61,27 +122,21 @@ class ReminderService:
             'total': len(inactive_users),
             'sent': 0,
             'failed': 0,
-            'errors': []
+            'errors': [],
+            'sent_ids': [],
         }
 
-        for user in inactive_users:
-            try:
-                await bot.send_message(
-                    chat_id=user.telegram_id,
-                    text=reminder_text,
-                    disable_web_page_preview=True
-                )
-                results['sent'] += 1
-                logger.info(
-                    f"Напоминание отправлено для {user.telegram_id}"
+        # Темп рассылки задаёт планировщик исходящих сообщений,
+        # интерактивные ответы при этом обслуживаются в первую очередь
+        with send_priority(SendPriority.BULK):
+            await asyncio.gather(*(
+                ReminderService.send_reminder(
+                    bot, user, reminder_text, results
                 )
+                for user in inactive_users
+            ))
 
-            except Exception as e:
-                results['failed'] += 1
-                results['errors'].append(f"User {user.telegram_id}: {str(e)}")
-                logger.error(
-                    f"Ошибка отправки напоминания для {user.telegram_id}: {e}"
-                )
+        await ReminderService.mark_reminded(results['sent_ids'])
 
         logger.info(
             f"Напоминания отправлены: {results['sent']}/{results['total']}, "
@@ -89,3 +144,128 @@ class ReminderService:
         )
 
         return results
+
+
+class ReminderScheduler:
+    """Плановая рассылка напоминаний небольшими порциями.
+
+    Каждые `interval` секунд выбирает новых неактивных пользователей и
+    равномерно распределяет отправку по интервалу. Объём порции
+    рассчитывается так, чтобы накопившиеся напоминания разошлись до
+    конца окна доставки; вне окна (тихие часы) рассылка не ведётся.
+
+    Полный подсчёт ожидающих — тяжёлый запрос, поэтому он выполняется
+    раз в `recount_interval` секунд; между подсчётами оценка
+    уменьшается на число отправленных и уточняется по выборке порции.
+    """
+
+    def __init__(
+        self,
+        bot: Bot,
+        reminder_type: str = ReminderSettings.SCHEDULED_TYPE,
+        interval: int = ReminderSettings.SCHEDULER_INTERVAL,
+        max_per_tick: int = ReminderSettings.MAX_PER_TICK,
+        window_start: int = ReminderSettings.WINDOW_START_HOUR,
+        window_end: int = ReminderSettings.WINDOW_END_HOUR,
+        days: int = ReminderSettings.INACTIVE_DAYS,
+        recount_interval: int = ReminderSettings.BACKLOG_RECOUNT_INTERVAL,
+    ) -> None:
+        self.bot = bot
+        self.reminder_text = ReminderSettings.TEXTS[reminder_type]
+        self.interval = interval
+        self.max_per_tick = max_per_tick
+        self.window_start = window_start
+        self.window_end = window_end
+        self.days = days
+        self.recount_interval = recount_interval
+        self._backlog: Optional[int] = None
+        self._recount_at = 0.0
+
+    @staticmethod
+    def _local_now() -> datetime:
+        return datetime.utcnow() + timedelta(hours=3)
+
+    def _seconds_left_in_window(self, now: datetime) -> float:
+        """Секунд до конца окна доставки (0 — сейчас тихие часы)."""
+        start = now.replace(
+            hour=self.window_start, minute=0, second=0, microsecond=0
+        )
+        end = now.replace(
+            hour=self.window_end, minute=0, second=0, microsecond=0
+        )
+        if self.window_end <= self.window_start:
+            # Окно через полночь, например 20:00–02:00
+            if now >= start:
+                end += timedelta(days=1)
+            else:
+                start -= timedelta(days=1)
+        if start <= now < end:
+            return (end - now).total_seconds()
+        return 0.0
+
+    async def _estimate_backlog(self) -> int:
+        """Оценка числа ожидающих напоминания пользователей."""
+        now = asyncio.get_running_loop().time()
+        if self._backlog is None or now >= self._recount_at:
+            self._backlog = await ReminderService.count_inactive_users(
+                self.days
+            )
+            self._recount_at = now + self.recount_interval
+        return self._backlog
+
+    async def run(self) -> None:
+        """Основной цикл планировщика."""
+        logger.info(
+            f"Reminder scheduler started: every {self.interval}s, "
+            f"window {self.window_start}:00-{self.window_end}:00"
+        )
+        while True:
+            started = asyncio.get_running_loop().time()
+            try:
+                await self.dispatch_batch()
+            except Exception as e:
+                logger.exception(f"Reminder scheduler error: {e}")
+            elapsed = asyncio.get_running_loop().time() - started
+            await asyncio.sleep(max(0.0, self.interval - elapsed))
+
+    async def dispatch_batch(self) -> dict:
+        """Отправить очередную порцию напоминаний."""
+        results = {'sent': 0, 'failed': 0, 'errors': [], 'sent_ids': []}
+
+        seconds_left = self._seconds_left_in_window(self._local_now())
+        if not seconds_left:
+            return results
+
+        backlog = await self._estimate_backlog()
+        if not backlog:
+            return results
+
+        ticks_left = max(1, math.floor(seconds_left / self.interval))
+        batch_size = min(self.max_per_tick, math.ceil(backlog / ticks_left))
+        # Лишняя строка показывает, остались ли получатели после порции
+        users = await ReminderService.get_inactive_users(
+            self.days, limit=batch_size + 1
+        )
+        if len(users) > batch_size:
+            users = users[:batch_size]
+            backlog = max(backlog, batch_size + 1)
+        else:
+            backlog = len(users)
+        self._backlog = backlog - len(users)
+        spacing = self.interval / max(len(users), 1)
+
+        try:
+            with send_priority(SendPriority.BULK):
+                for user in users:
+                    await ReminderService.send_reminder(
+                        self.bot, user, self.reminder_text, results
+                    )
+                    await asyncio.sleep(spacing)
+        finally:
+            await ReminderService.mark_reminded(results['sent_ids'])
+
+        logger.info(
+            f"Плановые напоминания: {results['sent']}/{len(users)}, "
+            f"в очереди ещё {backlog - len(users)}"
+        )
+        return results
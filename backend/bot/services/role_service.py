@@ -0,0 +1,148 @@
+import asyncio
+from logging import getLogger
+
+import asyncpg
+from sqlalchemy.engine import make_url
+
+from bot.config import ADMINS, RoleSettings
+from data.config import DatabaseSettings
+from data.db import engine, get_session
+from data.models import User
+from data.queries import get_admin_ids
+from utils.metrics import metrics
+
+logger = getLogger(__name__)
+
+# Пауза перед повторным подключением слушателя после ошибки (сек)
+RECONNECT_DELAY = 5
+
+NOTIFY_FUNCTION_SQL = (
+    "CREATE OR REPLACE FUNCTION notify_admin_roles() RETURNS trigger AS $$ "
+    "BEGIN "
+    "IF (TG_OP = 'INSERT' AND NOT NEW.is_admin) "
+    "OR (TG_OP = 'DELETE' AND NOT OLD.is_admin) "
+    "OR (TG_OP = 'UPDATE' "
+    "AND NEW.is_admin IS NOT DISTINCT FROM OLD.is_admin) THEN "
+    "RETURN NULL; "
+    "END IF; "
+    f"PERFORM pg_notify('{RoleSettings.CHANNEL}', ''); "
+    "RETURN NULL; "
+    "END; $$ LANGUAGE plpgsql"
+)
+DROP_TRIGGER_SQL = (
+    f"DROP TRIGGER IF EXISTS {User.__tablename__}_admin_roles "
+    f"ON {User.__tablename__}"
+)
+CREATE_TRIGGER_SQL = (
+    f"CREATE TRIGGER {User.__tablename__}_admin_roles "
+    f"AFTER INSERT OR DELETE OR UPDATE OF is_admin ON {User.__tablename__} "
+    "FOR EACH ROW EXECUTE FUNCTION notify_admin_roles()"
+)
+
+
+class RoleService:
+    """Кеш администраторов бота.
+
+    Администраторы — объединение списка `ADMINS` из окружения и
+    пользователей с `users.is_admin` (их назначают в веб-админке).
+    Множество хранится как frozenset и заменяется целиком, поэтому
+    проверка в фильтрах и обработчиках — одна операция без обращения к БД.
+
+    Триггер на `users` отправляет NOTIFY при изменении `is_admin`, а
+    каждый процесс бота слушает канал на отдельном соединении и
+    перезагружает кеш. Дополнительно кеш перезагружается раз в
+    `REFRESH_INTERVAL` секунд — на случай пропущенных уведомлений или
+    работы через PgBouncer, где LISTEN недоступен.
+    """
+
+    _admins: frozenset[int] = frozenset(ADMINS)
+
+    @classmethod
+    def admins(cls) -> frozenset[int]:
+        """Текущее множество администраторов."""
+        return cls._admins
+
+    @classmethod
+    def is_admin(cls, user_id: int) -> bool:
+        return user_id in cls._admins
+
+    @classmethod
+    async def refresh(cls) -> frozenset[int]:
+        """Перезагрузить администраторов из БД."""
+        async with get_session() as session:
+            admin_ids = await get_admin_ids(session)
+        admins = frozenset(ADMINS).union(admin_ids)
+        if admins != cls._admins:
+            logger.info(
+                f"Admin roles changed: {len(cls._admins)} -> {len(admins)}"
+            )
+        cls._admins = admins
+        metrics.set_gauge("roles.admins", len(admins))
+        return admins
+
+    @staticmethod
+    async def install_trigger() -> None:
+        """Создать (или пересоздать) триггер уведомлений на `users`."""
+        async with engine.begin() as conn:
+            await conn.exec_driver_sql(NOTIFY_FUNCTION_SQL)
+            await conn.exec_driver_sql(DROP_TRIGGER_SQL)
+            await conn.exec_driver_sql(CREATE_TRIGGER_SQL)
+        logger.info("Admin roles trigger installed")
+
+    @classmethod
+    async def setup(cls) -> None:
+        """Триггер и первая загрузка кеша при запуске бота."""
+        if RoleSettings.LISTEN:
+            try:
+                await cls.install_trigger()
+            except Exception as e:
+                logger.error(f"Failed to install admin roles trigger: {e}")
+        await cls.refresh()
+
+    @staticmethod
+    def _listen_enabled() -> bool:
+        # В режиме транзакций PgBouncer не доставляет уведомления
+        return RoleSettings.LISTEN and not DatabaseSettings.PGBOUNCER
+
+    @classmethod
+    async def run_listener(
+        cls, interval: int = RoleSettings.REFRESH_INTERVAL
+    ) -> None:
+        """Фоновое обновление кеша по уведомлениям и по таймеру."""
+        changed = asyncio.Event()
+
+        def on_notify(*args) -> None:
+            changed.set()
+
+        while True:
+            conn = None
+            try:
+                if cls._listen_enabled():
+                    dsn = make_url(DatabaseSettings.URL).set(
+                        drivername="postgresql"
+                    )
+                    conn = await asyncpg.connect(
+                        dsn.render_as_string(hide_password=False)
+                    )
+                    await conn.add_listener(RoleSettings.CHANNEL, on_notify)
+                    conn.add_termination_listener(on_notify)
+                    # Изменения до подписки могли быть пропущены
+                    await cls.refresh()
+
+                while conn is None or not conn.is_closed():
+                    try:
+                        await asyncio.wait_for(changed.wait(), interval)
+                        metrics.inc("roles.notifications")
+                    except asyncio.TimeoutError:
+                        pass
+                    changed.clear()
+                    await cls.refresh()
+                logger.warning("Admin roles listener connection closed")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Admin roles refresh error: {e}")
+                await asyncio.sleep(RECONNECT_DELAY)
+            finally:
+                if conn is not None and not conn.is_closed():
+                    await conn.close()
@@ -0,0 +1,65 @@
+import asyncio
+from logging import getLogger
+
+from bot.config import UnreachableSettings
+from data.db import get_session
+from data.queries import deactivate_users
+
+logger = getLogger(__name__)
+
+
+class UnreachableUserService:
+    """Сбор недоступных получателей и их пакетная деактивация.
+
+    Пользователи, заблокировавшие бота, копятся в памяти во время отправок
+    и периодически помечаются неактивными одним UPDATE.
+    """
+
+    _pending: set[int] = set()
+
+    @classmethod
+    def mark(cls, telegram_id: int) -> None:
+        """Запомнить пользователя, которому не удалось доставить сообщение."""
+        if telegram_id not in cls._pending:
+            cls._pending.add(telegram_id)
+            logger.info(f"User {telegram_id} is unreachable, queued")
+
+    @classmethod
+    def discard(cls, telegram_id: int) -> None:
+        """Убрать пользователя из очереди (например, он снова доступен)."""
+        cls._pending.discard(telegram_id)
+
+    @classmethod
+    def pending_ids(cls) -> frozenset[int]:
+        """Пользователи, ожидающие деактивации."""
+        return frozenset(cls._pending)
+
+    @classmethod
+    async def flush(cls) -> int:
+        """Пометить накопленных пользователей неактивными."""
+        if not cls._pending:
+            return 0
+
+        batch = set(cls._pending)
+        try:
+            async with get_session() as session:
+                updated = await deactivate_users(batch, session)
+                await session.commit()
+        except Exception as e:
+            logger.error(f"Failed to deactivate unreachable users: {e}")
+            return 0
+
+        cls._pending -= batch
+        return updated
+
+    @classmethod
+    async def run_periodic_flush(
+        cls, interval: int = UnreachableSettings.FLUSH_INTERVAL
+    ) -> None:
+        """Фоновая задача периодической деактивации."""
+        try:
+            while True:
+                await asyncio.sleep(interval)
+                await cls.flush()
+        finally:
+            await cls.flush()
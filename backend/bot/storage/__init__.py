@@ -0,0 +1,5 @@
+from .memory import BoundedMemoryStorage
+from .postgres import PostgresStorage
+from .update_marks import UpdateMarkStore
+
+__all__ = ['BoundedMemoryStorage', 'PostgresStorage', 'UpdateMarkStore']
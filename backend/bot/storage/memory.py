@@ -0,0 +1,128 @@
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import BaseStorage, StateType, StorageKey
+
+from utils.metrics import metrics
+
+
+class _Record:
+    """Компактная запись состояния: без `__dict__`, пустые data — None."""
+
+    __slots__ = ('state', 'data', 'touched')
+
+    def __init__(
+        self, state: Optional[str], data: Optional[dict], touched: float
+    ) -> None:
+        self.state = state
+        self.data = data
+        self.touched = touched
+
+
+class BoundedMemoryStorage(BaseStorage):
+    """FSM-хранилище в памяти с ограничением размера.
+
+    В отличие от `MemoryStorage` не создаёт записи при чтении и удаляет
+    пустые, вытесняет давно не использованные записи при превышении
+    `max_size` (LRU) и забывает записи, не тронутые дольше `ttl` секунд.
+    Использованием считается и чтение, и запись.
+    """
+
+    def __init__(self, max_size: int = 100_000, ttl: float = 86400) -> None:
+        self.max_size = max_size
+        self.ttl = ttl
+        self.evictions = 0
+        self.expirations = 0
+        # Порядок — от давно использованных к недавним
+        self._records: OrderedDict[StorageKey, _Record] = OrderedDict()
+
+    @property
+    def size(self) -> int:
+        return len(self._records)
+
+    def stats(self) -> dict[str, int]:
+        """Текущий размер и счётчики вытеснений."""
+        return {
+            'size': self.size,
+            'evictions': self.evictions,
+            'expirations': self.expirations,
+        }
+
+    def _expire(self, now: float) -> None:
+        """Удалить истёкшие записи с начала очереди."""
+        records = self._records
+        while records:
+            key, record = next(iter(records.items()))
+            if now - record.touched <= self.ttl:
+                break
+            del records[key]
+            self.expirations += 1
+            metrics.inc('fsm.expired')
+
+    def _get(self, key: StorageKey) -> Optional[_Record]:
+        """Запись по ключу; чтение, как и запись, продлевает её жизнь."""
+        record = self._records.get(key)
+        if record is None:
+            return None
+        now = time.monotonic()
+        if now - record.touched > self.ttl:
+            del self._records[key]
+            self.expirations += 1
+            metrics.inc('fsm.expired')
+            return None
+        # Очередь остаётся упорядоченной по touched, на этом держится _expire
+        record.touched = now
+        self._records.move_to_end(key)
+        return record
+
+    def _put(
+        self, key: StorageKey, state: Optional[str], data: Optional[dict]
+    ) -> None:
+        if state is None and not data:
+            self._records.pop(key, None)
+            metrics.set_gauge('fsm.size', self.size)
+            return
+
+        now = time.monotonic()
+        record = self._records.get(key)
+        if record is None:
+            self._records[key] = _Record(state, data or None, now)
+        else:
+            record.state = state
+            record.data = data or None
+            record.touched = now
+            self._records.move_to_end(key)
+
+        self._expire(now)
+        while len(self._records) > self.max_size:
+            self._records.popitem(last=False)
+            self.evictions += 1
+            metrics.inc('fsm.evicted')
+        metrics.set_gauge('fsm.size', self.size)
+
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        record = self._get(key)
+        self._put(
+            key,
+            state.state if isinstance(state, State) else state,
+            record.data if record else None,
+        )
+
+    async def get_state(self, key: StorageKey) -> Optional[str]:
+        record = self._get(key)
+        return record.state if record else None
+
+    async def set_data(self, key: StorageKey, data: dict[str, Any]) -> None:
+        record = self._get(key)
+        self._put(key, record.state if record else None, data.copy())
+
+    async def get_data(self, key: StorageKey) -> dict[str, Any]:
+        record = self._get(key)
+        if record is None or record.data is None:
+            return {}
+        return record.data.copy()
+
+    async def close(self) -> None:
+        self._records.clear()
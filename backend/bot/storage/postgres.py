@@ -0,0 +1,202 @@
+import json
+import time
+from collections import OrderedDict
+from logging import getLogger
+from typing import Any, Optional
+
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import BaseStorage, StateType, StorageKey
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+logger = getLogger(__name__)
+
+
+class PostgresStorage(BaseStorage):
+    """FSM-хранилище в PostgreSQL с кешем в памяти процесса.
+
+    Состояния хранятся в UNLOGGED таблице: она не пишет WAL и переживает
+    перезапуск бота, а при аварийном рестарте PostgreSQL просто
+    очищается — для диалоговых состояний это допустимо. Записи без
+    изменений дольше `ttl` секунд считаются истёкшими.
+
+    Запись состояния или данных — один UPSERT, меняющий только свою
+    колонку, без предварительного чтения записи.
+
+    Кеш в памяти по умолчанию выключен: хранилище нужно, когда
+    обновления одного пользователя обрабатывают разные процессы, и
+    кеш одного из них устаревает после записи в другом. Включать его
+    (`cache_ttl` > 0) стоит, только если все обновления пользователя
+    попадают в один процесс. Запись идёт сразу в БД и в кеш
+    (write-through).
+    """
+
+    def __init__(
+        self,
+        engine: AsyncEngine,
+        table: str = 'fsm_storage',
+        ttl: int = 7 * 24 * 3600,
+        cache_ttl: float = 0,
+        cache_size: int = 100_000,
+    ) -> None:
+        self.engine = engine
+        self.table = table
+        self.ttl = ttl
+        self.cache_ttl = cache_ttl
+        self.cache_size = cache_size
+        # key -> (expires_at, state, data), порядок LRU
+        self._cache: OrderedDict[
+            str, tuple[float, Optional[str], dict]
+        ] = OrderedDict()
+        self._set_state_sql = self._upsert_sql(
+            'state', ':state', other_empty="CAST('{}' AS JSONB)"
+        )
+        self._set_data_sql = self._upsert_sql(
+            'data', 'CAST(:data AS JSONB)', other_empty='NULL'
+        )
+
+    @staticmethod
+    def _key(key: StorageKey) -> str:
+        return (
+            f'{key.bot_id}:{key.chat_id}:{key.user_id}:'
+            f'{key.thread_id or ""}:{key.destiny}'
+        )
+
+    def _upsert_sql(self, column: str, value: str, other_empty: str) -> str:
+        """UPSERT одной колонки; вторая сохраняется, если запись не истекла.
+
+        Возвращает запись целиком, чтобы обновить кеш без чтения.
+        """
+        other = 'data' if column == 'state' else 'state'
+        return (
+            f'INSERT INTO {self.table} AS t (key, {column}) '
+            f'VALUES (:key, {value}) '
+            'ON CONFLICT (key) DO UPDATE SET '
+            f'{column} = EXCLUDED.{column}, '
+            f'{other} = CASE WHEN t.updated_at > '
+            'now() - make_interval(secs => :ttl) '
+            f'THEN t.{other} ELSE {other_empty} END, '
+            'updated_at = now() '
+            'RETURNING state, data'
+        )
+
+    @staticmethod
+    def _decode(data: Any) -> dict:
+        return json.loads(data) if isinstance(data, str) else (data or {})
+
+    async def setup(self) -> None:
+        """Создать таблицу хранилища, если её нет."""
+        async with self.engine.begin() as conn:
+            await conn.execute(text(
+                f'CREATE UNLOGGED TABLE IF NOT EXISTS {self.table} ('
+                'key TEXT PRIMARY KEY, '
+                'state TEXT, '
+                "data JSONB NOT NULL DEFAULT '{}', "
+                'updated_at TIMESTAMPTZ NOT NULL DEFAULT now())'
+            ))
+            await conn.execute(text(
+                f'CREATE INDEX IF NOT EXISTS {self.table}_updated_at_idx '
+                f'ON {self.table} (updated_at)'
+            ))
+
+    def _cache_get(self, key: str) -> Optional[tuple[Optional[str], dict]]:
+        cached = self._cache.get(key)
+        if cached is None:
+            return None
+        expires_at, state, data = cached
+        if expires_at < time.monotonic():
+            del self._cache[key]
+            return None
+        return state, data
+
+    def _cache_put(self, key: str, state: Optional[str], data: dict) -> None:
+        if self.cache_ttl <= 0:
+            return
+        if state is None and not data:
+            # Пустые записи не храним, чтобы кеш не рос от каждого гостя
+            self._cache.pop(key, None)
+            return
+        self._cache[key] = (time.monotonic() + self.cache_ttl, state, data)
+        self._cache.move_to_end(key)
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    async def _load(self, key: str) -> tuple[Optional[str], dict]:
+        cached = self._cache_get(key)
+        if cached is not None:
+            return cached
+
+        async with self.engine.connect() as conn:
+            result = await conn.execute(
+                text(
+                    f'SELECT state, data FROM {self.table} WHERE key = :key '
+                    'AND updated_at > now() - make_interval(secs => :ttl)'
+                ),
+                {'key': key, 'ttl': float(self.ttl)},
+            )
+            row = result.first()
+
+        if row is None:
+            state, data = None, {}
+        else:
+            state, data = row.state, self._decode(row.data)
+        self._cache_put(key, state, data)
+        return state, data
+
+    async def _write(self, key: str, sql: str, params: dict) -> None:
+        """Выполнить UPSERT; опустевшую запись удалить в той же транзакции."""
+        async with self.engine.begin() as conn:
+            result = await conn.execute(
+                text(sql), {'key': key, 'ttl': float(self.ttl), **params}
+            )
+            row = result.one()
+            state, data = row.state, self._decode(row.data)
+            if state is None and not data:
+                await conn.execute(
+                    text(
+                        f'DELETE FROM {self.table} WHERE key = :key '
+                        "AND state IS NULL AND data = CAST('{}' AS JSONB)"
+                    ),
+                    {'key': key},
+                )
+        self._cache_put(key, state, data)
+
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        await self._write(
+            self._key(key),
+            self._set_state_sql,
+            {'state': state.state if isinstance(state, State) else state},
+        )
+
+    async def get_state(self, key: StorageKey) -> Optional[str]:
+        state, _ = await self._load(self._key(key))
+        return state
+
+    async def set_data(self, key: StorageKey, data: dict[str, Any]) -> None:
+        await self._write(
+            self._key(key), self._set_data_sql, {'data': json.dumps(data)}
+        )
+
+    async def get_data(self, key: StorageKey) -> dict[str, Any]:
+        _, data = await self._load(self._key(key))
+        return data.copy()
+
+    async def purge_expired(self) -> int:
+        """Удалить истёкшие записи из таблицы и кеша."""
+        async with self.engine.begin() as conn:
+            result = await conn.execute(
+                text(
+                    f'DELETE FROM {self.table} '
+                    'WHERE updated_at < now() - make_interval(secs => :ttl)'
+                ),
+                {'ttl': float(self.ttl)},
+            )
+        now = time.monotonic()
+        for key in [k for k, v in self._cache.items() if v[0] < now]:
+            del self._cache[key]
+        if result.rowcount:
+            logger.info(f'Purged {result.rowcount} expired FSM records')
+        return result.rowcount
+
+    async def close(self) -> None:
+        self._cache.clear()
@@ -0,0 +1,73 @@
+from logging import getLogger
+from typing import NamedTuple, Optional
+
+from sqlalchemy import BigInteger, bindparam, text
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+logger = getLogger(__name__)
+
+
+class UpdateMarks(NamedTuple):
+    """Сохранённое состояние дедупликации обновлений."""
+
+    high_water: int
+    floor: Optional[int]
+    recent: list[int]
+
+
+class UpdateMarkStore:
+    """Хранение последних update_id в PostgreSQL.
+
+    Одна строка на область (`scope`) — процесс, принимающий обновления
+    (имя экземпляра, у процессов-обработчиков ещё и номер):
+    наибольший принятый update_id, граница вытесненных из буфера и сами
+    недавние id. Пишется периодически, а не на каждое обновление.
+    """
+
+    def __init__(self, engine: AsyncEngine, table: str = 'update_marks'):
+        self.engine = engine
+        self.table = table
+
+    async def setup(self) -> None:
+        """Создать таблицу, если её нет."""
+        async with self.engine.begin() as conn:
+            await conn.execute(text(
+                f'CREATE TABLE IF NOT EXISTS {self.table} ('
+                'scope TEXT PRIMARY KEY, '
+                'high_water BIGINT NOT NULL, '
+                'floor BIGINT, '
+                "recent BIGINT[] NOT NULL DEFAULT '{}', "
+                'updated_at TIMESTAMPTZ NOT NULL DEFAULT now())'
+            ))
+
+    async def load(self, scope: str) -> Optional[UpdateMarks]:
+        async with self.engine.connect() as conn:
+            result = await conn.execute(
+                text(
+                    f'SELECT high_water, floor, recent FROM {self.table} '
+                    'WHERE scope = :scope'
+                ),
+                {'scope': scope},
+            )
+            row = result.first()
+        if row is None:
+            return None
+        return UpdateMarks(row.high_water, row.floor, list(row.recent))
+
+    async def save(self, scope: str, marks: UpdateMarks) -> None:
+        query = text(
+            f'INSERT INTO {self.table} '
+            '(scope, high_water, floor, recent, updated_at) '
+            'VALUES (:scope, :high_water, :floor, :recent, now()) '
+            'ON CONFLICT (scope) DO UPDATE SET '
+            'high_water = excluded.high_water, floor = excluded.floor, '
+            'recent = excluded.recent, updated_at = excluded.updated_at'
+        ).bindparams(bindparam('recent', type_=ARRAY(BigInteger)))
+        async with self.engine.begin() as conn:
+            await conn.execute(query, {
+                'scope': scope,
+                'high_water': marks.high_water,
+                'floor': marks.floor,
+                'recent': marks.recent,
+            })
@@ -0,0 +1,229 @@
+import asyncio
+import multiprocessing
+import queue
+import signal
+from logging import getLogger
+from typing import Any, Callable, Optional
+
+import aiohttp
+from aiogram import Bot, Dispatcher
+from aiohttp import web
+
+from bot.config import BotSettings
+from utils.metrics import metrics
+
+logger = getLogger(__name__)
+
+# Интервал проверки, что процессы-обработчики живы (сек)
+MONITOR_INTERVAL = 5
+# Максимальная пауза между повторами getUpdates после ошибки (сек)
+MAX_BACKOFF = 30
+
+
+def update_route_key(raw: dict[str, Any]) -> int:
+    """Ключ распределения обновления: id пользователя или чата.
+
+    Обновления без автора (например, опросы) распределяются по update_id.
+    """
+    for key, value in raw.items():
+        if key == "update_id" or not isinstance(value, dict):
+            continue
+        user = value.get("from") or value.get("user")
+        if user:
+            return user["id"]
+        chat = value.get("chat")
+        if chat:
+            return chat["id"]
+    return raw.get("update_id", 0)
+
+
+class WorkerPool:
+    """Процессы-обработчики обновлений и маршрутизация по ним.
+
+    Принимающий процесс (polling или webhook) не разбирает обновления, а
+    передаёт исходный JSON в процесс `user_id % workers` через
+    `multiprocessing.Queue`. Все обновления одного пользователя попадают в
+    один процесс и обрабатываются в порядке поступления, а разбор,
+    обработчики и работа с БД распределяются по ядрам.
+    """
+
+    def __init__(
+        self,
+        target: Callable[[int, Any], None],
+        workers: int = BotSettings.WORKERS,
+        queue_size: int = BotSettings.WORKER_QUEUE_SIZE,
+    ) -> None:
+        self.target = target
+        self.workers = workers
+        self._context = multiprocessing.get_context("spawn")
+        self._queues = [
+            self._context.Queue(maxsize=queue_size) for _ in range(workers)
+        ]
+        self._locks = [asyncio.Lock() for _ in range(workers)]
+        self._processes: list[Optional[multiprocessing.Process]] = (
+            [None] * workers
+        )
+        self._monitor: Optional[asyncio.Task] = None
+
+    def _spawn(self, index: int) -> None:
+        process = self._context.Process(
+            target=self.target,
+            args=(index, self._queues[index]),
+            name=f"bot-worker-{index}",
+            daemon=True,
+        )
+        process.start()
+        self._processes[index] = process
+        logger.info(f"Worker {index} started (pid {process.pid})")
+
+    def start(self) -> None:
+        """Запустить процессы-обработчики."""
+        for index in range(self.workers):
+            self._spawn(index)
+        self._monitor = asyncio.create_task(self._watch())
+
+    async def _watch(self) -> None:
+        """Перезапуск упавших процессов."""
+        while True:
+            await asyncio.sleep(MONITOR_INTERVAL)
+            alive = 0
+            for index, process in enumerate(self._processes):
+                if process is not None and process.is_alive():
+                    alive += 1
+                    continue
+                logger.error(
+                    f"Worker {index} exited with code "
+                    f"{process.exitcode if process else None}, restarting"
+                )
+                metrics.inc("workers.restarts")
+                self._spawn(index)
+            metrics.set_gauge("workers.alive", alive)
+
+    async def stop(self, timeout: float = 30) -> None:
+        """Дождаться обработки очередей и завершить процессы."""
+        if self._monitor is not None:
+            self._monitor.cancel()
+            self._monitor = None
+
+        loop = asyncio.get_running_loop()
+        for index, worker_queue in enumerate(self._queues):
+            async with self._locks[index]:
+                await loop.run_in_executor(None, worker_queue.put, None)
+
+        for index, process in enumerate(self._processes):
+            if process is None:
+                continue
+            await loop.run_in_executor(None, process.join, timeout)
+            if process.is_alive():
+                logger.warning(f"Worker {index} did not stop, terminating")
+                process.terminate()
+        logger.info("Workers stopped")
+
+    async def route(self, raw: dict[str, Any]) -> None:
+        """Передать обновление процессу, отвечающему за пользователя."""
+        index = update_route_key(raw) % self.workers
+        worker_queue = self._queues[index]
+        # Блокировка сохраняет порядок, если очередь процесса заполнена
+        async with self._locks[index]:
+            try:
+                worker_queue.put_nowait(raw)
+            except queue.Full:
+                metrics.inc("workers.queue_full")
+                await asyncio.get_running_loop().run_in_executor(
+                    None, worker_queue.put, raw
+                )
+        metrics.inc("workers.routed")
+
+    async def handle_webhook(self, request: web.Request) -> web.Response:
+        """Приём webhook без разбора обновления."""
+        secret = BotSettings.WEBHOOK_SECRET
+        if secret and (
+            request.headers.get("X-Telegram-Bot-Api-Secret-Token") != secret
+        ):
+            return web.Response(status=401)
+        await self.route(await request.json())
+        return web.Response()
+
+    async def poll(
+        self,
+        bot: Bot,
+        allowed_updates: list[str],
+        polling_timeout: int = BotSettings.POLLING_TIMEOUT,
+    ) -> None:
+        """Long polling с передачей обновлений в исходном виде."""
+        session = await bot.session.create_session()
+        url = bot.session.api.api_url(token=bot.token, method="getUpdates")
+        timeout = aiohttp.ClientTimeout(
+            total=bot.session.timeout + polling_timeout
+        )
+        payload: dict[str, Any] = {
+            "timeout": polling_timeout,
+            "allowed_updates": allowed_updates,
+        }
+        backoff = 1.0
+
+        while True:
+            try:
+                async with session.post(
+                    url, json=payload, timeout=timeout
+                ) as response:
+                    data = bot.session.json_loads(await response.text())
+            except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+                logger.error(f"Failed to fetch updates: {e!r}")
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, MAX_BACKOFF)
+                continue
+
+            if not data.get("ok"):
+                retry_after = data.get("parameters", {}).get("retry_after")
+                logger.error(f"getUpdates error: {data.get('description')}")
+                await asyncio.sleep(retry_after or backoff)
+                backoff = min(backoff * 2, MAX_BACKOFF)
+                continue
+
+            backoff = 1.0
+            for raw in data["result"]:
+                await self.route(raw)
+                payload["offset"] = raw["update_id"] + 1
+
+
+async def consume_updates(
+    worker_queue: Any,
+    bot: Bot,
+    dp: Dispatcher,
+    max_pending: int = BotSettings.WORKER_MAX_PENDING,
+) -> None:
+    """Обработка обновлений из очереди процесса до сигнала остановки.
+
+    Порядок обработки по пользователям обеспечивает `UpdateLaneMiddleware`,
+    `max_pending` ограничивает число принятых, но ещё не обработанных
+    обновлений.
+    """
+    # Остановкой управляет принимающий процесс
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+
+    loop = asyncio.get_running_loop()
+    slots = asyncio.Semaphore(max_pending)
+    pending: set[asyncio.Task] = set()
+
+    async def process(raw: dict[str, Any]) -> None:
+        try:
+            await dp.feed_raw_update(bot, raw)
+        except Exception as e:
+            logger.exception(f"Update {raw.get('update_id')} failed: {e}")
+        finally:
+            slots.release()
+
+    while True:
+        await slots.acquire()
+        raw = await loop.run_in_executor(None, worker_queue.get)
+        if raw is None:
+            slots.release()
+            break
+        task = asyncio.create_task(process(raw))
+        pending.add(task)
+        task.add_done_callback(pending.discard)
+
+    if pending:
+        await asyncio.gather(*pending, return_exceptions=True)
@@ -0,0 +1,48 @@
+from decouple import config
+
+
+class DatabaseSettings:
+    """Подключение к PostgreSQL и пул соединений."""
+
+    URL: str = config('POSTGRES_CONN_STRING')
+
+    # Пул соединений процесса
+    POOL_SIZE: int = config('DB_POOL_SIZE', default=10, cast=int)
+    MAX_OVERFLOW: int = config('DB_MAX_OVERFLOW', default=20, cast=int)
+    # Сколько ждать свободное соединение (сек)
+    POOL_TIMEOUT: float = config('DB_POOL_TIMEOUT', default=30, cast=float)
+    # Пересоздавать соединения старше N секунд, -1 — никогда
+    POOL_RECYCLE: int = config('DB_POOL_RECYCLE', default=1800, cast=int)
+    # Проверять соединение перед выдачей из пула
+    POOL_PRE_PING: bool = config('DB_POOL_PRE_PING', default=False, cast=bool)
+
+    # Кеш подготовленных выражений asyncpg и диалекта SQLAlchemy
+    STATEMENT_CACHE_SIZE: int = config(
+        'DB_STATEMENT_CACHE_SIZE', default=100, cast=int
+    )
+    PREPARED_STATEMENT_CACHE_SIZE: int = config(
+        'DB_PREPARED_STATEMENT_CACHE_SIZE', default=100, cast=int
+    )
+
+    # Подключение через PgBouncer в режиме transaction pooling:
+    # кеши подготовленных выражений отключаются, имена уникальны
+    PGBOUNCER: bool = config('DB_PGBOUNCER', default=False, cast=bool)
+
+    # Частые запросы на чтение через asyncpg без ORM (data.fast_queries)
+    FAST_PATH: bool = config('DB_FAST_PATH', default=False, cast=bool)
+
+    # Сколько соединений пула открыть и прогреть при старте, 0 — без прогрева
+    WARMUP_CONNECTIONS: int = config(
+        'DB_WARMUP_CONNECTIONS', default=5, cast=int
+    )
+
+    # Реплика для чтения (аналитика, списки админки); пусто — без реплики
+    REPLICA_URL: str = config('POSTGRES_REPLICA_CONN_STRING', default='')
+    # Пауза перед повторным обращением к недоступной реплике (сек)
+    REPLICA_RETRY_INTERVAL: float = config(
+        'DB_REPLICA_RETRY_INTERVAL', default=30, cast=float
+    )
+    # Сколько секунд после правки в админке читать с основной БД
+    REPLICA_STICKY_SECONDS: float = config(
+        'DB_REPLICA_STICKY_SECONDS', default=10, cast=float
+    )
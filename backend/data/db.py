@@ -1,8 +1,16 @@
 import json
+import time
 from collections.abc import AsyncGenerator
+from logging import getLogger
+from typing import Any, Optional
+from uuid import uuid4
 
-from decouple import config
+from sqlalchemy import event, text
+from sqlalchemy.engine.interfaces import CacheStats
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
 from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
     AsyncSession,
     async_sessionmaker,
     create_async_engine,
@@ -10,28 +18,225 @@ from sqlalchemy.ext.asyncio import (
 from sqlmodel import SQLModel, select
 from contextlib import asynccontextmanager
 
+from utils.metrics import metrics
+
+from .config import DatabaseSettings
 from .model_mapping import MODEL_MAP
 from .constants import FIXTURE_PATH
+from .pool import InstrumentedAsyncPool, InstrumentedReplicaPool, track_pool
+
+logger = getLogger(__name__)
 
+# SQLSTATE запроса, прерванного по statement_timeout
+QUERY_CANCELED = '57014'
 
 # Конфигурация базы данных
-postgres_url = config('POSTGRES_CONN_STRING')
+postgres_url = DatabaseSettings.URL
+
+
+def engine_options(
+    poolclass: type = InstrumentedAsyncPool,
+) -> dict[str, Any]:
+    """Параметры пула и драйвера из `DatabaseSettings`."""
+    connect_args: dict[str, Any] = {
+        'statement_cache_size': DatabaseSettings.STATEMENT_CACHE_SIZE,
+        'prepared_statement_cache_size': (
+            DatabaseSettings.PREPARED_STATEMENT_CACHE_SIZE
+        ),
+    }
+    if DatabaseSettings.PGBOUNCER:
+        # Подготовленные выражения не переживают смену серверного
+        # соединения в PgBouncer: не кешируем их и не повторяем имена
+        connect_args.update(
+            statement_cache_size=0,
+            prepared_statement_cache_size=0,
+            prepared_statement_name_func=lambda: f'__asyncpg_{uuid4()}__',
+        )
+
+    return {
+        'poolclass': poolclass,
+        'pool_size': DatabaseSettings.POOL_SIZE,
+        'max_overflow': DatabaseSettings.MAX_OVERFLOW,
+        'pool_timeout': DatabaseSettings.POOL_TIMEOUT,
+        'pool_recycle': DatabaseSettings.POOL_RECYCLE,
+        'pool_pre_ping': DatabaseSettings.POOL_PRE_PING,
+        'connect_args': connect_args,
+    }
+
+
+def track_compiled_cache(db_engine: AsyncEngine, prefix: str) -> None:
+    """Метрики кеша компиляции SQLAlchemy: `<prefix>.compiled_cache.*`.
+
+    Промах означает, что запрос компилировался заново — например,
+    выражение каждый раз собирается с разной структурой.
+    """
+    counts = {CacheStats.CACHE_HIT: 0, CacheStats.CACHE_MISS: 0}
+
+    @event.listens_for(db_engine.sync_engine, 'before_cursor_execute')
+    def _track(conn, cursor, statement, parameters, context, executemany):
+        cache_hit = getattr(context, 'cache_hit', None)
+        if cache_hit not in counts:
+            return
+        counts[cache_hit] += 1
+        name = 'hit' if cache_hit is CacheStats.CACHE_HIT else 'miss'
+        metrics.inc(f'{prefix}.compiled_cache.{name}')
+        metrics.set_gauge(
+            f'{prefix}.compiled_cache.hit_rate',
+            counts[CacheStats.CACHE_HIT] / sum(counts.values()),
+        )
+
+
+def track_statement_timeouts(db_engine: AsyncEngine, prefix: str) -> None:
+    """Счётчик `<prefix>.statement_timeouts`: прерванные по лимиту запросы."""
+
+    @event.listens_for(db_engine.sync_engine, 'handle_error')
+    def _track(context):
+        sqlstate = getattr(context.original_exception, 'sqlstate', None)
+        if sqlstate == QUERY_CANCELED:
+            metrics.inc(f'{prefix}.statement_timeouts')
+
+
+@event.listens_for(Session, 'after_begin')
+def _apply_statement_timeout(session, transaction, connection):
+    # Лимит из set_statement_timeout действует в каждой транзакции сессии
+    timeout = session.info.get('statement_timeout')
+    if timeout:
+        connection.exec_driver_sql(
+            f'SET LOCAL statement_timeout = {int(timeout)}'
+        )
+
+
+@event.listens_for(Session, 'after_commit')
+def _mark_committed(session):
+    session.info['committed'] = True
+
+
+def session_committed(session: AsyncSession) -> bool:
+    """Сессия хотя бы раз зафиксировала транзакцию."""
+    return session.info.get('committed', False)
+
+
+async def set_statement_timeout(
+    session: AsyncSession, timeout_ms: Optional[int]
+) -> None:
+    """Ограничить время запросов сессии (мс); None — лимит по умолчанию.
+
+    Лимит ставится через `SET LOCAL` в начале каждой транзакции сессии,
+    поэтому соединение из пула берётся только при первом запросе и
+    лимит не переходит к другим сессиям через пул.
+    """
+    session.info['statement_timeout'] = timeout_ms
+    if session.in_transaction():
+        # Значение из настроек сервера или роли; 0 снял бы лимит совсем
+        value = 'DEFAULT' if timeout_ms is None else int(timeout_ms)
+        await session.execute(text(f'SET LOCAL statement_timeout = {value}'))
+
 
 # Создание движка и сессии
-engine = create_async_engine(postgres_url, echo=False)
+engine = create_async_engine(postgres_url, echo=False, **engine_options())
+track_compiled_cache(engine, 'db')
+track_statement_timeouts(engine, 'db')
+track_pool(engine, InstrumentedAsyncPool.metrics_prefix)
 async_session = async_sessionmaker(engine, expire_on_commit=False)
 
+# Необязательная реплика для тяжёлых запросов на чтение
+replica_engine = create_async_engine(
+    DatabaseSettings.REPLICA_URL,
+    echo=False,
+    **engine_options(InstrumentedReplicaPool),
+) if DatabaseSettings.REPLICA_URL else None
+if replica_engine is not None:
+    track_compiled_cache(replica_engine, 'db.replica')
+    track_statement_timeouts(replica_engine, 'db.replica')
+    track_pool(replica_engine, InstrumentedReplicaPool.metrics_prefix)
+replica_session: Optional[async_sessionmaker] = async_sessionmaker(
+    replica_engine, expire_on_commit=False
+) if replica_engine else None
+
+# До какого момента (time.monotonic) реплика считается недоступной
+_replica_down_until = 0.0
+
+
+def replica_available() -> bool:
+    """Реплика настроена и не помечена недоступной."""
+    return (
+        replica_session is not None
+        and time.monotonic() >= _replica_down_until
+    )
+
 
 @asynccontextmanager
-async def get_session() -> AsyncGenerator[AsyncSession, None]:
+async def get_session(
+    readonly: bool = False,
+) -> AsyncGenerator[AsyncSession, None]:
+    """Сессия основной БД или, при `readonly=True`, реплики.
+
+    Если реплика не настроена или к ней не удаётся подключиться,
+    читаем с основной БД; недоступная реплика не используется
+    `REPLICA_RETRY_INTERVAL` секунд.
+    """
+    global _replica_down_until
+
+    if readonly and replica_available():
+        async with replica_session() as session:
+            try:
+                await session.connection()
+            except (OSError, SQLAlchemyError) as e:
+                _replica_down_until = (
+                    time.monotonic() + DatabaseSettings.REPLICA_RETRY_INTERVAL
+                )
+                metrics.inc('db.replica.fallbacks')
+                logger.warning(f'Replica unavailable, using primary: {e}')
+            else:
+                yield session
+                return
+
     async with async_session() as session:
         yield session
 
 
+# Изменения схемы для уже развёрнутых баз: create_all создаёт только
+# отсутствующие таблицы и не добавляет колонки в существующие
+SCHEMA_UPGRADES = (
+    'ALTER TABLE users '
+    'ADD COLUMN IF NOT EXISTS last_reminded_at TIMESTAMP WITH TIME ZONE',
+    'ALTER TABLE questions '
+    'ADD COLUMN IF NOT EXISTS assigned_admin_id BIGINT, '
+    'ADD COLUMN IF NOT EXISTS assigned_at TIMESTAMP WITH TIME ZONE',
+    'CREATE INDEX IF NOT EXISTS ix_questions_assigned_admin_id '
+    'ON questions (assigned_admin_id)',
+    'ALTER TABLE interaction_events ADD COLUMN IF NOT EXISTS '
+    'sample_weight DOUBLE PRECISION NOT NULL DEFAULT 1',
+    # Колонка добавляется один раз и заполняется по истории событий
+    """
+    DO $$
+    BEGIN
+        IF NOT EXISTS (
+            SELECT 1 FROM information_schema.columns
+            WHERE table_schema = current_schema()
+                AND table_name = 'users'
+                AND column_name = 'last_activity_at'
+        ) THEN
+            ALTER TABLE users
+                ADD COLUMN last_activity_at TIMESTAMP WITH TIME ZONE;
+            UPDATE users SET last_activity_at = events.last_activity
+            FROM (
+                SELECT user_id, max(created_at) AS last_activity
+                FROM interaction_events GROUP BY user_id
+            ) AS events
+            WHERE users.telegram_id = events.user_id;
+        END IF;
+    END $$
+    """,
+)
+
+
 async def create_db_and_tables():
     '''Создание таблиц в базе данных.'''
     async with engine.begin() as conn:
         await conn.run_sync(SQLModel.metadata.create_all)
+        for statement in SCHEMA_UPGRADES:
+            await conn.exec_driver_sql(statement)
 
 
 async def load_fixtures(file_name):
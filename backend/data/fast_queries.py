@@ -0,0 +1,106 @@
+from typing import NamedTuple, Optional
+
+from asyncpg import Connection
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+
+# Быстрые запросы на чтение напрямую через asyncpg.
+#
+# Используются вместо ORM-версий из `data.queries` при
+# `DB_FAST_PATH=True` для запросов, выполняемых почти на каждое нажатие.
+# Запросы идут через соединение сессии (и её транзакцию, если она уже
+# начата), поэтому берутся из того же пула; исключение — запись
+# `increment_views`, у которой своя короткая транзакция. asyncpg кеширует
+# подготовленные выражения на соединении (`DB_STATEMENT_CACHE_SIZE`),
+# а результат — лёгкие NamedTuple без гидрации моделей SQLModel.
+
+
+class ContentRecord(NamedTuple):
+    """Поля `Content`, нужные для показа контента пользователю."""
+
+    id: int
+    title: str
+    description: Optional[str]
+    url_link: Optional[str]
+    image_url: Optional[str]
+    file_id: Optional[str]
+    category_id: int
+    views_count: int
+
+
+class ButtonRecord(NamedTuple):
+    """Кнопка контента в меню категории."""
+
+    id: int
+    title: str
+
+
+class UserRecord(NamedTuple):
+    telegram_id: int
+    username: Optional[str]
+
+
+CONTENT_BY_ID_SQL = (
+    "SELECT id, title, description, url_link, image_url, file_id, "
+    "category_id, views_count FROM contents WHERE id = $1"
+)
+CATEGORY_BUTTONS_SQL = (
+    "SELECT id, title FROM contents "
+    "WHERE category_id = $1 AND is_active "
+    "ORDER BY views_count DESC"
+)
+INCREMENT_VIEWS_SQL = (
+    "UPDATE contents SET views_count = views_count + 1 "
+    "WHERE id = $1 RETURNING views_count"
+)
+USER_BY_ID_SQL = (
+    "SELECT telegram_id, username FROM users WHERE telegram_id = $1"
+)
+
+
+async def driver_connection(session: AsyncSession) -> Connection:
+    """Соединение asyncpg, на котором работает сессия."""
+    connection = await session.connection()
+    raw = await connection.get_raw_connection()
+    return raw.driver_connection
+
+
+async def get_content(
+    session: AsyncSession, content_id: int
+) -> Optional[ContentRecord]:
+    """Контент по ID."""
+    conn = await driver_connection(session)
+    row = await conn.fetchrow(CONTENT_BY_ID_SQL, content_id)
+    return ContentRecord(*row) if row else None
+
+
+async def get_category_buttons(
+    session: AsyncSession, category_id: int
+) -> list[ButtonRecord]:
+    """Активные кнопки категории, популярные сверху."""
+    conn = await driver_connection(session)
+    rows = await conn.fetch(CATEGORY_BUTTONS_SQL, category_id)
+    return [ButtonRecord(*row) for row in rows]
+
+
+async def increment_views(db_engine: AsyncEngine, content_id: int) -> int:
+    """Атомарно увеличить счётчик просмотров и вернуть новое значение.
+
+    UPDATE выполняется в отдельной транзакции на своём соединении и
+    фиксируется сразу, поэтому блокировка строки не держится до конца
+    обработки обновления. Сессию обработчика перед вызовом стоит
+    зафиксировать, чтобы не занимать два соединения пула сразу.
+    """
+    async with db_engine.connect() as connection:
+        raw = await connection.get_raw_connection()
+        conn = raw.driver_connection
+        async with conn.transaction():
+            return await conn.fetchval(INCREMENT_VIEWS_SQL, content_id) or 0
+
+
+async def get_user(
+    session: AsyncSession, telegram_id: int
+) -> Optional[UserRecord]:
+    """Пользователь по telegram_id (проверка существования)."""
+    conn = await driver_connection(session)
+    row = await conn.fetchrow(USER_BY_ID_SQL, telegram_id)
+    return UserRecord(*row) if row else None
@@ -2,7 +2,7 @@ from datetime import datetime, timedelta
 from typing import Optional
 
 from aiogram.enums import UpdateType
-from sqlalchemy import BigInteger, Column, DateTime, Integer, String, Text, ForeignKey
+from sqlalchemy import BigInteger, Column, DateTime, Float, Integer, String, Text, ForeignKey
 from sqlmodel import Field, Relationship, SQLModel
 
 from enums.fields import InitValue, Length, ViewLimits
@@ -77,6 +77,16 @@ class User(SQLModel, table=True):
         default_factory=lambda: datetime.utcnow() + timedelta(hours=3),
         sa_type=DateTime(timezone=True),
     )
+    last_reminded_at: Optional[datetime] = Field(
+        default=None,
+        sa_type=DateTime(timezone=True),
+    )
+    # Последнее обращение к боту; обновляется на каждое обновление, в
+    # отличие от выборочно записываемых InteractionEvent
+    last_activity_at: Optional[datetime] = Field(
+        default=None,
+        sa_type=DateTime(timezone=True),
+    )
 
     questions: list['Question'] = Relationship(back_populates='user')
     ratings: list['Rating'] = Relationship(back_populates='user')
@@ -100,6 +110,16 @@ class Question(BaseIDMixin, BaseCreatedAtFieldMixin, table=True):
     )
     user: User = Relationship(back_populates='questions')
 
+    # Админ, которому назначен вопрос (при адресной рассылке)
+    assigned_admin_id: Optional[int] = Field(
+        default=None,
+        sa_column=Column(BigInteger, nullable=True, index=True),
+    )
+    assigned_at: Optional[datetime] = Field(
+        default=None,
+        sa_type=DateTime(timezone=True),
+    )
+
     def __str__(self) -> str:
         return (
             f'Question #{self.id}: '
@@ -121,6 +141,11 @@ class InteractionEvent(
     user_id: int = Field(sa_column=Column(BigInteger, nullable=False))
     message_text: Optional[str]
     callback_data: Optional[str]
+    # Сколько событий представляет строка при выборочной записи (1 / доля)
+    sample_weight: float = Field(
+        default=1.0,
+        sa_column=Column(Float, nullable=False, server_default='1'),
+    )
 
     def __str__(self) -> str:
         return f"Event #{self.id}: {self.event_type}"
@@ -0,0 +1,74 @@
+import time
+from typing import Any
+
+from sqlalchemy import event, exc
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, PoolProxiedConnection
+
+from utils.metrics import metrics
+
+
+class InstrumentedAsyncPool(AsyncAdaptedQueuePool):
+    """Пул соединений, публикующий время ожидания и таймауты выдачи.
+
+    Метрики `<metrics_prefix>.checkout` и `.timeouts`; занятость пула
+    публикует `track_pool`.
+    """
+
+    metrics_prefix = 'db.pool'
+
+    def connect(self) -> PoolProxiedConnection:
+        started = time.monotonic()
+        try:
+            return super().connect()
+        except exc.TimeoutError:
+            metrics.inc(f'{self.metrics_prefix}.timeouts')
+            raise
+        finally:
+            metrics.observe(
+                f'{self.metrics_prefix}.checkout', time.monotonic() - started
+            )
+
+
+class InstrumentedReplicaPool(InstrumentedAsyncPool):
+    """Пул соединений реплики с метриками `db.replica_pool.*`."""
+
+    metrics_prefix = 'db.replica_pool'
+
+
+def track_pool(db_engine: AsyncEngine, prefix: str) -> None:
+    """Метрики занятости пула по его событиям: `<prefix>.*`.
+
+    `checked_out` и `overflow` — текущие выданные соединения и
+    соединения сверх `pool_size`, `overflow_opened` — сколько раз
+    открывалось соединение сверх `pool_size`. Пул берётся у движка в
+    момент события: после `dispose()` движок пересоздаёт пул, а
+    обработчики переходят к новому.
+    """
+    sync_engine = db_engine.sync_engine
+
+    def publish(checked_out: int, overflow: int) -> None:
+        metrics.set_gauge(f'{prefix}.checked_out', checked_out)
+        metrics.set_gauge(f'{prefix}.overflow', max(overflow, 0))
+
+    @event.listens_for(sync_engine, 'connect')
+    def _connect(dbapi_connection: Any, record: Any) -> None:
+        # Счётчик overflow отрицателен, пока пул не заполнен до
+        # pool_size; новое соединение сверх него уже учтено
+        if sync_engine.pool.overflow() > 0:
+            metrics.inc(f'{prefix}.overflow_opened')
+
+    @event.listens_for(sync_engine, 'checkout')
+    def _checkout(dbapi_connection: Any, record: Any, proxy: Any) -> None:
+        pool = sync_engine.pool
+        publish(pool.checkedout(), pool.overflow())
+
+    @event.listens_for(sync_engine, 'checkin')
+    def _checkin(dbapi_connection: Any, record: Any) -> None:
+        # Событие приходит до возврата соединения: оно ещё числится
+        # выданным, а если очередь пула полна, будет закрыто как лишнее
+        pool = sync_engine.pool
+        overflow = pool.overflow()
+        if pool.checkedin() >= pool.size():
+            overflow -= 1
+        publish(pool.checkedout() - 1, overflow)
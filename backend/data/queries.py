@@ -1,7 +1,10 @@
+from datetime import datetime, timedelta
 from logging import getLogger
-from typing import Optional
+from typing import Iterable, Optional
 
 from aiogram.types import User as TG_User
+from sqlalchemy import BigInteger, DateTime, any_, bindparam, text, update
+from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 
@@ -9,13 +12,39 @@ from data.models import Category, Content, User
 
 logger = getLogger(__name__)
 
+# Горячие запросы собираются один раз при импорте. Значения передаются
+# через bindparam, поэтому SQLAlchemy не строит выражение заново и берёт
+# ключ кеша компиляции, запомненный в самом объекте запроса.
+CATEGORY_BY_ID = select(Category).where(
+    Category.id == bindparam("category_id")
+)
+BUTTON_BY_ID = select(Content).where(Content.id == bindparam("button_id"))
+ALL_CATEGORIES = select(Category)
+ADMIN_IDS = select(User.telegram_id).where(User.is_admin)
+ACTIVE_CATEGORIES = select(Category).where(Category.is_active)
+ACTIVE_CATEGORY_BUTTONS = (
+    select(Content)
+    .where(Content.category_id == bindparam("category_id"), Content.is_active)
+    .order_by(Content.views_count.desc())
+)
+MARK_USERS_ACTIVE = text(
+    "UPDATE users SET last_activity_at = activity.active_at "
+    "FROM unnest(:ids, :active_at) AS activity (user_id, active_at) "
+    "WHERE users.telegram_id = activity.user_id "
+    "RETURNING users.telegram_id"
+).bindparams(
+    bindparam("ids", type_=ARRAY(BigInteger)),
+    bindparam("active_at", type_=ARRAY(DateTime(timezone=True))),
+)
+
 
 async def get_category_by_id(
     category_id: int, session: AsyncSession
 ) -> Optional[Category]:
     """Получить категорию по ID."""
-    query = select(Category).where(Category.id == category_id)
-    result = await session.execute(query)
+    result = await session.execute(
+        CATEGORY_BY_ID, {"category_id": category_id}
+    )
     category = result.scalar_one_or_none()
 
     if not category:
@@ -26,8 +55,7 @@ async def get_category_by_id(
 
 async def get_button_by_id(button_id: int, session: AsyncSession) -> Optional[Content]:
     """Получить контент (кнопку) по ID."""
-    query = select(Content).where(Content.id == button_id)
-    result = await session.execute(query)
+    result = await session.execute(BUTTON_BY_ID, {"button_id": button_id})
     button = result.scalar_one_or_none()
 
     if not button:
@@ -82,3 +110,76 @@ async def set_user_active(telegram_id: int, session: AsyncSession) -> None:
     if user:
         user.is_active = True
         logger.info(f"User {telegram_id} set to active")
+
+
+async def deactivate_users(
+    telegram_ids: Iterable[int], session: AsyncSession
+) -> int:
+    """Пакетно пометить пользователей неактивными одним UPDATE.
+
+    Returns:
+        Количество обновлённых строк.
+    """
+    ids = list(telegram_ids)
+    if not ids:
+        return 0
+
+    query = (
+        update(User)
+        .where(
+            User.telegram_id == any_(
+                bindparam("ids", ids, type_=ARRAY(BigInteger))
+            ),
+            User.is_active,
+        )
+        .values(is_active=False)
+        .execution_options(synchronize_session=False)
+    )
+    result = await session.execute(query)
+    logger.info(f"Users set to inactive: {result.rowcount} of {len(ids)}")
+    return result.rowcount
+
+
+async def mark_users_reminded(
+    telegram_ids: Iterable[int], session: AsyncSession
+) -> None:
+    """Пакетно сохранить время отправки напоминания пользователям."""
+    ids = list(telegram_ids)
+    if not ids:
+        return
+
+    query = (
+        update(User)
+        .where(
+            User.telegram_id == any_(
+                bindparam("ids", ids, type_=ARRAY(BigInteger))
+            )
+        )
+        .values(last_reminded_at=datetime.utcnow() + timedelta(hours=3))
+        .execution_options(synchronize_session=False)
+    )
+    await session.execute(query)
+
+
+async def mark_users_active(
+    last_activity: dict[int, datetime], session: AsyncSession
+) -> set[int]:
+    """Пакетно сохранить время последней активности пользователей.
+
+    Returns:
+        telegram_id пользователей, строки которых нашлись и обновились.
+    """
+    if not last_activity:
+        return set()
+
+    result = await session.execute(MARK_USERS_ACTIVE, {
+        "ids": list(last_activity),
+        "active_at": list(last_activity.values()),
+    })
+    return set(result.scalars())
+
+
+async def get_admin_ids(session: AsyncSession) -> set[int]:
+    """Telegram ID пользователей с флагом is_admin."""
+    result = await session.execute(ADMIN_IDS)
+    return set(result.scalars())
@@ -0,0 +1,79 @@
+import asyncio
+import time
+from logging import getLogger
+from typing import Awaitable, Callable, Sequence
+
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker
+from sqlmodel import select
+
+from data import fast_queries
+from data.config import DatabaseSettings
+from data.models import Category, Content, User
+from data.queries import get_button_by_id, get_category_by_id
+from utils.metrics import metrics
+
+logger = getLogger(__name__)
+
+WarmupStatement = Callable[[AsyncSession], Awaitable[object]]
+
+
+async def warm_up_queries(session: AsyncSession) -> None:
+    """Горячие запросы из `data.queries`."""
+    category_id = (
+        await session.execute(select(Category.id).limit(1))
+    ).scalar_one_or_none()
+    if category_id is not None:
+        await get_category_by_id(category_id, session)
+
+    button_id = (
+        await session.execute(select(Content.id).limit(1))
+    ).scalar_one_or_none()
+    if button_id is not None:
+        await get_button_by_id(button_id, session)
+
+    # Тот же запрос, что в get_or_create_user и set_user_(in)active
+    await session.get(User, 0)
+
+    if DatabaseSettings.FAST_PATH:
+        await fast_queries.get_content(session, button_id or 0)
+        await fast_queries.get_user(session, 0)
+
+
+async def warm_up(
+    engine: AsyncEngine,
+    connections: int,
+    statements: Sequence[WarmupStatement] = (warm_up_queries,),
+) -> None:
+    """Прогрев пула соединений и подготовленных выражений.
+
+    Одновременно открывает до `connections` соединений (не больше
+    размера пула) и на каждом выполняет `statements`: так SQLAlchemy
+    компилирует запросы, а asyncpg загружает типы и готовит выражения
+    до первых обновлений. Изменения, сделанные при прогреве, откатываются.
+    """
+    connections = min(connections, engine.pool.size())
+    if connections <= 0:
+        return
+
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+
+    async def warm_connection() -> None:
+        async with session_factory() as session:
+            for statement in statements:
+                try:
+                    await statement(session)
+                except Exception as e:
+                    logger.warning(
+                        f"Warm-up statement {statement.__name__} failed: {e}"
+                    )
+                    await session.rollback()
+            await session.rollback()
+
+    started = time.monotonic()
+    await asyncio.gather(*(warm_connection() for _ in range(connections)))
+    elapsed = time.monotonic() - started
+    metrics.observe("db.warmup", elapsed)
+    logger.info(
+        f"Warmed up {connections} connection(s) to {engine.url.host} "
+        f"in {elapsed:.2f}s"
+    )
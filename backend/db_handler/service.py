@@ -1,11 +1,24 @@
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
 from datetime import datetime
 from typing import Any
 
 from aiogram.enums import UpdateType
+from sqlalchemy import BigInteger, cast
 from sqlalchemy.ext.asyncio.session import AsyncSession
-from sqlmodel import distinct, extract, func, select, text
+from sqlmodel import extract, func, select, text
 
-from data.models import InteractionEvent
+from data.db import get_session
+from data.models import InteractionEvent, User
+
+# Часть событий под нагрузкой не записывается (см. EventSampler), а у
+# записанных вес `1 / доля`, поэтому число событий — сумма весов.
+# Пользователей по выборке не посчитать, для них есть поле
+# `User.last_activity_at`, которое обновляется на каждое обращение.
+WEIGHTED_COUNT = cast(
+    func.round(func.coalesce(func.sum(InteractionEvent.sample_weight), 0)),
+    BigInteger,
+)
 
 
 class InteractionEventService:
@@ -14,6 +27,20 @@ class InteractionEventService:
     def __init__(self, db: AsyncSession):
         self.db = db
 
+    @classmethod
+    @asynccontextmanager
+    async def analytics(cls) -> AsyncIterator["InteractionEventService"]:
+        """Сервис для агрегатов, читающий с реплики (если она настроена).
+
+        Пример:
+            ```python
+            async with InteractionEventService.analytics() as service:
+                total = await service.count_total_events()
+            ```
+        """
+        async with get_session(readonly=True) as session:
+            yield cls(session)
+
     async def save_event(self, event: InteractionEvent) -> None:
         """Создание записи InteractionEvent в бд."""
         self.db.add(event)
@@ -21,14 +48,16 @@ class InteractionEventService:
 
     async def count_unique_users(self) -> int:
         """Количество уникальных пользователей."""
-        query = select(func.count(distinct(InteractionEvent.user_id)))
+        query = select(func.count(User.telegram_id)).where(
+            User.last_activity_at.isnot(None)
+        )
         result = await self.db.execute(query)
         count = result.scalar()
         return count or 0
 
     async def count_total_events(self) -> int:
         """Общее количество событий."""
-        query = select(func.count(InteractionEvent.id))
+        query = select(WEIGHTED_COUNT)
         result = await self.db.execute(query)
         count = result.scalar()
         return count or 0
@@ -60,7 +89,7 @@ class InteractionEventService:
             "month", InteractionEvent.created_at
         ).label("month")
         query = (
-            select(truncated, func.count(InteractionEvent.id).label("count"))
+            select(truncated, WEIGHTED_COUNT.label("count"))
             .where(extract("year", InteractionEvent.created_at) == year)
             .group_by(truncated)
             .order_by(truncated)
@@ -85,7 +114,7 @@ class InteractionEventService:
             "day", InteractionEvent.created_at
         ).label("day")
         query = (
-            select(truncated, func.count(InteractionEvent.id).label("count"))
+            select(truncated, WEIGHTED_COUNT.label("count"))
             .where(
                 InteractionEvent.created_at >= func.now() - text(
                     "interval '7 days'",
@@ -100,16 +129,20 @@ class InteractionEventService:
         return result_list
 
     async def get_users_with_only_one_message_count(self) -> int:
-        """Количество пользователей, которые не пошли дальше /start."""
-        subquery = (
-            select(InteractionEvent.user_id)
-            .group_by(InteractionEvent.user_id)
-            .having(func.count(InteractionEvent.id) == 1)
-        ).subquery()
-        query = (
-            select(func.count(distinct(InteractionEvent.user_id)))
+        """Количество пользователей, которые не пошли дальше /start.
+
+        /start записывается всегда и с тем же временем, что и
+        `User.last_activity_at`, поэтому такие пользователи — те, чьё
+        последнее обращение не позже первого /start.
+        """
+        first_start = (
+            select(func.min(InteractionEvent.created_at))
+            .where(InteractionEvent.user_id == User.telegram_id)
             .where(InteractionEvent.message_text == "/start")
-            .where(InteractionEvent.user_id.in_(subquery))
+            .scalar_subquery()
+        )
+        query = select(func.count(User.telegram_id)).where(
+            User.last_activity_at <= first_start
         )
         result = await self.db.execute(query)
         count = result.scalar()
@@ -124,12 +157,12 @@ class InteractionEventService:
         query = (
             select(
                 InteractionEvent.message_text,
-                func.count(InteractionEvent.id).label("count"),
+                WEIGHTED_COUNT.label("count"),
             )
             .where(InteractionEvent.event_type == UpdateType.MESSAGE)
             .where(InteractionEvent.message_text.isnot(None))
             .group_by(InteractionEvent.message_text)
-            .order_by(func.count(InteractionEvent.id).desc())
+            .order_by(WEIGHTED_COUNT.desc())
             .limit(10)
         )
         result = await self.db.execute(query)
@@ -147,12 +180,12 @@ class InteractionEventService:
         query = (
             select(
                 InteractionEvent.callback_data,
-                func.count(InteractionEvent.id).label("count"),
+                WEIGHTED_COUNT.label("count"),
             )
             .where(InteractionEvent.event_type == UpdateType.CALLBACK_QUERY)
             .where(InteractionEvent.callback_data.isnot(None))
             .group_by(InteractionEvent.callback_data)
-            .order_by(func.count(InteractionEvent.id).desc())
+            .order_by(WEIGHTED_COUNT.desc())
             .limit(10)
         )
         result = await self.db.execute(query)
@@ -163,7 +196,7 @@ class InteractionEventService:
 
     async def get_callback_usage_count(self, callback_data: str) -> int:
         """Количество использований колбэка по имени."""
-        query = select(func.count(InteractionEvent.id)).where(
+        query = select(WEIGHTED_COUNT).where(
             InteractionEvent.callback_data == callback_data
         )
         result = await self.db.execute(query)
@@ -0,0 +1,128 @@
+import asyncio
+import json
+from typing import Any, Optional
+
+from aiogram import Bot
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
+from aiohttp import web
+
+TOKEN = '123456:test-token'
+
+BOT_USER = {
+    'id': 123456,
+    'is_bot': True,
+    'first_name': 'Test bot',
+    'username': 'test_bot',
+}
+
+
+def make_message_update(
+    update_id: int, user_id: int, text: str
+) -> dict[str, Any]:
+    """Обновление с текстовым сообщением в личном чате."""
+    user = {'id': user_id, 'is_bot': False, 'first_name': f'User {user_id}'}
+    return {
+        'update_id': update_id,
+        'message': {
+            'message_id': update_id,
+            'date': 0,
+            'chat': {'id': user_id, 'type': 'private'},
+            'from': user,
+            'text': text,
+        },
+    }
+
+
+class FakeTelegramServer:
+    """Заглушка Bot API на aiohttp.
+
+    Отдаёт обновления из `updates` через getUpdates (с учётом offset),
+    отвечает успехом на остальные методы и записывает все вызовы в
+    `calls` как пары (метод, параметры).
+    """
+
+    def __init__(self, poll_wait: float = 0.05) -> None:
+        self.poll_wait = poll_wait
+        self.updates: list[dict[str, Any]] = []
+        self.calls: list[tuple[str, dict[str, Any]]] = []
+        self._called = asyncio.Condition()
+        self._runner: Optional[web.AppRunner] = None
+        self.base_url = ''
+
+    async def __aenter__(self) -> 'FakeTelegramServer':
+        app = web.Application()
+        app.router.add_post('/bot{token}/{method}', self._handle)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, '127.0.0.1', 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.base_url = f'http://127.0.0.1:{port}'
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self._runner.cleanup()
+
+    def requests(self, method: str) -> list[dict[str, Any]]:
+        return [params for name, params in self.calls if name == method]
+
+    async def wait_for(self, method: str, timeout: float = 5) -> dict:
+        """Дождаться вызова метода и вернуть его параметры."""
+        async with self._called:
+            await asyncio.wait_for(
+                self._called.wait_for(lambda: self.requests(method)), timeout
+            )
+        return self.requests(method)[0]
+
+    @staticmethod
+    async def _params(request: web.Request) -> dict[str, Any]:
+        if request.content_type == 'application/json':
+            return await request.json()
+        params = {}
+        for key, value in (await request.post()).items():
+            try:
+                params[key] = json.loads(value)
+            except (TypeError, ValueError):
+                params[key] = value
+        return params
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        method = request.match_info['method']
+        params = await self._params(request)
+        async with self._called:
+            self.calls.append((method, params))
+            self._called.notify_all()
+
+        if method == 'getUpdates':
+            result = await self._get_updates(int(params.get('offset', 0)))
+        elif method == 'getMe':
+            result = BOT_USER
+        elif method == 'sendMessage':
+            result = {
+                'message_id': len(self.calls),
+                'date': 0,
+                'chat': {'id': int(params['chat_id']), 'type': 'private'},
+                'from': BOT_USER,
+                'text': params.get('text', ''),
+            }
+        else:
+            result = True
+        return web.json_response({'ok': True, 'result': result})
+
+    async def _get_updates(self, offset: int) -> list[dict[str, Any]]:
+        pending = [u for u in self.updates if u['update_id'] >= offset]
+        if not pending:
+            # Короткое ожидание вместо long polling
+            await asyncio.sleep(self.poll_wait)
+        return pending
+
+
+def make_bot(server: FakeTelegramServer) -> Bot:
+    """Бот, отправляющий запросы Bot API в заглушку `server`."""
+    return Bot(
+        TOKEN,
+        session=AiohttpSession(
+            api=TelegramAPIServer.from_base(server.base_url)
+        ),
+    )
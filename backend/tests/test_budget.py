@@ -0,0 +1,61 @@
+import asyncio
+
+from aiogram.types import Message
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from bot.config import Messages
+from bot.middlewares.budget import LatencyBudget, LatencyBudgetMiddleware
+from fake_telegram import FakeTelegramServer, make_bot, make_message_update
+
+BUDGET = LatencyBudget('test', 0.05, None)
+
+
+def run_over_budget(commit: bool):
+    """Обработчик, превышающий срок с открытой транзакцией.
+
+    При `commit=True` до этого он успевает зафиксировать одну
+    транзакцию. Соединение с БД не нужно: транзакции сессии без
+    запросов к нему не обращаются.
+    """
+
+    async def handler(event, data):
+        session = data['session']
+        if commit:
+            await session.commit()
+        await session.begin()
+        await asyncio.sleep(1)
+
+    async def scenario():
+        async with FakeTelegramServer() as server:
+            bot = make_bot(server)
+            message = Message.model_validate(
+                make_message_update(1, 42, 'question')['message'],
+                context={'bot': bot},
+            )
+            try:
+                async with AsyncSession() as session:
+                    result = await LatencyBudgetMiddleware(BUDGET)(
+                        handler, message, {'session': session}
+                    )
+                    in_transaction = session.in_transaction()
+            finally:
+                await bot.session.close()
+            return result, in_transaction, server.requests('sendMessage')
+
+    return asyncio.run(scenario())
+
+
+def test_timeout_rolls_back_and_tells_user():
+    result, in_transaction, sent = run_over_budget(commit=False)
+
+    assert result is None
+    assert not in_transaction
+    assert [params['text'] for params in sent] == [Messages.TIMEOUT]
+
+
+def test_timeout_after_commit_sends_nothing():
+    result, in_transaction, sent = run_over_budget(commit=True)
+
+    assert result is None
+    assert not in_transaction
+    assert sent == []
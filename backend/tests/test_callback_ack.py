@@ -0,0 +1,38 @@
+import asyncio
+
+from bot.middlewares.callback_ack import (
+    CallbackAck,
+    CallbackAckMiddleware,
+    CallbackAnswerMiddleware,
+)
+from fake_telegram import FakeTelegramServer, make_bot
+
+
+def test_repeated_callback_answer_is_not_sent():
+    acks = CallbackAckMiddleware()
+
+    async def scenario():
+        async with FakeTelegramServer() as server:
+            bot = make_bot(server)
+            bot.session.middleware(CallbackAnswerMiddleware(acks))
+            acks.pending['1'] = CallbackAck(chat_id=42)
+            try:
+                first = await bot.answer_callback_query('1')
+                repeated = await bot.answer_callback_query(
+                    '1', text='Категория не найдена', show_alert=True
+                )
+                untracked = await bot.answer_callback_query('2')
+            finally:
+                await bot.session.close()
+            return server, first, repeated, untracked
+
+    server, first, repeated, untracked = asyncio.run(scenario())
+
+    assert first is repeated is untracked is True
+    assert [
+        str(params['callback_query_id'])
+        for params in server.requests('answerCallbackQuery')
+    ] == ['1', '2']
+    assert server.requests('sendMessage')[0]['text'] == (
+        'Категория не найдена'
+    )
@@ -0,0 +1,183 @@
+import asyncio
+from typing import Optional
+
+import pytest
+from aiogram import Bot, Dispatcher, F, Router
+from aiogram.dispatcher.flags import get_flag
+from aiogram.filters.callback_data import CallbackData
+from aiogram.types import Update
+
+from bot.handlers.dispatch import CallbackTable
+from bot.keyboards.callbacks import (
+    AdminCallback,
+    ButtonCallback,
+    CompactCallbackData,
+    FeedbackCallback,
+    GoToMainMenuCallback,
+    RatingCallback,
+)
+
+TOKEN = '123456:test-token'
+
+
+class PlainAdminCallback(CallbackData, prefix='admin'):
+    """Стандартная реализация aiogram для сверки формата."""
+
+    action: str
+    question_id: Optional[int] = None
+    reminder_type: Optional[str] = None
+
+
+class ScoreCallback(CompactCallbackData, prefix='score'):
+    """Тип без быстрого кодека: используется реализация aiogram."""
+
+    value: float
+
+
+@pytest.mark.parametrize('callback_data', [
+    ButtonCallback(button_id=7),
+    GoToMainMenuCallback(),
+    AdminCallback(action='answer', question_id=15),
+    AdminCallback(action='remind', reminder_type='weekly'),
+    FeedbackCallback(action='useful', content_id=3),
+    RatingCallback(rating=5, content_id=3),
+    ScoreCallback(value=1.5),
+])
+def test_compact_callback_round_trip(callback_data):
+    packed = callback_data.pack()
+    unpacked = type(callback_data).unpack(packed)
+
+    assert unpacked == callback_data
+    assert unpacked.model_dump() == callback_data.model_dump()
+    assert unpacked.pack() == packed
+
+
+def test_compact_callback_matches_aiogram_format():
+    compact = AdminCallback(action='answer', question_id=15)
+    plain = PlainAdminCallback(action='answer', question_id=15)
+
+    assert compact.pack() == plain.pack() == 'admin:answer:15:'
+    assert AdminCallback.unpack(plain.pack()).model_dump() == (
+        PlainAdminCallback.unpack(compact.pack()).model_dump()
+    )
+    assert AdminCallback.__codec__ is not None
+    assert ScoreCallback.__codec__ is None
+
+
+@pytest.mark.parametrize('value, error', [
+    ('rating:5', TypeError),
+    ('rating:5:3:1', TypeError),
+    ('button:5:3', ValueError),
+    ('rating:five:3', ValueError),
+])
+def test_compact_callback_rejects_bad_data(value, error):
+    with pytest.raises(error):
+        RatingCallback.unpack(value)
+
+
+def test_compact_callback_pack_checks_values():
+    with pytest.raises(ValueError):
+        FeedbackCallback(action='a:b', content_id=1).pack()
+    with pytest.raises(ValueError):
+        FeedbackCallback(action='x' * 64, content_id=1).pack()
+
+
+def make_callback_update(data: str) -> Update:
+    user = {'id': 42, 'is_bot': False, 'first_name': 'User'}
+    return Update.model_validate({
+        'update_id': 1,
+        'callback_query': {
+            'id': '1',
+            'from': user,
+            'chat_instance': '1',
+            'data': data,
+            'message': {
+                'message_id': 1,
+                'date': 0,
+                'chat': {'id': 42, 'type': 'private'},
+                'from': user,
+                'text': 'menu',
+            },
+        },
+    })
+
+
+def route(dp: Dispatcher, data: str):
+    """Результат обработчика, выбранного для callback с данными `data`."""
+
+    async def feed():
+        bot = Bot(TOKEN)
+        try:
+            return await dp.feed_update(bot, make_callback_update(data))
+        finally:
+            await bot.session.close()
+
+    return asyncio.run(feed())
+
+
+def make_table_dispatcher() -> Dispatcher:
+    router = Router()
+    table = CallbackTable(router)
+
+    @table(AdminCallback, rule=F.action == 'answer')
+    async def answer(callback, callback_data: AdminCallback):
+        return f'answer {callback_data.question_id}'
+
+    @table(AdminCallback, flags={'budget': 'admin'})
+    async def other_admin(callback, callback_data: AdminCallback, budget):
+        return f'{callback_data.action} {budget}'
+
+    @table(RatingCallback, F.from_user.id == 1)
+    async def rating_for_admin(callback, callback_data: RatingCallback):
+        return 'admin rating'
+
+    @table(RatingCallback)
+    async def rating(callback, callback_data: RatingCallback):
+        return f'rating {callback_data.rating}'
+
+    @table('raw')
+    async def raw(callback):
+        return f'raw {callback.data}'
+
+    @router.callback_query()
+    async def fallback(callback):
+        return 'fallback'
+
+    # Внутренние middleware видят флаги найденного обработчика
+    @router.callback_query.middleware()
+    async def budget_flag(handler, event, data):
+        data['budget'] = get_flag(data, 'budget')
+        return await handler(event, data)
+
+    dp = Dispatcher()
+    dp.include_router(router)
+    return dp
+
+
+@pytest.mark.parametrize('data, expected', [
+    ('admin:answer:15:', 'answer 15'),
+    ('admin:remind::weekly', 'remind admin'),
+    ('rating:4:3', 'rating 4'),
+    ('raw:anything', 'raw raw:anything'),
+    ('rating:bad:3', 'fallback'),
+    ('unknown:1', 'fallback'),
+])
+def test_callback_table_routes_by_prefix(data, expected):
+    assert route(make_table_dispatcher(), data) == expected
+
+
+def test_callback_table_rejects_prefix_reuse():
+    table = CallbackTable(Router())
+    table(AdminCallback)(lambda callback: None)
+
+    with pytest.raises(ValueError):
+        table('admin')
+    assert table.prefixes == ['admin']
+
+
+def test_callback_table_rejects_rule_without_callback_data():
+    table = CallbackTable(Router())
+
+    with pytest.raises(ValueError):
+        table('raw', rule=F.action == 'answer')
+    assert table.prefixes == []
@@ -0,0 +1,15 @@
+from bot.services.digest_service import QuestionNotice
+
+
+def test_notice_escapes_user_fields():
+    notice = QuestionNotice(
+        question_id=7,
+        username='a<b>',
+        text='1 < 2 & <script>',
+        url='https://example.com/q/7',
+    )
+
+    for text in (notice.to_message(), notice.to_digest_line()):
+        assert '1 &lt; 2 &amp; &lt;script&gt;' in text
+        assert '@a&lt;b&gt;' in text
+        assert '<script>' not in text
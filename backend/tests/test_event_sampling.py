@@ -0,0 +1,49 @@
+from aiogram.enums import UpdateType
+
+from bot.services.event_sampling import EventSampler
+from utils.metrics import metrics
+
+
+def make_sampler(rate: float, **options) -> EventSampler:
+    options.setdefault('adaptive', False)
+    return EventSampler(
+        message_rate=rate,
+        callback_rate=rate,
+        prefix_rates={},
+        min_rate=0,
+        **options,
+    )
+
+
+def test_start_is_always_recorded():
+    sampler = make_sampler(0)
+
+    assert sampler.sample(UpdateType.MESSAGE, message_text='/start') == 1.0
+    assert sampler.sample(UpdateType.MESSAGE, message_text='hello') is None
+    assert sampler.sample(UpdateType.CALLBACK_QUERY, 'button:1') is None
+
+
+def test_sampled_events_carry_inverse_rate_weight():
+    draws = iter([0.1, 0.25, 0.24, 0.9])
+    sampler = make_sampler(0.25, rng=draws.__next__)
+
+    weights = [
+        sampler.sample(UpdateType.MESSAGE, message_text='hello')
+        for _ in range(4)
+    ]
+
+    assert weights == [4.0, None, 4.0, None]
+
+
+def test_pending_events_lower_the_rate():
+    sampler = make_sampler(
+        1, adaptive=True, backlog_threshold=100, pending_threshold=1000
+    )
+    try:
+        metrics.set_gauge('events.pending', 500)
+        assert sampler.rate(UpdateType.MESSAGE) == 1.0
+
+        metrics.set_gauge('events.pending', 4000)
+        assert sampler.rate(UpdateType.MESSAGE) == 0.25
+    finally:
+        metrics.set_gauge('events.pending', 0)
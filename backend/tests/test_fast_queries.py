@@ -0,0 +1,172 @@
+import asyncio
+import os
+
+import pytest
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlmodel import SQLModel
+
+from data import fast_queries
+from data.db import SCHEMA_UPGRADES
+from data.models import Category, Content, User
+from data.queries import ACTIVE_CATEGORY_BUTTONS, get_button_by_id
+
+# Запросы asyncpg сверяются с ORM на настоящем PostgreSQL. Тесты
+# создают недостающие таблицы, работают только со своими строками и
+# удаляют их после себя.
+TEST_POSTGRES_URL = os.environ.get('TEST_POSTGRES_URL')
+TEST_USER_ID = 9_000_000_001
+
+pytestmark = pytest.mark.skipif(
+    not TEST_POSTGRES_URL, reason='TEST_POSTGRES_URL is not set'
+)
+
+
+def run_with_catalog(scenario):
+    """Выполнить сценарий на движке с тестовой категорией и контентом."""
+
+    async def main():
+        engine = create_async_engine(TEST_POSTGRES_URL)
+        session_factory = async_sessionmaker(engine, expire_on_commit=False)
+        async with engine.begin() as conn:
+            await conn.run_sync(SQLModel.metadata.create_all)
+            for statement in SCHEMA_UPGRADES:
+                await conn.exec_driver_sql(statement)
+
+        async with session_factory() as session:
+            category = Category(
+                title='fast queries test', description='', is_active=True
+            )
+            session.add(category)
+            await session.flush()
+            session.add_all(
+                Content(
+                    title=f'content {index}',
+                    description=f'text {index}',
+                    url_link=f'https://example.com/{index}',
+                    is_active=index != 2,
+                    views_count=index * 10,
+                    category_id=category.id,
+                )
+                for index in range(5)
+            )
+            session.add(User(telegram_id=TEST_USER_ID, username=None))
+            await session.commit()
+
+        try:
+            return await scenario(engine, session_factory, category.id)
+        finally:
+            async with session_factory() as session:
+                await session.execute(
+                    delete(Content).where(Content.category_id == category.id)
+                )
+                await session.execute(
+                    delete(Category).where(Category.id == category.id)
+                )
+                await session.execute(
+                    delete(User).where(User.telegram_id == TEST_USER_ID)
+                )
+                await session.commit()
+            await engine.dispose()
+
+    return asyncio.run(main())
+
+
+async def content_ids(session_factory, category_id):
+    async with session_factory() as session:
+        result = await session.execute(
+            select(Content.id)
+            .where(Content.category_id == category_id)
+            .order_by(Content.id)
+        )
+        return result.scalars().all()
+
+
+def test_get_content_matches_orm():
+    async def scenario(engine, session_factory, category_id):
+        pairs = []
+        async with session_factory() as session:
+            for content_id in await content_ids(session_factory, category_id):
+                orm = await get_button_by_id(content_id, session)
+                fast = await fast_queries.get_content(session, content_id)
+                pairs.append((orm, fast))
+            missing = await fast_queries.get_content(session, -1)
+        return pairs, missing
+
+    pairs, missing = run_with_catalog(scenario)
+
+    assert pairs and missing is None
+    for orm, fast in pairs:
+        assert fast == fast_queries.ContentRecord(
+            *(getattr(orm, field) for field in fast._fields)
+        )
+
+
+def test_get_category_buttons_matches_orm():
+    async def scenario(engine, session_factory, category_id):
+        async with session_factory() as session:
+            result = await session.execute(
+                ACTIVE_CATEGORY_BUTTONS, {'category_id': category_id}
+            )
+            orm = [(button.id, button.title) for button in result.scalars()]
+            fast = await fast_queries.get_category_buttons(
+                session, category_id
+            )
+        return orm, fast
+
+    orm, fast = run_with_catalog(scenario)
+
+    assert len(orm) == 4
+    assert [tuple(button) for button in fast] == orm
+
+
+def test_get_user_matches_orm():
+    async def scenario(engine, session_factory, category_id):
+        async with session_factory() as session:
+            orm = await session.get(User, TEST_USER_ID)
+            fast = await fast_queries.get_user(session, TEST_USER_ID)
+            missing = await fast_queries.get_user(session, -1)
+        return orm, fast, missing
+
+    orm, fast, missing = run_with_catalog(scenario)
+
+    assert fast == (orm.telegram_id, orm.username)
+    assert missing is None
+
+
+def test_increment_views_matches_orm_and_commits_at_once():
+    async def scenario(engine, session_factory, category_id):
+        fast_id, orm_id = (await content_ids(session_factory, category_id))[:2]
+
+        async with session_factory() as session:
+            button = await get_button_by_id(orm_id, session)
+            button.views_count += 1
+            await session.commit()
+            orm_count = button.views_count
+
+        # Открытая транзакция вызывающего не задерживает запись
+        async with session_factory() as session:
+            await fast_queries.get_content(session, fast_id)
+            fast_count = await fast_queries.increment_views(engine, fast_id)
+            await session.rollback()
+
+        concurrent = await asyncio.gather(*(
+            fast_queries.increment_views(engine, fast_id) for _ in range(10)
+        ))
+        async with session_factory() as session:
+            stored = await session.scalar(
+                select(Content.views_count).where(Content.id == fast_id)
+            )
+        missing = await fast_queries.increment_views(engine, -1)
+        return orm_count, fast_count, concurrent, stored, missing
+
+    orm_count, fast_count, concurrent, stored, missing = run_with_catalog(
+        scenario
+    )
+
+    # Первые два контента начинают с 0 и 10 просмотров
+    assert orm_count == 11
+    assert fast_count == 1
+    assert sorted(concurrent) == list(range(2, 12))
+    assert stored == 11
+    assert missing == 0
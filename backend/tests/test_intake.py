@@ -0,0 +1,227 @@
+import asyncio
+import queue
+import socket
+
+import aiohttp
+from aiogram import Dispatcher, Router
+from aiogram.types import Message
+from aiohttp import web
+from aiohttp.test_utils import TestClient, TestServer
+
+from bot import app as bot_app
+from bot.config import BotSettings
+from bot.workers import WorkerPool, update_route_key
+from fake_telegram import FakeTelegramServer, make_bot, make_message_update
+
+def make_echo_dispatcher() -> Dispatcher:
+    """Диспетчер с одним обработчиком сообщений, без БД."""
+    router = Router()
+
+    @router.message()
+    async def echo(message: Message):
+        await message.answer(f'echo: {message.text}')
+
+    dp = Dispatcher()
+    dp.include_router(router)
+    return dp
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+async def wait_until(predicate, timeout: float = 5) -> None:
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    while not predicate():
+        assert loop.time() < deadline, 'condition not reached'
+        await asyncio.sleep(0.01)
+
+
+async def post_update(
+    url: str, update: dict, secret: str = ''
+) -> aiohttp.ClientResponse:
+    """POST обновления, пока сервер webhook не начнёт принимать запросы."""
+    headers = {'X-Telegram-Bot-Api-Secret-Token': secret} if secret else {}
+    for _ in range(100):
+        try:
+            async with aiohttp.ClientSession() as session:
+                async with session.post(
+                    url, json=update, headers=headers
+                ) as response:
+                    return response
+        except aiohttp.ClientConnectorError:
+            await asyncio.sleep(0.05)
+    raise AssertionError(f'{url} is not reachable')
+
+
+def test_polling_requests_only_used_update_types(monkeypatch):
+    async def scenario():
+        async with FakeTelegramServer() as server:
+            server.updates.append(make_message_update(1, 42, 'hello'))
+            bot, dp = make_bot(server), make_echo_dispatcher()
+            monkeypatch.setattr(bot_app, 'bot', bot)
+            monkeypatch.setattr(bot_app, 'dp', dp)
+            monkeypatch.setattr(BotSettings, 'POLLING_TIMEOUT', 7)
+
+            polling = asyncio.create_task(bot_app.run_polling())
+            try:
+                sent = await server.wait_for('sendMessage')
+                await wait_until(
+                    lambda: len(server.requests('getUpdates')) >= 2
+                )
+            finally:
+                await dp.stop_polling()
+                await polling
+                await bot.session.close()
+            return server, sent
+
+    server, sent = asyncio.run(scenario())
+
+    assert server.requests('deleteWebhook') == [
+        {'drop_pending_updates': True}
+    ]
+    first_poll, next_poll = server.requests('getUpdates')[:2]
+    assert first_poll['allowed_updates'] == ['message']
+    assert first_poll['timeout'] == 7
+    assert next_poll['offset'] == 2
+    assert sent['chat_id'] == 42
+    assert sent['text'] == 'echo: hello'
+
+
+def test_webhook_registers_and_serves_updates(monkeypatch):
+    port = free_port()
+    for name, value in {
+        'WEBAPP_HOST': '127.0.0.1',
+        'WEBAPP_PORT': port,
+        'WEBHOOK_URL': 'https://bot.example',
+        'WEBHOOK_PATH': '/webhook',
+        'WEBHOOK_SECRET': 's3cret',
+        'WEBHOOK_REGISTER': True,
+        'WEBHOOK_MAX_CONNECTIONS': 10,
+    }.items():
+        monkeypatch.setattr(BotSettings, name, value)
+
+    async def scenario():
+        async with FakeTelegramServer() as server:
+            bot, dp = make_bot(server), make_echo_dispatcher()
+            stop = asyncio.Event()
+            monkeypatch.setattr(bot_app, 'bot', bot)
+            monkeypatch.setattr(bot_app, 'dp', dp)
+            monkeypatch.setattr(bot_app, 'wait_for_stop_signal', stop.wait)
+
+            serving = asyncio.create_task(bot_app.run_webhook())
+            url = f'http://127.0.0.1:{port}/webhook'
+            try:
+                rejected = await post_update(
+                    url, make_message_update(1, 42, 'spoofed'), 'wrong'
+                )
+                accepted = await post_update(
+                    url, make_message_update(2, 42, 'hello'), 's3cret'
+                )
+                sent = await server.wait_for('sendMessage')
+                async with aiohttp.ClientSession() as session:
+                    async with session.get(
+                        f'http://127.0.0.1:{port}/metrics'
+                    ) as response:
+                        metrics_status = response.status
+            finally:
+                stop.set()
+                await serving
+                await bot.session.close()
+            return server, rejected, accepted, sent, metrics_status
+
+    server, rejected, accepted, sent, metrics_status = asyncio.run(
+        scenario()
+    )
+
+    webhook = server.requests('setWebhook')[0]
+    assert webhook['url'] == 'https://bot.example/webhook'
+    assert webhook['secret_token'] == 's3cret'
+    assert webhook['allowed_updates'] == ['message']
+    assert webhook['max_connections'] == 10
+    assert rejected.status == 401
+    assert accepted.status == 200
+    assert sent['text'] == 'echo: hello'
+    assert len(server.requests('sendMessage')) == 1
+    assert metrics_status == 200
+
+
+def drain(worker_queue) -> list[int]:
+    update_ids = []
+    while True:
+        try:
+            update_ids.append(worker_queue.get(timeout=0.5)['update_id'])
+        except queue.Empty:
+            return update_ids
+
+
+def test_supervisor_polling_routes_raw_updates_by_user():
+    pool = WorkerPool(target=lambda *args: None, workers=2, queue_size=10)
+
+    async def scenario():
+        async with FakeTelegramServer() as server:
+            server.updates.extend([
+                make_message_update(1, 10, 'a'),
+                make_message_update(2, 11, 'b'),
+                make_message_update(3, 10, 'c'),
+            ])
+            bot = make_bot(server)
+            poller = asyncio.create_task(
+                pool.poll(bot, ['message'], polling_timeout=3)
+            )
+            try:
+                await wait_until(
+                    lambda: len(server.requests('getUpdates')) >= 2
+                )
+            finally:
+                poller.cancel()
+                await asyncio.gather(poller, return_exceptions=True)
+                await bot.session.close()
+            return server
+
+    server = asyncio.run(scenario())
+
+    first_poll, next_poll = server.requests('getUpdates')[:2]
+    assert first_poll == {'timeout': 3, 'allowed_updates': ['message']}
+    assert next_poll['offset'] == 4
+    assert drain(pool._queues[0]) == [1, 3]
+    assert drain(pool._queues[1]) == [2]
+
+
+def test_supervisor_webhook_checks_secret(monkeypatch):
+    monkeypatch.setattr(BotSettings, 'WEBHOOK_SECRET', 's3cret')
+    pool = WorkerPool(target=lambda *args: None, workers=2, queue_size=10)
+
+    async def scenario():
+        app = web.Application()
+        app.router.add_post('/webhook', pool.handle_webhook)
+        async with TestClient(TestServer(app)) as client:
+            update = make_message_update(5, 11, 'hi')
+            rejected = await client.post('/webhook', json=update)
+            accepted = await client.post(
+                '/webhook',
+                json=update,
+                headers={'X-Telegram-Bot-Api-Secret-Token': 's3cret'},
+            )
+            return rejected.status, accepted.status
+
+    assert asyncio.run(scenario()) == (401, 200)
+    assert drain(pool._queues[0]) == []
+    assert drain(pool._queues[1]) == [5]
+
+
+def test_update_route_key():
+    callback = {
+        'update_id': 7,
+        'callback_query': {'id': '1', 'from': {'id': 99}, 'data': 'x'},
+    }
+    chat_post = {'update_id': 8, 'channel_post': {'chat': {'id': -100}}}
+    poll = {'update_id': 9, 'poll': {'id': 'p'}}
+
+    assert update_route_key(make_message_update(1, 42, 'hi')) == 42
+    assert update_route_key(callback) == 99
+    assert update_route_key(chat_post) == -100
+    assert update_route_key(poll) == 9
@@ -0,0 +1,74 @@
+import asyncio
+import logging
+from collections import defaultdict
+from typing import Any, cast
+
+from decouple import config
+
+logger = logging.getLogger(__name__)
+
+# Интервал (сек) записи снимка метрик в лог
+METRICS_LOG_INTERVAL = cast(
+    int, config('METRICS_LOG_INTERVAL', default=300, cast=int)
+)
+
+
+class Metrics:
+    """Реестр метрик процесса: счётчики, gauge и тайминги.
+
+    Имена метрик плоские, с точками: `outbound.sent.bulk`.
+    """
+
+    def __init__(self) -> None:
+        self._counters: defaultdict[str, float] = defaultdict(float)
+        self._gauges: dict[str, float] = {}
+        # name -> [count, total, max]
+        self._timings: dict[str, list[float]] = {}
+
+    def inc(self, name: str, value: float = 1) -> None:
+        """Увеличить счётчик."""
+        self._counters[name] += value
+
+    def set_gauge(self, name: str, value: float) -> None:
+        """Установить текущее значение."""
+        self._gauges[name] = value
+
+    def get_gauge(self, name: str, default: float = 0.0) -> float:
+        """Текущее значение gauge."""
+        return self._gauges.get(name, default)
+
+    def observe(self, name: str, seconds: float) -> None:
+        """Записать длительность (в секундах)."""
+        timing = self._timings.get(name)
+        if timing is None:
+            self._timings[name] = [1, seconds, seconds]
+            return
+        timing[0] += 1
+        timing[1] += seconds
+        if seconds > timing[2]:
+            timing[2] = seconds
+
+    def snapshot(self) -> dict[str, Any]:
+        """Текущие значения всех метрик."""
+        return {
+            'counters': dict(self._counters),
+            'gauges': dict(self._gauges),
+            'timings': {
+                name: {
+                    'count': int(count),
+                    'avg': total / count if count else 0.0,
+                    'max': max_value,
+                }
+                for name, (count, total, max_value) in self._timings.items()
+            },
+        }
+
+
+metrics = Metrics()
+
+
+async def run_metrics_logger(interval: int = METRICS_LOG_INTERVAL) -> None:
+    """Периодически пишет снимок метрик в лог."""
+    while True:
+        await asyncio.sleep(interval)
+        logger.info(f'Metrics: {metrics.snapshot()}')